@@ -0,0 +1,383 @@
+"""API HTTP JSON de la calculadora, asíncrona y sin dependencias fuera de la biblioteca estándar.
+
+Rutas:
+    POST /ahorros        un escenario (objeto con las entradas) → ahorros por categoría y total
+    POST /ahorros/lote   {"escenarios": [...]} → una lista de resultados, calculada vectorizada
+    POST /reporte        un escenario → PDF generado en el pool de procesos de ColaReportes
+    GET  /salud          verificación simple
+    GET  /metrics        métricas en formato Prometheus
+
+Las entradas se validan con los mismos límites que los number_input de
+main.py: todas van de 0 al máximo de MAXIMOS, las de ENTEROS deben ser
+enteras y las ausentes valen cero. Los escenarios individuales que llegan
+juntos se agrupan y se calculan en una sola pasada vectorizada.
+
+Con --procesos varios procesos comparten el puerto; cada uno tiene su
+propio pool de PDF y sus propias métricas en /metrics.
+
+Uso:
+    python api.py --puerto 8080 --procesos 4
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+from typing import Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from calculos import AHORROS, ENTEROS, ENTRADAS, MAXIMOS, calcular_categorias
+from metricas import METRICAS, contar, tramo
+
+# Escenarios individuales que se calculan juntos como máximo
+MAX_AGRUPADOS = 4096
+
+# Escenarios por pedido en /ahorros/lote
+MAX_LOTE = 10_000
+
+# Tamaño máximo del cuerpo de un pedido, en bytes
+MAX_CUERPO = 8 * 1024 * 1024
+
+# Segundos que una conexión keep-alive puede quedar sin pedidos
+TIEMPO_INACTIVA = 30.0
+
+# Máximo de cada entrada; las que no tienen `max_value` en main.py llegan hasta el mayor float
+_LIMITES = {k: MAXIMOS.get(k, sys.float_info.max) for k in ENTRADAS}
+_ENTEROS = frozenset(ENTEROS)
+
+_RAZONES = {
+    200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+    413: 'Payload Too Large', 431: 'Request Header Fields Too Large', 500: 'Internal Server Error',
+    501: 'Not Implemented', 503: 'Service Unavailable',
+}
+
+
+class ErrorPedido(Exception):
+    """Pedido inválido: se responde con `estado` y el detalle en JSON."""
+
+    def __init__(self, estado: int, detalle):
+        super().__init__(detalle)
+        self.estado = estado
+        self.detalle = detalle
+
+
+def _error_entrada(clave: str, valor) -> str:
+    if clave not in _LIMITES:
+        return "entrada desconocida"
+    if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+        return "debe ser un número"
+    if clave in MAXIMOS and 0 <= valor:
+        return f"debe ser menor o igual a {MAXIMOS[clave]:g}"
+    if 0 <= valor <= _LIMITES[clave]:
+        return "debe ser un número entero"
+    return "debe ser un número finito mayor o igual a 0"
+
+
+def validar_entradas(datos) -> Tuple[Dict[str, float], Dict[str, str]]:
+    """Valida un escenario con los límites de los number_input de main.py.
+
+    Devuelve las entradas como float (las ausentes en cero) y los errores por
+    campo; si hay errores las entradas no deben usarse.
+    """
+    if not isinstance(datos, dict):
+        return {}, {'': "se espera un objeto con las entradas"}
+    entradas = dict.fromkeys(ENTRADAS, 0.0)
+    errores = {}
+    for clave, valor in datos.items():
+        # Una sola comparación encadenada descarta negativos, NaN, infinitos y enteros enormes
+        limite = _LIMITES.get(clave)
+        tipo = type(valor)
+        if (limite is not None and (tipo is float or tipo is int) and 0 <= valor <= limite
+                and (clave not in _ENTEROS or valor == int(valor))):
+            entradas[clave] = float(valor)
+        else:
+            errores[clave] = _error_entrada(clave, valor)
+    return entradas, errores
+
+
+def calcular_escenarios(escenarios: List[Mapping[str, float]]) -> List[Dict]:
+    """Ahorros por categoría y total de cada escenario, en una sola pasada vectorizada."""
+    columnas = {k: np.fromiter((e[k] for e in escenarios), np.float64, len(escenarios)) for k in ENTRADAS}
+    resultados = calcular_categorias(columnas)
+    ahorros = [np.broadcast_to(resultados[c]['ahorro'], (len(escenarios),)) for c in AHORROS]
+    total = ahorros[0]
+    for valores in ahorros[1:]:
+        total = total + valores
+    filas = zip(*(valores.tolist() for valores in ahorros))
+    return [{'ahorros': dict(zip(AHORROS, fila)), 'total': t} for fila, t in zip(filas, total.tolist())]
+
+
+class _Agrupador:
+    """Junta los escenarios que llegan en la misma vuelta del event loop y los calcula juntos.
+
+    Un escenario solo cuesta casi lo mismo que mil en la versión vectorizada,
+    así que con muchas conexiones simultáneas agrupar multiplica el rendimiento.
+    """
+
+    def __init__(self, maximo: int = MAX_AGRUPADOS):
+        self.maximo = maximo
+        self._pendientes: List[Tuple[Dict[str, float], asyncio.Future]] = []
+
+    def calcular(self, entradas: Dict[str, float]) -> asyncio.Future:
+        futuro = asyncio.get_running_loop().create_future()
+        self._pendientes.append((entradas, futuro))
+        if len(self._pendientes) == 1:
+            futuro.get_loop().call_soon(self._vaciar)
+        elif len(self._pendientes) >= self.maximo:
+            self._vaciar()
+        return futuro
+
+    def _vaciar(self) -> None:
+        lote, self._pendientes = self._pendientes, []
+        if not lote:
+            return
+        contar('api_lotes_agrupados')
+        contar('api_escenarios_agrupados', len(lote))
+        try:
+            with tramo('calculo', nodo='api'):
+                resultados = calcular_escenarios([entradas for entradas, _ in lote])
+        except Exception as e:
+            for _, futuro in lote:
+                if not futuro.done():
+                    futuro.set_exception(e)
+            return
+        for (_, futuro), resultado in zip(lote, resultados):
+            if not futuro.done():
+                futuro.set_result(resultado)
+
+
+class ServidorAPI:
+    """Servidor HTTP/1.1 con conexiones keep-alive sobre asyncio streams."""
+
+    def __init__(self, workers_pdf: int = 2):
+        self.workers_pdf = workers_pdf
+        self._agrupador = _Agrupador()
+        self._cola = None
+
+    def _cola_reportes(self):
+        # ReportLab y el pool de procesos solo se preparan con el primer pedido de PDF
+        if self._cola is None:
+            from reportes import ColaReportes
+
+            self._cola = ColaReportes(max_workers=self.workers_pdf)
+        return self._cola
+
+    async def iniciar(self, direccion: str, puerto: int, reuse_port: bool = False) -> asyncio.Server:
+        return await asyncio.start_server(
+            self._atender, direccion, puerto, reuse_port=reuse_port, limit=64 * 1024, backlog=1024
+        )
+
+    def cerrar(self) -> None:
+        if self._cola is not None:
+            # Sin esperar, al salir de un proceso hijo los workers de PDF pueden no recibir la orden de cierre
+            self._cola.cerrar(esperar=True)
+
+    async def _atender(self, lector: asyncio.StreamReader, escritor: asyncio.StreamWriter) -> None:
+        conexion = escritor.get_extra_info('socket')
+        if conexion is not None:
+            conexion.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            while True:
+                try:
+                    async with asyncio.timeout(TIEMPO_INACTIVA):
+                        encabezado = await lector.readuntil(b'\r\n\r\n')
+                except asyncio.LimitOverrunError:
+                    escritor.write(_respuesta(431, {'error': "encabezados demasiado grandes"}, False))
+                    break
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                linea, *campos = encabezado[:-4].decode('latin-1').split('\r\n')
+                try:
+                    metodo, ruta, version = linea.split(' ', 2)
+                except ValueError:
+                    escritor.write(_respuesta(400, {'error': "línea de pedido inválida"}, False))
+                    break
+                encabezados = {}
+                for campo in campos:
+                    nombre, _, valor = campo.partition(':')
+                    encabezados[nombre.strip().lower()] = valor.strip()
+                conexion_http = encabezados.get('connection', '').lower()
+                mantener = conexion_http != 'close' if version == 'HTTP/1.1' else conexion_http == 'keep-alive'
+
+                if 'transfer-encoding' in encabezados:
+                    escritor.write(_respuesta(501, {'error': "se requiere Content-Length"}, False))
+                    break
+                try:
+                    largo = int(encabezados.get('content-length', 0))
+                except ValueError:
+                    largo = -1
+                if not 0 <= largo <= MAX_CUERPO:
+                    escritor.write(_respuesta(413, {'error': f"cuerpo de hasta {MAX_CUERPO} bytes"}, False))
+                    break
+                try:
+                    cuerpo = await lector.readexactly(largo) if largo else b''
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+
+                escritor.write(await self._despachar(metodo, ruta.split('?', 1)[0], cuerpo, mantener))
+                await escritor.drain()
+                if not mantener:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            escritor.close()
+
+    async def _despachar(self, metodo: str, ruta: str, cuerpo: bytes, mantener: bool) -> bytes:
+        manejadores = _RUTAS.get(ruta)
+        if manejadores is None:
+            contar('api_pedidos', ruta='otra', estado=404)
+            return _respuesta(404, {'error': f"ruta desconocida: {ruta}"}, mantener)
+        manejador = manejadores.get(metodo)
+        if manejador is None:
+            contar('api_pedidos', ruta=ruta, estado=405)
+            return _respuesta(405, {'error': f"use {', '.join(manejadores)}"}, mantener)
+        with tramo('api', ruta=ruta):
+            try:
+                estado, contenido, tipo = await manejador(self, cuerpo)
+            except ErrorPedido as e:
+                estado, contenido, tipo = e.estado, {'error': e.detalle}, None
+            except Exception as e:
+                estado, contenido, tipo = 500, {'error': str(e)}, None
+        contar('api_pedidos', ruta=ruta, estado=estado)
+        return _respuesta(estado, contenido, mantener, tipo)
+
+    async def _ahorros(self, cuerpo: bytes):
+        entradas, errores = validar_entradas(_json(cuerpo))
+        if errores:
+            raise ErrorPedido(400, errores)
+        return 200, await self._agrupador.calcular(entradas), None
+
+    async def _ahorros_lote(self, cuerpo: bytes):
+        datos = _json(cuerpo)
+        escenarios = datos.get('escenarios') if isinstance(datos, dict) else None
+        if not isinstance(escenarios, list):
+            raise ErrorPedido(400, "se espera un objeto con la lista 'escenarios'")
+        if len(escenarios) > MAX_LOTE:
+            raise ErrorPedido(413, f"hasta {MAX_LOTE} escenarios por pedido")
+        validos = []
+        errores = {}
+        for i, escenario in enumerate(escenarios):
+            entradas, errores_escenario = validar_entradas(escenario)
+            if errores_escenario:
+                errores[i] = errores_escenario
+            validos.append(entradas)
+        if errores:
+            raise ErrorPedido(400, errores)
+        with tramo('calculo', nodo='api_lote'):
+            resultados = calcular_escenarios(validos) if validos else []
+        return 200, {'resultados': resultados}, None
+
+    async def _reporte(self, cuerpo: bytes):
+        entradas, errores = validar_entradas(_json(cuerpo))
+        if errores:
+            raise ErrorPedido(400, errores)
+        resultado = await self._agrupador.calcular(entradas)
+        cola = self._cola_reportes()
+        trabajo = cola.enviar(resultado['ahorros'], entradas)
+        futuro = cola.futuro(trabajo)
+        if futuro is not None:
+            try:
+                await asyncio.wrap_future(futuro)
+            except Exception:
+                pass
+        pdf = cola.resultado(trabajo)
+        if pdf is None:
+            raise ErrorPedido(500, cola.error(trabajo) or "el reporte ya no está disponible, vuelva a pedirlo")
+        return 200, pdf, 'application/pdf'
+
+    async def _salud(self, cuerpo: bytes):
+        return 200, {'estado': 'ok'}, None
+
+    async def _metricas(self, cuerpo: bytes):
+        return 200, METRICAS.texto_prometheus().encode('utf-8'), 'text/plain; version=0.0.4; charset=utf-8'
+
+
+_RUTAS = {
+    '/ahorros': {'POST': ServidorAPI._ahorros},
+    '/ahorros/lote': {'POST': ServidorAPI._ahorros_lote},
+    '/reporte': {'POST': ServidorAPI._reporte},
+    '/salud': {'GET': ServidorAPI._salud},
+    '/metrics': {'GET': ServidorAPI._metricas},
+}
+
+
+def _json(cuerpo: bytes):
+    try:
+        return json.loads(cuerpo)
+    except ValueError:
+        raise ErrorPedido(400, "el cuerpo no es JSON válido")
+
+
+def _respuesta(estado: int, contenido, mantener: bool, tipo: Optional[str] = None) -> bytes:
+    if isinstance(contenido, bytes):
+        cuerpo = contenido
+    else:
+        cuerpo = json.dumps(contenido, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        tipo = 'application/json'
+    return (
+        f"HTTP/1.1 {estado} {_RAZONES.get(estado, '')}\r\n"
+        f"Content-Type: {tipo}\r\n"
+        f"Content-Length: {len(cuerpo)}\r\n"
+        f"Connection: {'keep-alive' if mantener else 'close'}\r\n\r\n"
+    ).encode('latin-1') + cuerpo
+
+
+async def servir(direccion: str = '0.0.0.0', puerto: int = 8080, workers_pdf: int = 2,
+                 reuse_port: bool = False) -> None:
+    """Atiende pedidos hasta que se cancela la tarea o llega SIGTERM."""
+    # Con SIGTERM se cierra ordenadamente, incluidos los workers de PDF
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    api = ServidorAPI(workers_pdf)
+    servidor = await api.iniciar(direccion, puerto, reuse_port)
+    try:
+        async with servidor:
+            await servidor.serve_forever()
+    finally:
+        api.cerrar()
+
+
+def _proceso(direccion: str, puerto: int, workers_pdf: int, reuse_port: bool) -> None:
+    try:
+        asyncio.run(servir(direccion, puerto, workers_pdf, reuse_port))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="API HTTP JSON de la calculadora de ahorros.")
+    parser.add_argument('--direccion', default='0.0.0.0', help="Dirección en la que escuchar")
+    parser.add_argument('--puerto', type=int, default=8080)
+    parser.add_argument('--procesos', type=int, default=1,
+                        help="Procesos que comparten el puerto (SO_REUSEPORT); 0 usa todos los núcleos")
+    parser.add_argument('--workers-pdf', type=int, default=2, help="Procesos para generar PDF, por proceso de la API")
+    args = parser.parse_args(argv)
+
+    procesos = args.procesos or os.cpu_count() or 1
+    print(f"API en http://{args.direccion}:{args.puerto} con {procesos} proceso(s)", flush=True)
+    if procesos == 1:
+        _proceso(args.direccion, args.puerto, args.workers_pdf, False)
+        return
+
+    contexto = multiprocessing.get_context('spawn')
+    hijos = [
+        contexto.Process(target=_proceso, args=(args.direccion, args.puerto, args.workers_pdf, True))
+        for _ in range(procesos)
+    ]
+    for hijo in hijos:
+        hijo.start()
+    # SIGTERM al proceso principal se reenvía a cada hijo para que cierre ordenadamente
+    signal.signal(signal.SIGTERM, lambda *_: [hijo.terminate() for hijo in hijos])
+    for hijo in hijos:
+        try:
+            hijo.join()
+        except KeyboardInterrupt:
+            hijo.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""Cálculo de ahorros por lotes desde la línea de comandos.
+
+Uso:
+    python batch.py clientes.csv resultados.parquet --workers 4
+
+Guardando además cada cliente en el almacén de escenarios:
+    python batch.py clientes.csv resultados.parquet --escenarios escenarios.db
+
+Modo flota (una fila por prensa, ver flota.py), con el resumen por planta y tipo:
+    python batch.py prensas.csv prensas.parquet --flota --agrupar planta tipo --resumen plantas.csv
+"""
+import argparse
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from calculos import ENTRADAS, calcular_ahorros, precio_equilibrio_iflexo
+from escenarios import AlmacenEscenarios
+from flota import AGRUPACIONES, ESQUEMA_PRENSA, RESULTADOS, agregar_flota, combinar_agregados, procesar_bloque_flota
+from utils import ESQUEMA_ENTRADAS, export_chunks, iter_file
+
+# Extensión de salida → (formato de exportación, compresión)
+FORMATOS_SALIDA = {
+    '.csv': ("CSV", None),
+    '.csv.gz': ("CSV", 'gzip'),
+    '.csv.zst': ("CSV", 'zstd'),
+    '.xlsx': ("Excel", None),
+    '.parquet': ("Parquet", None),
+}
+
+
+def procesar_bloque(bloque: pd.DataFrame, objetivo: float = 0.0) -> pd.DataFrame:
+    """Calcula los ahorros de un bloque y los agrega a sus columnas de entrada."""
+    bloque = bloque.reset_index(drop=True)
+    for columna in ENTRADAS:
+        if columna in bloque:
+            bloque[columna] = pd.to_numeric(bloque[columna], errors='coerce').fillna(0).astype('float64')
+    resultados = calcular_ahorros(bloque)
+    resultados['precio_equilibrio_iflexo'] = precio_equilibrio_iflexo(bloque, objetivo)
+    return pd.concat([bloque, resultados], axis=1)
+
+
+def procesar_bloques(bloques, workers: int = 1, objetivo: float = 0.0, flota: bool = False):
+    """Procesa los bloques en orden; con varios workers mantiene pocos bloques en vuelo.
+
+    Con `flota` cada fila es una prensa y se calcula con `procesar_bloque_flota`.
+    """
+    funcion, argumentos = (procesar_bloque_flota, ()) if flota else (procesar_bloque, (objetivo,))
+    if workers <= 1:
+        for bloque in bloques:
+            yield funcion(bloque, *argumentos)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pendientes = deque()
+        for bloque in bloques:
+            pendientes.append(pool.submit(funcion, bloque, *argumentos))
+            if len(pendientes) >= 2 * workers:
+                yield pendientes.popleft().result()
+        while pendientes:
+            yield pendientes.popleft().result()
+
+
+def guardar_escenarios(bloques, almacen: AlmacenEscenarios, columna_id: str = 'cliente'):
+    """Guarda cada bloque de resultados en el almacén de escenarios y lo deja pasar sin cambios."""
+    fila = 0
+    for bloque in bloques:
+        clientes = bloque[columna_id] if columna_id in bloque else range(fila, fila + len(bloque))
+        almacen.guardar_resultados(bloque, clientes)
+        fila += len(bloque)
+        yield bloque
+
+
+def agregar_bloques(bloques, por, parciales: list):
+    """Agrega cada bloque de prensas por las columnas `por` en `parciales` y lo deja pasar sin cambios."""
+    for bloque in bloques:
+        faltantes = [c for c in por if c not in bloque]
+        if faltantes:
+            raise ValueError(f"Faltan las columnas de agrupación: {', '.join(faltantes)}")
+        parciales.append(agregar_flota(bloque[list(por) + list(RESULTADOS)], por))
+        yield bloque
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calcula los ahorros iFlexo de un archivo de clientes.")
+    parser.add_argument('entrada', help="Archivo CSV (también .csv.gz o .csv.zst), Excel o Parquet con una fila por cliente")
+    parser.add_argument('salida', help="Archivo de resultados (.csv, .csv.gz, .csv.zst, .xlsx o .parquet)")
+    parser.add_argument('--chunksize', type=int, default=50_000, help="Filas por bloque")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Procesos de cálculo (0 usa todos los núcleos)")
+    parser.add_argument('--objetivo', type=float, default=0.0,
+                        help="Ahorro total anual objetivo para el precio de equilibrio iFlexo")
+    parser.add_argument('--escenarios', metavar='RUTA',
+                        help="Base SQLite donde guardar también cada cliente como escenario")
+    parser.add_argument('--columna-id', default='cliente',
+                        help="Columna que identifica al cliente en el almacén de escenarios")
+    parser.add_argument('--flota', action='store_true',
+                        help="Cada fila es una prensa: calcula velocidad en impresión y plancha-parada por prensa")
+    parser.add_argument('--agrupar', nargs='+', choices=AGRUPACIONES, default=['planta'],
+                        help="Columnas por las que se suma la flota")
+    parser.add_argument('--resumen', metavar='RUTA',
+                        help="CSV donde guardar la flota agregada (por defecto se muestra en pantalla)")
+    args = parser.parse_args(argv)
+    if args.flota and args.escenarios:
+        parser.error("--escenarios no se puede usar con --flota")
+
+    extension = next((e for e in FORMATOS_SALIDA if args.salida.lower().endswith(e)), None)
+    if extension is None:
+        parser.error("Formato de salida no soportado")
+    formato, compresion = FORMATOS_SALIDA[extension]
+    workers = args.workers or os.cpu_count() or 1
+
+    # Con el esquema explícito un valor decimal que aparece recién en un bloque posterior no rompe la lectura
+    esquema = ESQUEMA_PRENSA if args.flota else ESQUEMA_ENTRADAS
+    entrada = iter_file(args.entrada, chunksize=args.chunksize, esquema=esquema)
+    bloques = procesar_bloques(entrada, workers, args.objetivo, args.flota)
+    if args.flota:
+        parciales = []
+        export_chunks(agregar_bloques(bloques, args.agrupar, parciales), args.salida, formato, compresion)
+        resumen = combinar_agregados(parciales)
+        if args.resumen:
+            resumen.to_csv(args.resumen)
+        else:
+            print(resumen.to_string())
+        return
+    if args.escenarios:
+        almacen = AlmacenEscenarios(args.escenarios)
+        try:
+            export_chunks(guardar_escenarios(bloques, almacen, args.columna_id), args.salida, formato, compresion)
+        finally:
+            almacen.cerrar()
+        return
+    export_chunks(bloques, args.salida, formato, compresion)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,348 @@
+"""Benchmarks de los caminos críticos: cálculos, gráficos, PDF y archivos.
+
+Cada caso se repite hasta juntar al menos TIEMPO_MINIMO segundos y registra
+latencia (p50/p90/p99), rendimiento y pico de memoria. El resultado se
+guarda como JSON y sirve de base para comparar corridas posteriores.
+
+Uso:
+    python benchmarks.py --salida base.json
+    python benchmarks.py --tamanos 1000 100000 --comparar base.json --umbral 20
+    python benchmarks.py --comparar base.json --actual nueva.json
+"""
+import argparse
+import io
+import json
+import platform
+import re
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from calculos import AHORROS, CALCULOS, CATEGORIAS, ENTEROS, ENTRADAS, MAXIMOS, calcular_ahorros
+from metricas import liberar_memoria, memoria_proceso
+
+TAMANOS = (1_000, 100_000, 1_000_000)
+
+# Porcentaje de aumento de p50 o del pico de memoria que se marca como regresión
+UMBRAL_PCT = 20.0
+
+# Cada caso se mide al menos MIN_REPETICIONES veces y hasta juntar TIEMPO_MINIMO segundos
+MIN_REPETICIONES = 3
+MAX_REPETICIONES = 50
+TIEMPO_MINIMO = 1.0
+
+# Excel con openpyxl tarda minutos en el tamaño más grande; más filas que esto no se miden
+MAX_FILAS_EXCEL = 100_000
+
+# Diferencias por debajo de las cuales no se marca regresión: evitan el ruido de los casos muy rápidos
+TOLERANCIA_TIEMPO_MS = 0.05
+TOLERANCIA_MEMORIA_MB = 1.0
+
+FORMATOS = (
+    ("CSV", None, 'datos.csv'),
+    ("CSV", 'gzip', 'datos.csv.gz'),
+    ("Excel", None, 'datos.xlsx'),
+    ("Parquet", 'snappy', 'datos.parquet'),
+)
+
+Caso = Tuple[str, int, Callable[[], object]]
+
+
+def datos_sinteticos(n: int, semilla: int = 0):
+    """Entradas de `n` clientes con valores plausibles y un 2 % de ceros, como pestañas sin completar."""
+    import pandas as pd
+
+    rng = np.random.default_rng(semilla)
+    columnas = {}
+    for clave in ENTRADAS:
+        valores = rng.uniform(1.0, MAXIMOS.get(clave, 1000.0) / 2, n)
+        if clave in ENTEROS:
+            valores = np.round(valores)
+        valores[rng.random(n) < 0.02] = 0.0
+        columnas[clave] = valores
+    return pd.DataFrame(columnas)
+
+
+def _casos_calculo(datos, n: int) -> Iterator[Caso]:
+    for categoria, claves in CATEGORIAS.items():
+        argumentos = [datos[k].to_numpy() for k in claves]
+        yield f"calculo.{categoria}[{n}]", n, lambda f=CALCULOS[categoria], a=argumentos: f(*a)
+    yield f"calculo.calcular_ahorros[{n}]", n, lambda: calcular_ahorros(datos)
+
+
+def _casos_archivos(datos, n: int, incluir: Callable[[str], bool]) -> Iterator[Caso]:
+    from utils import export_dataframe, load_file
+
+    for formato, compresion, nombre in FORMATOS:
+        if formato == "Excel" and n > MAX_FILAS_EXCEL:
+            continue
+        etiqueta = nombre.split('.', 1)[1]
+        exportado = {}
+
+        def exportar(formato=formato, compresion=compresion, exportado=exportado):
+            exportado['contenido'] = export_dataframe(datos, formato, compresion)
+
+        # La lectura usa el archivo de la última exportación medida, o lo exporta si el filtro la omitió
+        yield f"archivo.export_dataframe.{etiqueta}[{n}]", n, exportar
+        lectura = f"archivo.load_file.{etiqueta}[{n}]"
+        if not incluir(lectura):
+            continue
+        if 'contenido' not in exportado:
+            exportar()
+
+        def cargar(exportado=exportado, nombre=nombre):
+            archivo = io.BytesIO(exportado['contenido'])
+            archivo.name = nombre
+            return load_file(archivo)
+
+        yield lectura, n, cargar
+
+
+def _casos_graficos(datos) -> Iterator[Caso]:
+    import pandas as pd
+
+    import visualizations as v
+    from proveedores import ENTRADAS_PROVEEDOR, ahorros_proveedores
+    from proyeccion import proyectar_inversion, rubros_ahorro
+    from sensibilidad import barrido_sensibilidad
+
+    entradas = {k: float(datos[k].iloc[0]) or 1.0 for k in ENTRADAS}
+    ahorros = {k: float(v) for k, v in calcular_ahorros(entradas).iloc[0][list(AHORROS)].items()}
+    total = sum(ahorros.values())
+    sensibilidad = barrido_sensibilidad(entradas)
+    flujos = [float(f) for f in proyectar_inversion(rubros_ahorro(entradas), inversion=total)['flujos'][0]]
+    proveedores = pd.DataFrame(
+        {k: entradas[k] * np.linspace(0.8, 1.2, 5) for k in ENTRADAS_PROVEEDOR},
+        index=[f"Proveedor {i + 1}" for i in range(5)]
+    )
+    por_proveedor = ahorros_proveedores(entradas, proveedores)
+
+    # Se mide la construcción de la figura sin el caché de gráficos (__wrapped__)
+    builders = {
+        'create_costos_comparison': (ahorros,),
+        'create_tiempo_paradas_comparison': (120.5, 60.2),
+        'create_velocidad_comparison': (entradas['velocidad_actual'], entradas['velocidad_iflexo']),
+        'create_tinta_comparison': (entradas['consumo_tinta'], 150.0, "blanca"),
+        'create_tornado_chart': (sensibilidad, total),
+        'create_proyeccion_chart': (flujos, total),
+        'create_proveedores_comparison': (por_proveedor,),
+        'create_proveedores_totales': (por_proveedor,),
+    }
+    for nombre, argumentos in builders.items():
+        yield f"grafico.{nombre}", 1, lambda f=getattr(v, nombre).__wrapped__, a=argumentos: f(*a)
+    yield "grafico.create_costos_comparison.cache", 1, lambda: v.create_costos_comparison(ahorros)
+
+
+def _casos_generate_plot(datos, n: int) -> Iterator[Caso]:
+    from utils import generate_plot
+    from cache_graficos import limpiar_cache
+
+    for tipo in ("Líneas", "Dispersión", "Barras"):
+        def graficar(tipo=tipo):
+            # Sin caché: reducir_datos se recalcula en cada repetición
+            limpiar_cache()
+            return generate_plot(datos, tipo, 'consumo_planchas', 'consumo_tinta')
+
+        yield f"grafico.generate_plot.{tipo}[{n}]", n, graficar
+
+
+def _casos_pdf(datos) -> Iterator[Caso]:
+    from pdf_report import generate_pdf_report, preparar_recursos
+    from proyeccion import proyectar_inversion, rubros_ahorro
+
+    preparar_recursos()
+    entradas = {k: float(datos[k].iloc[0]) or 1.0 for k in ENTRADAS}
+    ahorros = {k: float(v) for k, v in calcular_ahorros(entradas).iloc[0][list(AHORROS)].items()}
+    resultado = proyectar_inversion(rubros_ahorro(entradas), inversion=sum(ahorros.values()))
+    proyeccion = {
+        'flujos': [float(f) for f in resultado['flujos'][0]],
+        'inversion': sum(ahorros.values()),
+        'tasa_descuento': 0.10,
+        'van': float(resultado['van'][0]),
+        'tir': float(resultado['tir'][0]),
+        'mes_recuperacion': float(resultado['mes_recuperacion'][0]),
+    }
+    yield "pdf.generate_pdf_report", 1, lambda: generate_pdf_report(ahorros, {}).getvalue()
+    yield "pdf.generate_pdf_report.completo", 1, lambda: generate_pdf_report(ahorros, entradas, proyeccion).getvalue()
+
+
+def casos(tamanos: Sequence[int] = TAMANOS, incluir: Callable[[str], bool] = lambda nombre: True) -> Iterator[Caso]:
+    """Casos del benchmark que cumplen `incluir`; los datos de cada tamaño se generan al llegar a ellos."""
+    pequenos = datos_sinteticos(max(min(tamanos), 1))
+    for caso in _casos_graficos(pequenos):
+        if incluir(caso[0]):
+            yield caso
+    for caso in _casos_pdf(pequenos):
+        if incluir(caso[0]):
+            yield caso
+    for n in tamanos:
+        datos = datos_sinteticos(n)
+        for grupo in (_casos_calculo(datos, n), _casos_generate_plot(datos, n), _casos_archivos(datos, n, incluir)):
+            for caso in grupo:
+                if incluir(caso[0]):
+                    yield caso
+        del datos
+
+
+def pico_memoria(funcion: Callable[[], object]) -> int:
+    """Bytes de memoria que `funcion` agrega como máximo sobre la que el proceso ya usaba.
+
+    En Linux se reinicia el máximo de memoria residente del kernel (VmHWM),
+    que incluye lo que asigna pyarrow fuera de Python. En otros sistemas se
+    usa tracemalloc, que solo ve las asignaciones de Python y NumPy; en Python
+    3.11 detenerlo mientras pyarrow libera memoria en sus hilos puede
+    terminar el proceso, por eso no es la opción por defecto.
+    """
+    liberar_memoria()
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        base = memoria_proceso('VmRSS')
+    except OSError:
+        tracemalloc.start()
+        try:
+            funcion()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    funcion()
+    return max(memoria_proceso('VmHWM') - base, 0)
+
+
+def medir(funcion: Callable[[], object], unidades: int, min_repeticiones: int = MIN_REPETICIONES,
+          tiempo_minimo: float = TIEMPO_MINIMO, max_repeticiones: int = MAX_REPETICIONES) -> Dict[str, float]:
+    """Latencia, rendimiento (unidades por segundo a p50) y pico de memoria de un caso.
+
+    La primera ejecución es de calentamiento salvo que ya supere
+    `tiempo_minimo`. El pico de memoria se mide en una ejecución aparte (ver
+    pico_memoria).
+    """
+    inicio = time.perf_counter()
+    funcion()
+    primera = time.perf_counter() - inicio
+    tiempos = [primera] if primera >= tiempo_minimo else []
+
+    inicio = time.perf_counter()
+    while len(tiempos) < min_repeticiones or (
+            time.perf_counter() - inicio < tiempo_minimo and len(tiempos) < max_repeticiones):
+        t = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - t)
+
+    pico = pico_memoria(funcion)
+
+    p50, p90, p99 = np.percentile(tiempos, [50, 90, 99])
+    return {
+        'unidades': unidades,
+        'repeticiones': len(tiempos),
+        'media_ms': float(np.mean(tiempos)) * 1000,
+        'p50_ms': float(p50) * 1000,
+        'p90_ms': float(p90) * 1000,
+        'p99_ms': float(p99) * 1000,
+        'por_segundo': unidades / p50 if p50 > 0 else float('inf'),
+        'pico_mb': pico / 1e6,
+    }
+
+
+def _entorno() -> Dict[str, str]:
+    import pandas as pd
+
+    return {
+        'fecha': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'plataforma': platform.platform(),
+        'procesador': platform.processor() or platform.machine(),
+    }
+
+
+def ejecutar(tamanos: Sequence[int] = TAMANOS, filtro: Optional[str] = None,
+             tiempo_minimo: float = TIEMPO_MINIMO, mostrar: bool = True) -> Dict:
+    """Corre los casos (opcionalmente los que coinciden con la expresión `filtro`) y devuelve el resultado."""
+    patron = re.compile(filtro or '')
+    resultados = {}
+    for nombre, unidades, funcion in casos(tamanos, lambda nombre: bool(patron.search(nombre))):
+        resultados[nombre] = medir(funcion, unidades, tiempo_minimo=tiempo_minimo)
+        if mostrar:
+            r = resultados[nombre]
+            print(f"{nombre:55s} p50 {r['p50_ms']:10.2f} ms  p99 {r['p99_ms']:10.2f} ms  "
+                  f"{r['por_segundo']:14,.0f} /s  {r['pico_mb']:8.1f} MB", flush=True)
+    return {'entorno': _entorno(), 'tamanos': list(tamanos), 'resultados': resultados}
+
+
+def comparar(base: Dict, actual: Dict, umbral: float = UMBRAL_PCT) -> List[Dict]:
+    """Compara p50 y pico de memoria de cada caso presente en ambas corridas.
+
+    Un caso es regresión si alguno aumenta más de `umbral` % y además más
+    que la tolerancia absoluta (TOLERANCIA_TIEMPO_MS, TOLERANCIA_MEMORIA_MB).
+    """
+    filas = []
+    for nombre, r in actual['resultados'].items():
+        b = base['resultados'].get(nombre)
+        if b is None:
+            continue
+        tiempo = (r['p50_ms'] / b['p50_ms'] - 1) * 100 if b['p50_ms'] > 0 else 0.0
+        memoria = (r['pico_mb'] / b['pico_mb'] - 1) * 100 if b['pico_mb'] > 0 else 0.0
+        regresion = (tiempo > umbral and r['p50_ms'] - b['p50_ms'] > TOLERANCIA_TIEMPO_MS) or (
+            memoria > umbral and r['pico_mb'] - b['pico_mb'] > TOLERANCIA_MEMORIA_MB)
+        filas.append({
+            'caso': nombre,
+            'p50_base_ms': b['p50_ms'],
+            'p50_ms': r['p50_ms'],
+            'tiempo_pct': tiempo,
+            'pico_base_mb': b['pico_mb'],
+            'pico_mb': r['pico_mb'],
+            'memoria_pct': memoria,
+            'regresion': regresion,
+            'mejora': not regresion and tiempo < -umbral,
+        })
+    return filas
+
+
+def _mostrar_comparacion(filas: List[Dict], umbral: float) -> None:
+    print(f"{'caso':55s} {'p50 base':>10} {'p50':>10} {'Δ%':>7} {'MB base':>9} {'MB':>9} {'Δ%':>7}")
+    for f in filas:
+        estado = "REGRESIÓN" if f['regresion'] else ("mejora" if f['mejora'] else "")
+        print(f"{f['caso']:55s} {f['p50_base_ms']:10.2f} {f['p50_ms']:10.2f} {f['tiempo_pct']:+7.1f} "
+              f"{f['pico_base_mb']:9.1f} {f['pico_mb']:9.1f} {f['memoria_pct']:+7.1f}  {estado}")
+    regresiones = sum(f['regresion'] for f in filas)
+    print(f"{regresiones} regresiones de {len(filas)} casos comparados (umbral {umbral:g} %)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de cálculos, gráficos, PDF y archivos.")
+    parser.add_argument('--tamanos', type=int, nargs='+', default=list(TAMANOS), help="Filas de datos sintéticos")
+    parser.add_argument('--filtro', help="Expresión regular sobre el nombre de los casos")
+    parser.add_argument('--tiempo-minimo', type=float, default=TIEMPO_MINIMO,
+                        help="Segundos de medición por caso")
+    parser.add_argument('--salida', help="Archivo JSON donde guardar el resultado (por ejemplo, la base)")
+    parser.add_argument('--comparar', metavar='BASE', help="Resultado JSON base contra el que comparar")
+    parser.add_argument('--actual', help="Resultado JSON ya medido; sin indicarlo se corren los casos")
+    parser.add_argument('--umbral', type=float, default=UMBRAL_PCT,
+                        help="Aumento porcentual que se marca como regresión")
+    args = parser.parse_args(argv)
+
+    if args.actual:
+        with open(args.actual, encoding='utf-8') as f:
+            actual = json.load(f)
+    else:
+        actual = ejecutar(args.tamanos, args.filtro, args.tiempo_minimo)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(actual, f, indent=2, ensure_ascii=False)
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            base = json.load(f)
+        filas = comparar(base, actual, args.umbral)
+        _mostrar_comparacion(filas, args.umbral)
+        sys.exit(1 if any(f['regresion'] for f in filas) else 0)
+
+
+if __name__ == '__main__':
+    main()
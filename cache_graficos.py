@@ -0,0 +1,117 @@
+import copy
+import hashlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Dict
+
+import numpy as np
+
+from metricas import colector, tramo
+
+# Política del caché de gráficos: cantidad máxima de figuras, vigencia y decimales de la clave
+CACHE_MAX_ENTRADAS = 256
+CACHE_TTL_SEGUNDOS = 3600
+CACHE_DECIMALES = 6
+
+_cache_graficos = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_contadores = {'aciertos': 0, 'fallos': 0, 'expirados': 0, 'desalojos': 0}
+
+def redondear(valor) -> float:
+    """Redondea un número a CACHE_DECIMALES para usarlo en una clave de caché, sin -0.0."""
+    return round(float(valor), CACHE_DECIMALES) + 0.0
+
+def _normalizar(valor):
+    """Convierte los argumentos de un gráfico en una clave estable y redondeada."""
+    if isinstance(valor, (bool, str, type(None))):
+        return valor
+    if isinstance(valor, (int, np.integer)):
+        return int(valor)
+    if isinstance(valor, (float, np.floating)):
+        return redondear(valor)
+    if isinstance(valor, dict):
+        return tuple(sorted((k, _normalizar(v)) for k, v in valor.items()))
+    if isinstance(valor, (list, tuple, np.ndarray)):
+        return tuple(_normalizar(v) for v in valor)
+    # Un DataFrame solo puede llegar si pandas ya está cargado; no se importa para preguntarlo
+    pd = sys.modules.get('pandas')
+    if pd is not None and isinstance(valor, pd.DataFrame):
+        flotantes = valor.select_dtypes('floating').columns
+        if len(flotantes):
+            valor = valor.copy(deep=False)
+            valor[flotantes] = valor[flotantes].round(CACHE_DECIMALES)
+        contenido = pd.util.hash_pandas_object(valor, index=True).values
+        return ('DataFrame', tuple(valor.columns), hashlib.blake2b(contenido.tobytes()).hexdigest())
+    raise TypeError(f"Argumento no soportado en el caché de gráficos: {type(valor).__name__}")
+
+def cache_grafico(funcion):
+    """Cachea las figuras por contenido de sus argumentos, con LRU, máximo de entradas y TTL.
+
+    De una figura de Plotly se guarda su dict y cada acierto arma una figura
+    nueva a partir de una copia, así que quien modifique la figura devuelta no
+    altera la del caché ni la de otras sesiones. El dict ya fue validado al
+    crear la figura y no se vuelve a validar: armarla así cuesta una fracción
+    de copiarla con `go.Figure(figura)`. Otros resultados se devuelven tal
+    cual y no deben modificarse.
+    """
+    @wraps(funcion)
+    def envoltura(*args, **kwargs):
+        clave = (funcion.__name__, _normalizar(args), _normalizar(kwargs))
+        ahora = time.monotonic()
+        with _cache_lock:
+            entrada = _cache_graficos.get(clave)
+            if entrada is not None:
+                creada, tipo, resultado = entrada
+                if ahora - creada < CACHE_TTL_SEGUNDOS:
+                    _cache_graficos.move_to_end(clave)
+                    _cache_contadores['aciertos'] += 1
+                else:
+                    del _cache_graficos[clave]
+                    _cache_contadores['expirados'] += 1
+                    entrada = None
+            if entrada is None:
+                _cache_contadores['fallos'] += 1
+        if entrada is not None:
+            # El dict guardado no se modifica nunca: la copia se arma fuera del lock
+            return resultado if tipo is None else tipo(copy.deepcopy(resultado), _validate=False)
+
+        with tramo('grafico', grafico=funcion.__name__):
+            figura = funcion(*args, **kwargs)
+
+        if hasattr(figura, 'to_plotly_json'):
+            guardada = (ahora, type(figura), figura.to_dict())
+        else:
+            guardada = (ahora, None, figura)
+        with _cache_lock:
+            _cache_graficos[clave] = guardada
+            _cache_graficos.move_to_end(clave)
+            while len(_cache_graficos) > CACHE_MAX_ENTRADAS:
+                _cache_graficos.popitem(last=False)
+                _cache_contadores['desalojos'] += 1
+        return figura
+    return envoltura
+
+def estadisticas_cache() -> Dict[str, int]:
+    """Contadores del caché de gráficos y cantidad de figuras guardadas."""
+    with _cache_lock:
+        return {**_cache_contadores, 'entradas': len(_cache_graficos)}
+
+@colector
+def _metricas_cache():
+    estadisticas = estadisticas_cache()
+    entradas = estadisticas.pop('entradas')
+    return [
+        ('iflexo_cache_graficos_total', 'counter', "Consultas al caché de gráficos por resultado.",
+         [({'resultado': k}, v) for k, v in estadisticas.items()]),
+        ('iflexo_cache_graficos_entradas', 'gauge', "Figuras guardadas en el caché de gráficos.", [({}, entradas)]),
+    ]
+
+def limpiar_cache():
+    """Vacía el caché de gráficos y reinicia los contadores."""
+    with _cache_lock:
+        _cache_graficos.clear()
+        for clave in _cache_contadores:
+            _cache_contadores[clave] = 0
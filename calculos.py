@@ -0,0 +1,319 @@
+import numpy as np
+from typing import TYPE_CHECKING, Dict, Mapping, Union
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# pandas se importa solo donde se arma un DataFrame: el motor de cálculo trabaja con NumPy
+ArrayLike = Union[float, int, np.ndarray, "pd.Series"]
+
+# Entradas de cada categoría, con los mismos nombres que los `key=` de main.py
+CATEGORIAS: Dict[str, tuple] = {
+    'planchas': (
+        'consumo_planchas',
+        'costo_actual_plancha',
+        'costo_iflexo_plancha',
+    ),
+    'velocidad_ajuste': (
+        'num_trabajos_ajuste',
+        'valor_hora_ajuste',
+        'tiempo_ajuste_actual',
+        'diferencia_tiempo_ajuste',
+        'metros_material_actual',
+        'costo_material',
+        'diferencia_material',
+    ),
+    'velocidad_impresion': (
+        'tiempo_prensa_impresion',
+        'valor_hora_impresion',
+        'velocidad_actual',
+        'velocidad_iflexo',
+    ),
+    'plancha_parada': (
+        'num_trabajos_parada',
+        'valor_hora_parada',
+        'tiempo_parada',
+        'paradas_actual',
+        'paradas_iflexo',
+    ),
+    'tinta_blanca': (
+        'consumo_tinta_blanca',
+        'costo_tinta_blanca',
+        'reduccion_consumo_blanca',
+    ),
+    'tintas': (
+        'consumo_tinta',
+        'costo_tinta',
+        'reduccion_consumo',
+    ),
+}
+
+ENTRADAS = tuple(k for claves in CATEGORIAS.values() for k in claves)
+
+# Etiquetas cortas de cada entrada, con la pestaña cuando el texto se repite
+ETIQUETAS = {
+    'consumo_planchas': "Consumo de planchas",
+    'costo_actual_plancha': "Costo actual de plancha",
+    'costo_iflexo_plancha': "Costo de plancha iFlexo",
+    'num_trabajos_ajuste': "Número de trabajos (ajuste)",
+    'valor_hora_ajuste': "Valor de hora en prensa (ajuste)",
+    'tiempo_ajuste_actual': "Tiempo actual de ajuste",
+    'diferencia_tiempo_ajuste': "Diferencia de tiempo de ajuste",
+    'metros_material_actual': "Metros de material en ajuste",
+    'costo_material': "Costo de material",
+    'diferencia_material': "Diferencia de material con iFlexo",
+    'tiempo_prensa_impresion': "Tiempo en prensa disponible",
+    'valor_hora_impresion': "Valor de hora en prensa (impresión)",
+    'velocidad_actual': "Velocidad actual",
+    'velocidad_iflexo': "Velocidad con iFlexo",
+    'num_trabajos_parada': "Número de trabajos (paradas)",
+    'valor_hora_parada': "Valor de hora en prensa (paradas)",
+    'tiempo_parada': "Tiempo por parada",
+    'paradas_actual': "Paradas por trabajo actual",
+    'paradas_iflexo': "Paradas por trabajo con iFlexo",
+    'consumo_tinta_blanca': "Consumo de tinta blanca",
+    'costo_tinta_blanca': "Costo de tinta blanca",
+    'reduccion_consumo_blanca': "Reducción de tinta blanca",
+    'consumo_tinta': "Consumo de tinta no blanca",
+    'costo_tinta': "Costo de tinta",
+    'reduccion_consumo': "Reducción de tintas",
+}
+
+# Entradas con `max_value` en main.py; el resto solo tiene `min_value=0`
+MAXIMOS = {
+    'diferencia_material': 100.0,
+    'reduccion_consumo_blanca': 100.0,
+    'reduccion_consumo': 100.0,
+}
+
+# Entradas enteras en main.py (number_input con format="%d"); el resto son float
+ENTEROS = (
+    'consumo_planchas',
+    'num_trabajos_ajuste',
+    'tiempo_ajuste_actual',
+    'diferencia_tiempo_ajuste',
+    'num_trabajos_parada',
+    'tiempo_parada',
+)
+
+# Mismo orden que st.session_state.ahorros, para que el total sume igual
+AHORROS = (
+    'planchas',
+    'velocidad_ajuste',
+    'velocidad_impresion',
+    'tinta_blanca',
+    'tintas',
+    'plancha_parada',
+)
+
+# Nombres de las categorías de ahorro en los gráficos de la app y del PDF
+ETIQUETAS_CATEGORIAS = {
+    'planchas': 'Planchas',
+    'velocidad_ajuste': 'Velocidad de Ajuste',
+    'velocidad_impresion': 'Velocidad en Impresión',
+    'tinta_blanca': 'Tinta Blanca',
+    'tintas': 'Tintas',
+    'plancha_parada': 'Plancha-Parada'
+}
+
+
+def _arrays(*valores: ArrayLike):
+    return np.broadcast_arrays(*[np.asarray(v, dtype=np.float64) for v in valores])
+
+
+def _activo(*valores: np.ndarray) -> np.ndarray:
+    """Equivalente vectorizado de `all([...])`: la fila se calcula si ninguna entrada es cero."""
+    mascara = valores[0] != 0
+    for v in valores[1:]:
+        mascara = mascara & (v != 0)
+    return mascara
+
+
+def _aplicar(mascara: np.ndarray, resultados: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Deja en cero el ahorro y en NaN los intermedios de las filas que no se calculan."""
+    salida = {}
+    for clave, valor in resultados.items():
+        relleno = 0.0 if clave == 'ahorro' else np.nan
+        salida[clave] = np.where(mascara, valor, relleno)
+    return salida
+
+
+def calcular_planchas(consumo_planchas: ArrayLike, costo_actual_plancha: ArrayLike,
+                      costo_iflexo_plancha: ArrayLike) -> Dict[str, np.ndarray]:
+    """Ahorro en costo de planchas."""
+    consumo, actual, iflexo = _arrays(consumo_planchas, costo_actual_plancha, costo_iflexo_plancha)
+    mascara = _activo(consumo, actual, iflexo)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        diferencia = ((actual - iflexo) / actual) * 100
+        gasto_actual = consumo * actual
+        gasto_iflexo = consumo * iflexo
+    return _aplicar(mascara, {
+        'diferencia_pct': diferencia,
+        'gasto_actual': gasto_actual,
+        'gasto_iflexo': gasto_iflexo,
+        'ahorro': gasto_actual - gasto_iflexo,
+    })
+
+
+def calcular_velocidad_ajuste(num_trabajos_ajuste: ArrayLike, valor_hora_ajuste: ArrayLike,
+                              tiempo_ajuste_actual: ArrayLike, diferencia_tiempo_ajuste: ArrayLike,
+                              metros_material_actual: ArrayLike, costo_material: ArrayLike,
+                              diferencia_material: ArrayLike) -> Dict[str, np.ndarray]:
+    """Ahorro por menor tiempo de ajuste y menor desperdicio de material."""
+    num, valor_hora, tiempo_actual, dif_tiempo, metros_actual, costo, dif_material = _arrays(
+        num_trabajos_ajuste, valor_hora_ajuste, tiempo_ajuste_actual, diferencia_tiempo_ajuste,
+        metros_material_actual, costo_material, diferencia_material)
+    mascara = _activo(num, valor_hora, tiempo_actual, dif_tiempo, metros_actual, costo, dif_material)
+
+    tiempo_ahorrado = dif_tiempo * num
+    ahorro_tiempo = (tiempo_ahorrado / 60) * valor_hora
+
+    metros_iflexo = metros_actual * (1 - dif_material/100)
+    metros_ahorrados = (metros_actual - metros_iflexo) * num
+    ahorro_material = metros_ahorrados * costo
+
+    return _aplicar(mascara, {
+        'tiempo_ajuste_iflexo': tiempo_actual - dif_tiempo,
+        'horas_ahorradas': tiempo_ahorrado / 60,
+        'ahorro_tiempo': ahorro_tiempo,
+        'metros_material_iflexo': metros_iflexo,
+        'metros_ahorrados': metros_ahorrados,
+        'ahorro_material': ahorro_material,
+        'ahorro': ahorro_tiempo + ahorro_material,
+    })
+
+
+def calcular_velocidad_impresion(tiempo_prensa_impresion: ArrayLike, valor_hora_impresion: ArrayLike,
+                                 velocidad_actual: ArrayLike,
+                                 velocidad_iflexo: ArrayLike) -> Dict[str, np.ndarray]:
+    """Ahorro por mayor velocidad de impresión."""
+    tiempo, valor_hora, actual, iflexo = _arrays(
+        tiempo_prensa_impresion, valor_hora_impresion, velocidad_actual, velocidad_iflexo)
+    mascara = _activo(tiempo, valor_hora, actual, iflexo)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mejora = ((iflexo - actual) / actual) * 100
+        horas_ahorradas = tiempo * (mejora / 100)
+        ahorro = tiempo * valor_hora * (mejora / 100)
+    return _aplicar(mascara, {
+        'mejora_pct': mejora,
+        'capacidad_adicional': (iflexo - actual) * tiempo * 60,
+        'horas_ahorradas': horas_ahorradas,
+        'ahorro': ahorro,
+    })
+
+
+def calcular_plancha_parada(num_trabajos_parada: ArrayLike, valor_hora_parada: ArrayLike,
+                            tiempo_parada: ArrayLike, paradas_actual: ArrayLike,
+                            paradas_iflexo: ArrayLike) -> Dict[str, np.ndarray]:
+    """Ahorro por menos paradas de prensa."""
+    num, valor_hora, tiempo, actual, iflexo = _arrays(
+        num_trabajos_parada, valor_hora_parada, tiempo_parada, paradas_actual, paradas_iflexo)
+    mascara = _activo(num, valor_hora, tiempo, actual, iflexo)
+
+    tiempo_actual = tiempo * actual * num
+    tiempo_iflexo = tiempo * iflexo * num
+    diferencia = tiempo_actual - tiempo_iflexo
+    with np.errstate(divide='ignore', invalid='ignore'):
+        diferencia_pct = ((actual - iflexo) / actual) * 100
+
+    return _aplicar(mascara, {
+        'horas_actual': tiempo_actual / 60,
+        'horas_iflexo': tiempo_iflexo / 60,
+        'horas_ahorradas': diferencia / 60,
+        'diferencia_pct': diferencia_pct,
+        'ahorro': (diferencia / 60) * valor_hora,
+    })
+
+
+def _calcular_tinta(consumo: np.ndarray, costo: np.ndarray, reduccion: np.ndarray) -> Dict[str, np.ndarray]:
+    mascara = _activo(consumo, costo, reduccion)
+    gasto_actual = consumo * costo
+    return _aplicar(mascara, {
+        'gasto_actual': gasto_actual,
+        'kg_ahorrados': consumo * (reduccion / 100),
+        'ahorro': gasto_actual * (reduccion / 100),
+    })
+
+
+def calcular_tinta_blanca(consumo_tinta_blanca: ArrayLike, costo_tinta_blanca: ArrayLike,
+                          reduccion_consumo_blanca: ArrayLike) -> Dict[str, np.ndarray]:
+    """Ahorro en tinta blanca."""
+    return _calcular_tinta(*_arrays(consumo_tinta_blanca, costo_tinta_blanca, reduccion_consumo_blanca))
+
+
+def calcular_tintas(consumo_tinta: ArrayLike, costo_tinta: ArrayLike,
+                    reduccion_consumo: ArrayLike) -> Dict[str, np.ndarray]:
+    """Ahorro en tintas no blancas."""
+    return _calcular_tinta(*_arrays(consumo_tinta, costo_tinta, reduccion_consumo))
+
+
+CALCULOS = {
+    'planchas': calcular_planchas,
+    'velocidad_ajuste': calcular_velocidad_ajuste,
+    'velocidad_impresion': calcular_velocidad_impresion,
+    'plancha_parada': calcular_plancha_parada,
+    'tinta_blanca': calcular_tinta_blanca,
+    'tintas': calcular_tintas,
+}
+
+
+def _entrada(entradas: Mapping[str, ArrayLike], clave: str) -> ArrayLike:
+    return entradas[clave] if clave in entradas else 0.0
+
+
+def calcular_categorias(entradas: Mapping[str, ArrayLike]) -> Dict[str, Dict[str, np.ndarray]]:
+    """Calcula las seis categorías; las entradas ausentes se toman como cero."""
+    resultados = {}
+    for categoria, claves in CATEGORIAS.items():
+        valores = {k: _entrada(entradas, k) for k in claves}
+        resultados[categoria] = CALCULOS[categoria](**valores)
+    return resultados
+
+
+def precio_equilibrio_iflexo(entradas: Mapping[str, ArrayLike], objetivo: ArrayLike = 0.0) -> np.ndarray:
+    """Precio máximo de plancha iFlexo (/cm²) con el que el ahorro total anual llega a `objetivo`.
+
+    El ahorro en planchas es `consumo * (costo_actual - precio)` y el resto de
+    las categorías no depende del precio, así que el equilibrio tiene forma
+    cerrada. Es NaN cuando el consumo o el costo actual son cero, porque
+    entonces la categoría de planchas no se calcula. Un valor negativo indica
+    que ningún precio alcanza el objetivo.
+    """
+    resultados = calcular_categorias(entradas)
+    otros = 0.0
+    for categoria in AHORROS:
+        if categoria != 'planchas':
+            otros = otros + resultados[categoria]['ahorro']
+
+    consumo, actual, objetivo, otros = _arrays(
+        _entrada(entradas, 'consumo_planchas'), _entrada(entradas, 'costo_actual_plancha'), objetivo, otros)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precio = actual - (objetivo - otros) / consumo
+    return np.where(_activo(consumo, actual), precio, np.nan)
+
+
+def calcular_ahorros(entradas: Union["pd.DataFrame", Mapping[str, ArrayLike]]) -> "pd.DataFrame":
+    """Calcula en una sola pasada vectorizada los ahorros de cada fila de entradas.
+
+    Devuelve una columna por categoría de ahorro, el total anual y las métricas
+    intermedias de cada pestaña con el prefijo de su categoría.
+    """
+    import pandas as pd
+
+    resultados = calcular_categorias(entradas)
+    columnas = {}
+    for categoria in AHORROS:
+        columnas[categoria] = resultados[categoria]['ahorro']
+    total = columnas[AHORROS[0]]
+    for categoria in AHORROS[1:]:
+        total = total + columnas[categoria]
+    columnas['total'] = total
+    for categoria, metricas in resultados.items():
+        for clave, valor in metricas.items():
+            if clave != 'ahorro':
+                columnas[f"{categoria}_{clave}"] = valor
+
+    indice = entradas.index if isinstance(entradas, pd.DataFrame) else None
+    n = max(np.size(v) for v in columnas.values())
+    columnas = {k: np.broadcast_to(v, (n,)) for k, v in columnas.items()}
+    return pd.DataFrame(columnas, index=indice)
@@ -0,0 +1,202 @@
+"""Generador de carga local para la API HTTP (api.py).
+
+Abre varias conexiones keep-alive y, en cada una, manda pedidos uno tras
+otro durante un tiempo fijo. Informa pedidos por segundo, escenarios por
+segundo y la latencia p50/p90/p99. Con --servidor levanta la API en un
+proceso aparte y la detiene al terminar.
+
+Uso:
+    python carga_api.py --servidor --conexiones 64 --duracion 10 --objetivo 2000
+    python carga_api.py --url http://127.0.0.1:8080 --ruta lote --lote 500
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from calculos import ENTEROS, ENTRADAS, MAXIMOS
+
+RUTAS = {'ahorros': '/ahorros', 'lote': '/ahorros/lote'}
+
+# Cuerpos distintos que se generan de antemano y se mandan rotando
+VARIANTES = 256
+
+
+def escenario_aleatorio(rng: random.Random) -> Dict[str, float]:
+    """Escenario válido para la API, con valores dentro de los límites de main.py."""
+    escenario = {}
+    for clave in ENTRADAS:
+        valor = rng.uniform(1.0, MAXIMOS.get(clave, 1000.0) / 2)
+        escenario[clave] = int(valor) if clave in ENTEROS else round(valor, 2)
+    return escenario
+
+
+def _cuerpos(ruta: str, lote: int, semilla: int) -> List[bytes]:
+    rng = random.Random(semilla)
+    cuerpos = []
+    for _ in range(VARIANTES if ruta == 'ahorros' else 8):
+        if ruta == 'ahorros':
+            datos = escenario_aleatorio(rng)
+        else:
+            datos = {'escenarios': [escenario_aleatorio(rng) for _ in range(lote)]}
+        cuerpos.append(json.dumps(datos).encode('utf-8'))
+    return cuerpos
+
+
+async def _conexion(host: str, puerto: int, ruta: str, cuerpos: List[bytes], fin: float,
+                    latencias: List[float], estados: Dict[int, int]) -> None:
+    lector, escritor = await asyncio.open_connection(host, puerto)
+    escritor.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    pedidos = [
+        f"POST {ruta} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(cuerpo)}\r\n\r\n".encode('latin-1') + cuerpo
+        for cuerpo in cuerpos
+    ]
+    i = random.randrange(len(pedidos))
+    try:
+        while time.perf_counter() < fin:
+            inicio = time.perf_counter()
+            escritor.write(pedidos[i % len(pedidos)])
+            encabezado = await lector.readuntil(b'\r\n\r\n')
+            largo = 0
+            for linea in encabezado.split(b'\r\n'):
+                if linea[:15].lower() == b'content-length:':
+                    largo = int(linea[15:])
+            await lector.readexactly(largo)
+            latencias.append(time.perf_counter() - inicio)
+            estado = int(encabezado[9:12])
+            estados[estado] = estados.get(estado, 0) + 1
+            i += 1
+    finally:
+        escritor.close()
+
+
+async def _cargar(url: str, ruta: str, lote: int, conexiones: int, duracion: float,
+                  semilla: int) -> Tuple[List[float], Dict[int, int]]:
+    partes = urlsplit(url)
+    cuerpos = _cuerpos(ruta, lote, semilla)
+    latencias: List[float] = []
+    estados: Dict[int, int] = {}
+    fin = time.perf_counter() + duracion
+    await asyncio.gather(*(
+        _conexion(partes.hostname, partes.port or 80, RUTAS[ruta], cuerpos, fin, latencias, estados)
+        for _ in range(conexiones)
+    ))
+    return latencias, estados
+
+
+def _cargar_proceso(argumentos) -> Tuple[List[float], Dict[int, int]]:
+    return asyncio.run(_cargar(*argumentos))
+
+
+def generar_carga(url: str, ruta: str = 'ahorros', lote: int = 100, conexiones: int = 64,
+                  duracion: float = 10.0, procesos: int = 1) -> Dict:
+    """Corre la carga y devuelve pedidos, errores, rendimiento y percentiles de latencia en ms."""
+    por_proceso = [max(1, conexiones // procesos + (i < conexiones % procesos)) for i in range(procesos)]
+    argumentos = [(url, ruta, lote, n, duracion, semilla) for semilla, n in enumerate(por_proceso)]
+    inicio = time.perf_counter()
+    if procesos == 1:
+        partes = [_cargar_proceso(argumentos[0])]
+    else:
+        with multiprocessing.get_context('spawn').Pool(procesos) as pool:
+            partes = pool.map(_cargar_proceso, argumentos)
+    transcurrido = time.perf_counter() - inicio
+
+    latencias = np.array([l for parte, _ in partes for l in parte]) * 1000
+    estados: Dict[int, int] = {}
+    for _, parte in partes:
+        for estado, cantidad in parte.items():
+            estados[estado] = estados.get(estado, 0) + cantidad
+    pedidos = len(latencias)
+    p50, p90, p99 = np.percentile(latencias, [50, 90, 99]) if pedidos else (0.0, 0.0, 0.0)
+    return {
+        'pedidos': pedidos,
+        'errores': pedidos - estados.get(200, 0),
+        'estados': estados,
+        'pedidos_por_segundo': pedidos / transcurrido,
+        'escenarios_por_segundo': pedidos * (lote if ruta == 'lote' else 1) / transcurrido,
+        'p50_ms': float(p50),
+        'p90_ms': float(p90),
+        'p99_ms': float(p99),
+        'max_ms': float(latencias.max()) if pedidos else 0.0,
+    }
+
+
+def _puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def levantar_api(procesos: int = 1, puerto: Optional[int] = None,
+                 espera: float = 30.0) -> Tuple[subprocess.Popen, str]:
+    """Levanta api.py en otro proceso y espera a que acepte conexiones; devuelve el proceso y su URL."""
+    puerto = puerto or _puerto_libre()
+    servidor = subprocess.Popen(
+        [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api.py'),
+         '--direccion', '127.0.0.1', '--puerto', str(puerto), '--procesos', str(procesos)],
+        stdout=subprocess.DEVNULL
+    )
+    limite = time.monotonic() + espera
+    while True:
+        try:
+            socket.create_connection(('127.0.0.1', puerto), timeout=1).close()
+            break
+        except OSError:
+            if servidor.poll() is not None or time.monotonic() > limite:
+                servidor.kill()
+                raise RuntimeError("la API no empezó a escuchar")
+            time.sleep(0.1)
+    return servidor, f"http://127.0.0.1:{puerto}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera carga sobre la API HTTP de la calculadora.")
+    parser.add_argument('--url', default='http://127.0.0.1:8080', help="URL base de la API")
+    parser.add_argument('--servidor', action='store_true', help="Levanta la API en un proceso aparte")
+    parser.add_argument('--procesos-servidor', type=int, default=1, help="Procesos de la API con --servidor")
+    parser.add_argument('--ruta', choices=list(RUTAS), default='ahorros')
+    parser.add_argument('--lote', type=int, default=100, help="Escenarios por pedido con --ruta lote")
+    parser.add_argument('--conexiones', type=int, default=64, help="Conexiones keep-alive simultáneas")
+    parser.add_argument('--duracion', type=float, default=10.0, help="Segundos de carga")
+    parser.add_argument('--procesos', type=int, default=1, help="Procesos que generan la carga")
+    parser.add_argument('--objetivo', type=float, help="Pedidos por segundo mínimos; si no se alcanzan termina con error")
+    args = parser.parse_args(argv)
+
+    servidor = None
+    url = args.url
+    if args.servidor:
+        servidor, url = levantar_api(args.procesos_servidor)
+    try:
+        resultado = generar_carga(url, args.ruta, args.lote, args.conexiones, args.duracion, args.procesos)
+    finally:
+        if servidor is not None:
+            servidor.terminate()
+            servidor.wait()
+
+    print(f"{RUTAS[args.ruta]} · {args.conexiones} conexiones · {args.duracion:g} s")
+    print(f"Pedidos: {resultado['pedidos']:,} ({resultado['errores']:,} con error) · "
+          f"{resultado['pedidos_por_segundo']:,.0f} pedidos/s · {resultado['escenarios_por_segundo']:,.0f} escenarios/s")
+    print(f"Latencia: p50 {resultado['p50_ms']:.2f} ms · p90 {resultado['p90_ms']:.2f} ms · "
+          f"p99 {resultado['p99_ms']:.2f} ms · máx {resultado['max_ms']:.2f} ms")
+    if resultado['errores']:
+        print(f"Estados: {resultado['estados']}", file=sys.stderr)
+    if args.objetivo and resultado['pedidos_por_segundo'] < args.objetivo:
+        print(f"ERROR: {resultado['pedidos_por_segundo']:,.0f} pedidos/s, por debajo del objetivo "
+              f"de {args.objetivo:,.0f}", file=sys.stderr)
+        sys.exit(1)
+    sys.exit(1 if resultado['errores'] else 0)
+
+
+if __name__ == '__main__':
+    main()
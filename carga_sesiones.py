@@ -0,0 +1,302 @@
+"""Prueba de carga de la app de Streamlit con varias sesiones simultáneas.
+
+Cada sesión simulada es un AppTest de main.py que corre en su propio hilo,
+como las sesiones de un servidor de Streamlit: comparten el proceso, el GIL,
+los recursos de `st.cache_resource` y la cola de reportes PDF. Una sesión
+carga la app, completa las entradas de cada pestaña en orden, vuelve al
+resumen y genera el reporte PDF, consultando su estado cada segundo hasta
+que se puede descargar. Cada entrada modificada es una ejecución del script;
+cambiar de pestaña en `st.tabs` ocurre solo en el navegador y no llega al
+servidor, así que no se mide.
+
+La carga sube por niveles de sesiones e informa, por nivel, la latencia
+p50/p95/p99 de cada interacción, la CPU y la memoria del servidor por
+sesión, y el primer nivel cuyo p95 supera el umbral.
+
+Uso:
+    python carga_sesiones.py --sesiones 1 2 4 8 16 --umbral-ms 500
+    python carga_sesiones.py --sesiones 4 --recorridos 3 --pausa 0 --salida carga.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from calculos import CATEGORIAS
+from carga_api import escenario_aleatorio
+from metricas import liberar_memoria, memoria_proceso
+
+RUTA_APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+
+NIVELES = (1, 2, 4, 8, 16, 32)
+UMBRAL_MS = 500.0
+
+ETIQUETA_PDF = "Generar Reporte PDF"
+
+# Intervalo de run_every con el que main.py consulta el reporte en curso
+CONSULTA_PDF = 1.0
+
+# Espera del PDF es trabajo de los workers, no latencia de una ejecución del script
+NO_INTERACTIVAS = ('pdf_listo',)
+
+_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+
+@contextmanager
+def _runtime_compartido() -> Iterator[None]:
+    """Permite correr varios AppTest a la vez en un mismo proceso mientras dura el bloque.
+
+    AppTest instala un Runtime simulado al empezar cada ejecución y lo borra
+    al terminar; con sesiones en paralelo, una sesión que termina deja sin
+    runtime a las que siguen corriendo. Las simulaciones son intercambiables
+    (almacenes en memoria), así que mientras no haya ninguna instalada se
+    usa la última que se vio. Además todas las ejecuciones comparten un solo
+    caché de bytecode del script, como en un servidor real; AppTest compila
+    main.py en cada ejecución, y compilar en varios hilos a la vez falla.
+    Al salir se restauran las clases de Streamlit originales.
+    """
+    from streamlit.runtime import Runtime
+    from streamlit.testing.v1 import app_test, local_script_runner
+
+    if getattr(Runtime, '_compartido_carga', False):
+        yield
+        return
+    originales = (app_test.ScriptCache, local_script_runner.ScriptCache,
+                  Runtime.__dict__['instance'], Runtime.__dict__['exists'])
+    cache_script = app_test.ScriptCache()
+    ultimo = []
+    original = Runtime.instance.__func__
+
+    def instance(cls):
+        runtime = cls._instance
+        if runtime is not None:
+            ultimo[:] = [runtime]
+            return runtime
+        if ultimo:
+            return ultimo[0]
+        return original(cls)
+
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: cache_script
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: cls._instance is not None or bool(ultimo))
+    Runtime._compartido_carga = True
+    try:
+        yield
+    finally:
+        app_test.ScriptCache, local_script_runner.ScriptCache, Runtime.instance, Runtime.exists = originales
+        del Runtime._compartido_carga
+
+
+def _cpu_workers() -> float:
+    """Segundos de CPU de los procesos hijos vivos (los workers de PDF de la cola)."""
+    total = 0
+    for hijo in multiprocessing.active_children():
+        try:
+            with open(f'/proc/{hijo.pid}/stat') as f:
+                campos = f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        # utime y stime son los campos 14 y 15; se cuentan desde el estado (campo 3)
+        total += int(campos[11]) + int(campos[12])
+    return total / _TICKS
+
+
+def _memoria_workers() -> int:
+    total = 0
+    for hijo in multiprocessing.active_children():
+        try:
+            with open(f'/proc/{hijo.pid}/status') as f:
+                for linea in f:
+                    if linea.startswith('VmRSS:'):
+                        total += int(linea.split()[1]) * 1024
+        except OSError:
+            continue
+    return total
+
+
+class _Sesion:
+    """Una sesión de navegador simulada que recorre la app y mide cada interacción."""
+
+    def __init__(self, indice: int, pausa: float, timeout: float, espera_pdf: float):
+        from streamlit.testing.v1 import AppTest
+
+        self.app = AppTest.from_file(RUTA_APP, default_timeout=timeout)
+        self.rng = random.Random(indice)
+        self.pausa = pausa
+        self.espera_pdf = espera_pdf
+        self.latencias: List[Tuple[str, float]] = []
+        self.errores: List[str] = []
+
+    def _pensar(self) -> None:
+        if self.pausa > 0:
+            time.sleep(self.rng.uniform(0, 2 * self.pausa))
+
+    def _ejecutar(self, interaccion: str, accion=None) -> None:
+        inicio = time.perf_counter()
+        (accion or self.app).run()
+        self.latencias.append((interaccion, time.perf_counter() - inicio))
+        if self.app.exception:
+            self.errores.append(f"{interaccion}: {self.app.exception[0].message}")
+
+    def recorrer(self, cargar: bool = True) -> None:
+        if cargar:
+            self._ejecutar('carga')
+        valores = escenario_aleatorio(self.rng)
+        for pestana, claves in CATEGORIAS.items():
+            for clave in claves:
+                self._pensar()
+                self._ejecutar(pestana, self.app.number_input(key=clave).set_value(valores[clave]))
+        self._pensar()
+        self._generar_pdf()
+
+    def _generar_pdf(self) -> None:
+        boton = next((b for b in self.app.button if b.label == ETIQUETA_PDF), None)
+        if boton is None:
+            self.errores.append("pdf: no se encontró el botón")
+            return
+        inicio = time.perf_counter()
+        self._ejecutar('pdf', boton.click())
+        limite = inicio + self.espera_pdf
+        while not self.app.get('download_button'):
+            if self.app.error or time.perf_counter() > limite:
+                self.errores.append("pdf: " + (self.app.error[0].value if self.app.error else "no terminó a tiempo"))
+                return
+            time.sleep(CONSULTA_PDF)
+            self._ejecutar('pdf_consulta')
+        self.latencias.append(('pdf_listo', time.perf_counter() - inicio))
+
+
+def _percentiles(segundos: Sequence[float]) -> Dict[str, float]:
+    if not segundos:
+        return {'n': 0, 'p50_ms': 0.0, 'p95_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0}
+    ms = np.asarray(segundos) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {'n': len(ms), 'p50_ms': float(p50), 'p95_ms': float(p95), 'p99_ms': float(p99),
+            'max_ms': float(ms.max())}
+
+
+def calentar(timeout: float = 60.0) -> None:
+    """Primera ejecución, sola: importa los módulos, llena los cachés de recursos y levanta la cola de PDF."""
+    with _runtime_compartido():
+        _Sesion(0, 0.0, timeout, 0.0).app.run()
+    liberar_memoria()
+
+
+def medir_nivel(sesiones: int, recorridos: int = 1, pausa: float = 0.5, timeout: float = 60.0,
+                espera_pdf: float = 120.0, semilla: int = 0) -> Dict:
+    """Corre `sesiones` sesiones a la vez, cada una con `recorridos` recorridos completos de la app."""
+    todas = [_Sesion(semilla + i, pausa, timeout, espera_pdf) for i in range(sesiones)]
+    largada = threading.Barrier(sesiones)
+
+    def correr(sesion: _Sesion) -> None:
+        largada.wait()
+        try:
+            for recorrido in range(recorridos):
+                sesion.recorrer(cargar=recorrido == 0)
+        except Exception as e:
+            sesion.errores.append(f"{type(e).__name__}: {e}")
+
+    liberar_memoria()
+    memoria_inicial = memoria_proceso('VmRSS')
+    cpu_inicial = time.process_time() + _cpu_workers()
+    inicio = time.perf_counter()
+    hilos = [threading.Thread(target=correr, args=(s,), name=f'sesion-{i}') for i, s in enumerate(todas)]
+    with _runtime_compartido():
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+    duracion = time.perf_counter() - inicio
+    cpu = time.process_time() + _cpu_workers() - cpu_inicial
+    # Con las sesiones todavía vivas, como en un servidor con esos usuarios conectados
+    liberar_memoria()
+    memoria = memoria_proceso('VmRSS') - memoria_inicial
+
+    latencias = [l for s in todas for l in s.latencias]
+    errores = [e for s in todas for e in s.errores]
+    interactivas = [segundos for nombre, segundos in latencias if nombre not in NO_INTERACTIVAS]
+    por_interaccion: Dict[str, List[float]] = {}
+    for nombre, segundos in latencias:
+        por_interaccion.setdefault(nombre, []).append(segundos)
+    return {
+        'sesiones': sesiones,
+        **_percentiles(interactivas),
+        'interacciones_por_segundo': len(interactivas) / duracion,
+        'errores': len(errores),
+        'mensajes_error': errores[:5],
+        'por_interaccion': {nombre: _percentiles(valores) for nombre, valores in por_interaccion.items()},
+        'cpu_por_sesion_s': cpu / sesiones,
+        'uso_cpu': cpu / duracion,
+        'memoria_por_sesion_mb': memoria / sesiones / 2**20,
+        'memoria_workers_mb': _memoria_workers() / 2**20,
+        'duracion_s': duracion,
+    }
+
+
+def ejecutar(niveles: Sequence[int] = NIVELES, umbral_ms: float = UMBRAL_MS, continuar: bool = False,
+             **opciones) -> Dict:
+    """Sube la carga nivel por nivel; se detiene en el primero cuyo p95 supera `umbral_ms`."""
+    calentar(opciones.get('timeout', 60.0))
+    resultados = []
+    limite: Optional[int] = None
+    for sesiones in niveles:
+        resultado = medir_nivel(sesiones, **opciones)
+        resultados.append(resultado)
+        _mostrar_nivel(resultado)
+        if limite is None and resultado['p95_ms'] > umbral_ms:
+            limite = sesiones
+            if not continuar:
+                break
+    return {'umbral_ms': umbral_ms, 'sesiones_limite': limite, 'niveles': resultados}
+
+
+def _mostrar_nivel(r: Dict) -> None:
+    print(f"{r['sesiones']:>4} sesiones · {r['n']:,} interacciones ({r['errores']} con error) · "
+          f"p50 {r['p50_ms']:.0f} ms · p95 {r['p95_ms']:.0f} ms · p99 {r['p99_ms']:.0f} ms · "
+          f"CPU {r['cpu_por_sesion_s']:.2f} s/sesión ({r['uso_cpu']:.0%}) · "
+          f"memoria {r['memoria_por_sesion_mb']:.1f} MB/sesión", flush=True)
+    for nombre, p in r['por_interaccion'].items():
+        print(f"       {nombre:<20} n={p['n']:<5} p50 {p['p50_ms']:>8.0f} ms · p95 {p['p95_ms']:>8.0f} ms · "
+              f"p99 {p['p99_ms']:>8.0f} ms", flush=True)
+    for mensaje in r['mensajes_error']:
+        print(f"       ERROR {mensaje}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga de la app de Streamlit con sesiones simultáneas.")
+    parser.add_argument('--sesiones', type=int, nargs='+', default=list(NIVELES),
+                        help="Niveles de sesiones simultáneas, en orden")
+    parser.add_argument('--umbral-ms', type=float, default=UMBRAL_MS, help="p95 máximo aceptable por interacción")
+    parser.add_argument('--recorridos', type=int, default=1, help="Recorridos completos de la app por sesión")
+    parser.add_argument('--pausa', type=float, default=0.5,
+                        help="Segundos promedio que el usuario piensa entre interacciones")
+    parser.add_argument('--timeout', type=float, default=60.0, help="Segundos máximos de una ejecución del script")
+    parser.add_argument('--espera-pdf', type=float, default=120.0, help="Segundos máximos para que esté el PDF")
+    parser.add_argument('--continuar', action='store_true', help="Sigue con los niveles después de superar el umbral")
+    parser.add_argument('--salida', help="Guarda el resultado como JSON")
+    args = parser.parse_args(argv)
+
+    # Como `streamlit run` desde la raíz del repositorio: main.py abre sus recursos con rutas relativas
+    os.chdir(os.path.dirname(RUTA_APP))
+    resultado = ejecutar(args.sesiones, args.umbral_ms, args.continuar, recorridos=args.recorridos,
+                         pausa=args.pausa, timeout=args.timeout, espera_pdf=args.espera_pdf)
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            json.dump(resultado, f, indent=2)
+    if resultado['sesiones_limite'] is None:
+        print(f"El p95 se mantuvo bajo {args.umbral_ms:g} ms hasta {resultado['niveles'][-1]['sesiones']} sesiones")
+    else:
+        print(f"El p95 supera {args.umbral_ms:g} ms con {resultado['sesiones_limite']} sesiones")
+    sys.exit(1 if any(n['errores'] for n in resultado['niveles']) else 0)
+
+
+if __name__ == '__main__':
+    main()
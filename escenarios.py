@@ -0,0 +1,202 @@
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Dict, Iterable, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from calculos import AHORROS, ENTEROS, ENTRADAS
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+RUTA_ESCENARIOS = 'escenarios.db'
+
+# Filas por transacción en las cargas masivas
+TAMANO_LOTE = 10_000
+
+_COLUMNAS = ('cliente', 'fecha', 'total') + ENTRADAS + AHORROS
+
+_ESQUEMA = f"""
+CREATE TABLE IF NOT EXISTS escenarios (
+    id INTEGER PRIMARY KEY,
+    cliente TEXT NOT NULL,
+    fecha TEXT NOT NULL,
+    total REAL NOT NULL,
+    {", ".join(f"{c} REAL NOT NULL DEFAULT 0" for c in ENTRADAS + AHORROS)}
+);
+CREATE INDEX IF NOT EXISTS idx_escenarios_cliente_fecha ON escenarios (cliente, fecha);
+CREATE INDEX IF NOT EXISTS idx_escenarios_fecha ON escenarios (fecha);
+CREATE INDEX IF NOT EXISTS idx_escenarios_total ON escenarios (total);
+"""
+
+_INSERTAR = (
+    f"INSERT INTO escenarios ({', '.join(_COLUMNAS)}) "
+    f"VALUES ({', '.join('?' * len(_COLUMNAS))})"
+)
+
+_RESUMEN = "SELECT id, cliente, fecha, total FROM escenarios"
+
+
+def _ahora() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+
+def _fila(cliente, entradas: Mapping[str, float], ahorros: Mapping[str, float], fecha: str) -> tuple:
+    valores_ahorro = [float(ahorros.get(k, 0) or 0) for k in AHORROS]
+    return (
+        (str(cliente), fecha, sum(valores_ahorro))
+        + tuple(float(entradas.get(k, 0) or 0) for k in ENTRADAS)
+        + tuple(valores_ahorro)
+    )
+
+
+class AlmacenEscenarios:
+    """Escenarios de clientes guardados en SQLite: todas las entradas y los ahorros calculados.
+
+    Hay índices por cliente y fecha, por fecha y por ahorro total, así que
+    cargar el último escenario de un cliente, listar los de un período o
+    pedir los N de mayor ahorro no recorren la tabla. La conexión se comparte
+    entre hilos con un lock.
+    """
+
+    def __init__(self, ruta: str = RUTA_ESCENARIOS):
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conexion.execute("PRAGMA journal_mode=WAL")
+            self._conexion.execute("PRAGMA synchronous=NORMAL")
+            self._conexion.executescript(_ESQUEMA)
+
+    def guardar(self, cliente: str, entradas: Mapping[str, float], ahorros: Mapping[str, float],
+                fecha: Optional[str] = None) -> int:
+        """Guarda un escenario y devuelve su id."""
+        with self._lock, self._conexion:
+            cursor = self._conexion.execute(_INSERTAR, _fila(cliente, entradas, ahorros, fecha or _ahora()))
+        return cursor.lastrowid
+
+    def guardar_lote(self, escenarios: Iterable[Tuple[str, Mapping[str, float], Mapping[str, float]]],
+                     fecha: Optional[str] = None) -> int:
+        """Guarda muchos escenarios (cliente, entradas, ahorros) en transacciones de TAMANO_LOTE filas."""
+        fecha = fecha or _ahora()
+        filas = (_fila(cliente, entradas, ahorros, fecha) for cliente, entradas, ahorros in escenarios)
+        return self._insertar(filas)
+
+    def guardar_resultados(self, resultados: "pd.DataFrame", clientes: Optional[Sequence] = None,
+                           fecha: Optional[str] = None) -> int:
+        """Guarda un bloque de resultados de batch.py: columnas de entrada y de ahorro por categoría.
+
+        `clientes` identifica cada fila; sin indicarlo se usa la columna
+        'cliente'. Las columnas ausentes se guardan en cero.
+        """
+        import pandas as pd
+
+        if clientes is None:
+            clientes = resultados['cliente']
+        n = len(resultados)
+        columnas = {
+            c: pd.to_numeric(resultados[c], errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+            if c in resultados else np.zeros(n)
+            for c in ENTRADAS + AHORROS
+        }
+        tabla = pd.DataFrame({
+            'cliente': np.asarray(clientes, dtype=object).astype(str),
+            'fecha': fecha or _ahora(),
+            'total': sum(columnas[c] for c in AHORROS),
+            **columnas,
+        }, columns=list(_COLUMNAS))
+        return self._insertar(tabla.itertuples(index=False, name=None))
+
+    def _insertar(self, filas: Iterable[tuple]) -> int:
+        insertadas = 0
+        lote = []
+        with self._lock:
+            for fila in filas:
+                lote.append(fila)
+                if len(lote) == TAMANO_LOTE:
+                    with self._conexion:
+                        self._conexion.executemany(_INSERTAR, lote)
+                    insertadas += len(lote)
+                    lote = []
+            if lote:
+                with self._conexion:
+                    self._conexion.executemany(_INSERTAR, lote)
+                insertadas += len(lote)
+        return insertadas
+
+    def cargar(self, id_escenario: int) -> Optional[Tuple[Dict[str, float], Dict[str, float]]]:
+        """Entradas (con los enteros de main.py como int) y ahorros de un escenario, o None si no existe."""
+        with self._lock:
+            fila = self._conexion.execute(
+                f"SELECT {', '.join(ENTRADAS + AHORROS)} FROM escenarios WHERE id = ?", (id_escenario,)
+            ).fetchone()
+        if fila is None:
+            return None
+        entradas = dict(zip(ENTRADAS, fila[:len(ENTRADAS)]))
+        for clave in ENTEROS:
+            entradas[clave] = int(round(entradas[clave]))
+        return entradas, dict(zip(AHORROS, fila[len(ENTRADAS):]))
+
+    def _consultar(self, sql: str, parametros: tuple = ()) -> "pd.DataFrame":
+        import pandas as pd
+
+        with self._lock:
+            cursor = self._conexion.execute(sql, parametros)
+            filas = cursor.fetchall()
+        return pd.DataFrame(filas, columns=[d[0] for d in cursor.description])
+
+    def ultimo(self, cliente: str) -> Optional[int]:
+        """Id del escenario más reciente del cliente."""
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT id FROM escenarios WHERE cliente = ? ORDER BY fecha DESC, id DESC LIMIT 1", (cliente,)
+            ).fetchone()
+        return fila[0] if fila else None
+
+    def historial(self, cliente: str) -> "pd.DataFrame":
+        return self._consultar(f"{_RESUMEN} WHERE cliente = ? ORDER BY fecha DESC, id DESC", (cliente,))
+
+    def recientes(self, n: int = 50) -> "pd.DataFrame":
+        return self._consultar(f"{_RESUMEN} ORDER BY fecha DESC, id DESC LIMIT ?", (n,))
+
+    def mejores(self, n: int = 10, desde: Optional[str] = None, hasta: Optional[str] = None) -> "pd.DataFrame":
+        """Los N escenarios de mayor ahorro total, opcionalmente dentro de un rango de fechas (ISO 8601)."""
+        condiciones, parametros = self._rango('fecha', desde, hasta)
+        return self._consultar(f"{_RESUMEN}{condiciones} ORDER BY total DESC LIMIT ?", parametros + (n,))
+
+    def por_total(self, minimo: Optional[float] = None, maximo: Optional[float] = None,
+                  limite: int = 1000) -> "pd.DataFrame":
+        """Escenarios con ahorro total entre `minimo` y `maximo`, de mayor a menor."""
+        condiciones, parametros = self._rango('total', minimo, maximo)
+        return self._consultar(f"{_RESUMEN}{condiciones} ORDER BY total DESC LIMIT ?", parametros + (limite,))
+
+    def por_fecha(self, desde: Optional[str] = None, hasta: Optional[str] = None,
+                  limite: int = 1000) -> "pd.DataFrame":
+        """Escenarios guardados entre `desde` y `hasta`, del más reciente al más antiguo."""
+        condiciones, parametros = self._rango('fecha', desde, hasta)
+        return self._consultar(f"{_RESUMEN}{condiciones} ORDER BY fecha DESC, id DESC LIMIT ?",
+                               parametros + (limite,))
+
+    @staticmethod
+    def _rango(columna: str, desde, hasta) -> Tuple[str, tuple]:
+        condiciones, parametros = [], ()
+        if desde is not None:
+            condiciones.append(f"{columna} >= ?")
+            parametros += (desde,)
+        if hasta is not None:
+            condiciones.append(f"{columna} <= ?")
+            parametros += (hasta,)
+        return (" WHERE " + " AND ".join(condiciones) if condiciones else ""), parametros
+
+    def vacio(self) -> bool:
+        """Si todavía no hay escenarios guardados; no recorre la tabla como cantidad()."""
+        with self._lock:
+            return not self._conexion.execute("SELECT EXISTS (SELECT 1 FROM escenarios)").fetchone()[0]
+
+    def cantidad(self) -> int:
+        with self._lock:
+            return self._conexion.execute("SELECT COUNT(*) FROM escenarios").fetchone()[0]
+
+    def cerrar(self) -> None:
+        with self._lock:
+            self._conexion.close()
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+from typing import Iterable, Sequence
+
+from calculos import calcular_plancha_parada, calcular_velocidad_impresion
+
+# Columnas de agrupación de cada prensa
+AGRUPACIONES = ('planta', 'tipo', 'region')
+
+# Entradas por prensa: una prensa tiene un solo valor de hora y un número de trabajos
+COLUMNAS_PRENSA = (
+    'tiempo_prensa_impresion',
+    'valor_hora',
+    'velocidad_actual',
+    'velocidad_iflexo',
+    'num_trabajos',
+    'tiempo_parada',
+    'paradas_actual',
+    'paradas_iflexo',
+)
+
+# Tipos de lectura de las entradas por prensa, para no inferirlos del primer bloque del archivo
+ESQUEMA_PRENSA = {columna: 'float64' for columna in COLUMNAS_PRENSA}
+
+# Columnas de resultado por prensa de `calcular_flota`, las que se suman al agregar
+RESULTADOS = (
+    'horas_ahorradas_velocidad',
+    'horas_ahorradas_paradas',
+    'velocidad_impresion',
+    'plancha_parada',
+    'total',
+)
+
+ETIQUETAS_PRENSA = {
+    'planta': "Planta",
+    'tipo': "Tipo de prensa",
+    'region': "Región",
+    'tiempo_prensa_impresion': "Horas en prensa (/año)",
+    'valor_hora': "Valor de hora (/hora)",
+    'velocidad_actual': "Velocidad actual (m/min)",
+    'velocidad_iflexo': "Velocidad con iFlexo (m/min)",
+    'num_trabajos': "Trabajos (/año)",
+    'tiempo_parada': "Minutos por parada",
+    'paradas_actual': "Paradas por trabajo actual",
+    'paradas_iflexo': "Paradas por trabajo con iFlexo",
+}
+
+
+def tabla_flota(prensas: pd.DataFrame) -> pd.DataFrame:
+    """Normaliza la tabla de prensas: agrupaciones como categorías y entradas como float64.
+
+    Las columnas de entrada ausentes se toman como cero.
+    """
+    columnas = {}
+    for columna in AGRUPACIONES:
+        if columna in prensas:
+            columnas[columna] = prensas[columna].astype('category')
+    for columna in COLUMNAS_PRENSA:
+        if columna in prensas:
+            columnas[columna] = pd.to_numeric(prensas[columna], errors='coerce').fillna(0).astype('float64')
+        else:
+            columnas[columna] = np.zeros(len(prensas))
+    return pd.DataFrame(columnas, index=prensas.index)
+
+
+def calcular_flota(flota: pd.DataFrame) -> pd.DataFrame:
+    """Calcula por prensa los ahorros de velocidad en impresión y de relación plancha-parada."""
+    velocidad = calcular_velocidad_impresion(
+        flota['tiempo_prensa_impresion'], flota['valor_hora'],
+        flota['velocidad_actual'], flota['velocidad_iflexo'])
+    paradas = calcular_plancha_parada(
+        flota['num_trabajos'], flota['valor_hora'], flota['tiempo_parada'],
+        flota['paradas_actual'], flota['paradas_iflexo'])
+
+    resultados = pd.DataFrame({
+        'horas_ahorradas_velocidad': np.nan_to_num(velocidad['horas_ahorradas']),
+        'horas_ahorradas_paradas': np.nan_to_num(paradas['horas_ahorradas']),
+        'velocidad_impresion': velocidad['ahorro'],
+        'plancha_parada': paradas['ahorro'],
+    }, index=flota.index)
+    resultados['total'] = resultados['velocidad_impresion'] + resultados['plancha_parada']
+    for columna in AGRUPACIONES:
+        if columna in flota:
+            resultados[columna] = flota[columna]
+    return resultados
+
+
+def agregar_flota(resultados: pd.DataFrame, por: Sequence[str] = ('planta',)) -> pd.DataFrame:
+    """Suma los ahorros por prensa según las agrupaciones pedidas y cuenta las prensas."""
+    por = list(por)
+    agrupado = resultados.groupby(por, observed=True, sort=False)
+    totales = agrupado[[c for c in resultados.columns if c not in AGRUPACIONES]].sum()
+    totales.insert(0, 'prensas', agrupado.size())
+    return totales.sort_values('total', ascending=False)
+
+
+def procesar_bloque_flota(bloque: pd.DataFrame) -> pd.DataFrame:
+    """Calcula los ahorros de un bloque de prensas y los agrega a sus columnas de entrada."""
+    bloque = bloque.reset_index(drop=True)
+    resultados = calcular_flota(tabla_flota(bloque))
+    return pd.concat([bloque, resultados.drop(columns=[c for c in AGRUPACIONES if c in resultados])], axis=1)
+
+
+def combinar_agregados(parciales: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """Suma los agregados de varios bloques (salidas de `agregar_flota`) en una sola tabla."""
+    combinado = pd.concat(list(parciales))
+    niveles = list(range(combinado.index.nlevels))
+    totales = combinado.groupby(level=niveles, sort=False).sum()
+    return totales.sort_values('total', ascending=False)
+
+
+def tabla_editable(filas: int = 3) -> pd.DataFrame:
+    """Tabla inicial de prensas para el editor de main.py."""
+    tabla = pd.DataFrame({c: pd.Series([''] * filas, dtype=object) for c in AGRUPACIONES})
+    tabla['planta'] = [f"Planta {i + 1}" for i in range(filas)]
+    for columna in COLUMNAS_PRENSA:
+        tabla[columna] = 0.0
+    return tabla
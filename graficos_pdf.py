@@ -0,0 +1,139 @@
+from functools import lru_cache
+import copy
+import textwrap
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.shapes import Drawing, Group, String, UserNode
+from reportlab.lib import colors
+
+from cache_graficos import CACHE_MAX_ENTRADAS, redondear
+from calculos import AHORROS, CALCULOS, CATEGORIAS, ETIQUETAS_CATEGORIAS
+
+ANCHO = 432
+ALTO = 216
+
+# Caracteres por línea de las etiquetas del eje: así las seis categorías entran en ANCHO
+ANCHO_ETIQUETA = 12
+
+COLOR_ACTUAL = colors.HexColor('#9E9E9E')
+COLOR_IFLEXO = colors.HexColor('#636EFA')
+
+def _expandir(nodo):
+    """Resuelve recursivamente los widgets (ejes, etiquetas) a formas básicas."""
+    while isinstance(nodo, UserNode):
+        nodo = nodo.provideNode()
+    if isinstance(nodo, Group):
+        grupo = copy.copy(nodo)
+        grupo.contents = [_expandir(hijo) for hijo in nodo.contents]
+        return grupo
+    return nodo
+
+def _redondear(valores) -> Tuple[float, ...]:
+    return tuple(redondear(v) for v in valores)
+
+@lru_cache(maxsize=CACHE_MAX_ENTRADAS)
+def _formas_barras(titulo: str, etiquetas: Tuple[str, ...], valores: Tuple[float, ...],
+                   formato: str, colores: Tuple[str, ...]) -> Group:
+    """Arma un gráfico de barras vectorial y lo resuelve a formas una sola vez.
+
+    `formato` es una plantilla de str.format para las etiquetas de las barras.
+    """
+    drawing = Drawing(ANCHO, ALTO)
+    drawing.add(String(ANCHO / 2, ALTO - 14, titulo, fontName='Helvetica-Bold',
+                       fontSize=11, textAnchor='middle'))
+
+    chart = VerticalBarChart()
+    chart.x = 60
+    chart.y = 36
+    chart.width = ANCHO - 80
+    chart.height = ALTO - 72
+    chart.data = [list(valores)]
+    chart.categoryAxis.categoryNames = list(etiquetas)
+    chart.categoryAxis.labels.fontSize = 8
+    chart.categoryAxis.labels.boxAnchor = 'n'
+    chart.valueAxis.labels.fontSize = 8
+    chart.valueAxis.labelTextFormat = '{:,.0f}'.format
+    chart.valueAxis.forceZero = 1
+    chart.valueAxis.visibleGrid = 1
+    chart.valueAxis.gridStrokeColor = colors.lightgrey
+    chart.barLabelFormat = formato.format
+    chart.barLabels.fontSize = 7
+    chart.barLabels.nudge = 6
+    chart.bars.strokeColor = None
+    for i, color in enumerate(colores):
+        chart.bars[(0, i)].fillColor = colors.HexColor(color)
+    drawing.add(chart)
+    return Group(*[_expandir(nodo) for nodo in drawing.contents])
+
+def _grafico_barras(*argumentos) -> Drawing:
+    # Platypus marca el flowable al maquetarlo, así que cada reporte recibe su propio
+    # Drawing; lo que se comparte son las formas ya calculadas
+    return Drawing(ANCHO, ALTO, _formas_barras(*argumentos))
+
+def _comparacion(titulo: str, actual: float, iflexo: float, unidad: str) -> Drawing:
+    return _grafico_barras(
+        titulo, ('Actual', 'Con iFlexo'), _redondear([actual, iflexo]),
+        "{:,.1f} " + unidad, (COLOR_ACTUAL.hexval(), COLOR_IFLEXO.hexval())
+    )
+
+def costos_comparison(ahorros: Mapping[str, float]) -> Drawing:
+    """Ahorro por categoría, como en create_costos_comparison."""
+    return _grafico_barras(
+        "Comparación de Ahorros por Categoría",
+        tuple(textwrap.fill(ETIQUETAS_CATEGORIAS[k], ANCHO_ETIQUETA, break_long_words=False,
+                            break_on_hyphens=False) for k in AHORROS),
+        _redondear([ahorros[k] for k in AHORROS]),
+        "${:,.1f}", (COLOR_IFLEXO.hexval(),) * len(AHORROS)
+    )
+
+def tiempo_paradas_comparison(tiempo_actual: float, tiempo_iflexo: float,
+                              titulo: str = "Comparación de Tiempo en Paradas de Prensa",
+                              unidad: str = "hrs") -> Drawing:
+    return _comparacion(titulo, tiempo_actual, tiempo_iflexo, unidad)
+
+def velocidad_comparison(velocidad_actual: float, velocidad_iflexo: float) -> Drawing:
+    return _comparacion("Comparación de Velocidades", velocidad_actual, velocidad_iflexo, "m/min")
+
+def tinta_comparison(consumo_actual: float, ahorro: float, tipo: str = "blanca") -> Drawing:
+    return _comparacion(f"Comparación de Consumo de Tinta {tipo.title()}",
+                        consumo_actual, consumo_actual - ahorro, "kg")
+
+def graficos_reporte(ahorros: Mapping[str, float], datos_entrada: Optional[Mapping[str, float]]) -> List[Drawing]:
+    """Gráficos del reporte: ahorros por categoría y la comparación de cada pestaña calculada.
+
+    Las comparaciones se arman desde las entradas de main.py con las mismas
+    funciones de calculos.py; una categoría con alguna entrada en cero no se grafica.
+    """
+    graficos = [costos_comparison(ahorros)]
+    if not datos_entrada:
+        return graficos
+
+    def calcular(categoria: str) -> Optional[Dict[str, float]]:
+        valores = [float(datos_entrada.get(k, 0) or 0) for k in CATEGORIAS[categoria]]
+        if not all(valores):
+            return None
+        return {k: float(v) for k, v in CALCULOS[categoria](*valores).items()}
+
+    r = calcular('velocidad_ajuste')
+    if r:
+        graficos.append(tiempo_paradas_comparison(
+            datos_entrada['tiempo_ajuste_actual'], r['tiempo_ajuste_iflexo'],
+            "Comparación de Tiempo de Ajuste de Prensa", "min"))
+    if calcular('velocidad_impresion'):
+        graficos.append(velocidad_comparison(datos_entrada['velocidad_actual'], datos_entrada['velocidad_iflexo']))
+    r = calcular('plancha_parada')
+    if r:
+        graficos.append(tiempo_paradas_comparison(r['horas_actual'], r['horas_iflexo']))
+    r = calcular('tinta_blanca')
+    if r:
+        graficos.append(tinta_comparison(datos_entrada['consumo_tinta_blanca'], r['kg_ahorrados'], "blanca"))
+    r = calcular('tintas')
+    if r:
+        graficos.append(tinta_comparison(datos_entrada['consumo_tinta'], r['kg_ahorrados'], "no blanca"))
+    return graficos
+
+def estadisticas_cache() -> Dict[str, int]:
+    """Aciertos y fallos del caché de gráficos de este proceso y cantidad de gráficos guardados."""
+    info = _formas_barras.cache_info()
+    return {'aciertos': info.hits, 'fallos': info.misses, 'entradas': info.currsize}
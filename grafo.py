@@ -0,0 +1,93 @@
+import math
+from typing import Any, Callable, Dict, List, Mapping, Sequence
+
+from calculos import AHORROS, CALCULOS, CATEGORIAS, ENTRADAS
+from metricas import contar, tramo
+
+
+def _iguales(a: Any, b: Any) -> bool:
+    """Igualdad de valores de nodos en la que NaN es igual a NaN.
+
+    Las categorías inactivas dejan sus métricas intermedias en NaN; con `==`
+    se verían distintas en cada cálculo y recalcularían a sus dependientes.
+    """
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_iguales(a[k], b[k]) for k in a)
+    if isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b):
+        return True
+    return a == b
+
+
+class GrafoCalculo:
+    """Grafo de dependencias con nodos memorizados.
+
+    Las entradas tienen nombre y cada nodo declara de qué entradas u otros
+    nodos depende. Un nodo solo se recalcula cuando cambió alguna de sus
+    dependencias, y si su nuevo valor es igual al anterior los nodos que
+    dependen de él tampoco se recalculan.
+    """
+
+    def __init__(self):
+        self._funciones: Dict[str, Callable] = {}
+        self._dependencias: Dict[str, Sequence[str]] = {}
+        self._valores: Dict[str, Any] = {}
+        self._versiones: Dict[str, int] = {}
+        self._firmas: Dict[str, tuple] = {}
+        self.recalculados: List[str] = []
+
+    def agregar_entrada(self, nombre: str, valor: Any = 0.0) -> None:
+        self._valores[nombre] = valor
+        self._versiones[nombre] = 0
+
+    def agregar_nodo(self, nombre: str, dependencias: Sequence[str], funcion: Callable) -> None:
+        """Registra un nodo; `funcion` recibe los valores de `dependencias` en orden."""
+        self._funciones[nombre] = funcion
+        self._dependencias[nombre] = tuple(dependencias)
+        self._versiones[nombre] = 0
+
+    def _cambiar(self, nombre: str, valor: Any) -> bool:
+        if nombre in self._valores and _iguales(self._valores[nombre], valor):
+            return False
+        self._valores[nombre] = valor
+        self._versiones[nombre] += 1
+        return True
+
+    def actualizar(self, entradas: Mapping[str, Any]) -> List[str]:
+        """Asigna valores a las entradas y devuelve las que cambiaron."""
+        return [nombre for nombre, valor in entradas.items() if self._cambiar(nombre, valor)]
+
+    def valor(self, nombre: str) -> Any:
+        """Devuelve el valor del nodo, recalculándolo solo si cambió alguna dependencia."""
+        if nombre not in self._funciones:
+            return self._valores[nombre]
+        dependencias = self._dependencias[nombre]
+        valores = [self.valor(d) for d in dependencias]
+        firma = tuple(self._versiones[d] for d in dependencias)
+        if self._firmas.get(nombre) != firma:
+            with tramo('calculo', nodo=nombre):
+                nuevo = self._funciones[nombre](*valores)
+            self._cambiar(nombre, nuevo)
+            self._firmas[nombre] = firma
+            self.recalculados.append(nombre)
+            contar('calculo_nodos', resultado='recalculado')
+        else:
+            contar('calculo_nodos', resultado='memorizado')
+        return self._valores[nombre]
+
+
+def _categoria(calculo: Callable) -> Callable:
+    def calcular(*valores):
+        return {k: float(v) for k, v in calculo(*valores).items()}
+    return calcular
+
+
+def grafo_ahorros() -> GrafoCalculo:
+    """Arma el grafo de main.py: entradas → métricas de cada pestaña → ahorros → total."""
+    grafo = GrafoCalculo()
+    for clave in ENTRADAS:
+        grafo.agregar_entrada(clave)
+    for categoria, claves in CATEGORIAS.items():
+        grafo.agregar_nodo(categoria, claves, _categoria(CALCULOS[categoria]))
+        grafo.agregar_nodo(f"ahorro_{categoria}", (categoria,), lambda r: r['ahorro'])
+    grafo.agregar_nodo('total', [f"ahorro_{c}" for c in AHORROS], lambda *ahorros: sum(ahorros))
+    return grafo
@@ -1,13 +1,28 @@
+import math
+import os
+import time
 import streamlit as st
-import pandas as pd
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 from visualizations import (
     create_costos_comparison,
     create_tiempo_paradas_comparison,
     create_velocidad_comparison,
-    create_tinta_comparison
+    create_tinta_comparison,
+    create_tornado_chart,
+    create_proyeccion_chart,
+    create_proveedores_comparison,
+    create_proveedores_totales,
+    estadisticas_cache
 )
-from pdf_report import generate_pdf_report
-from PIL import Image
+from reportes import ColaReportes, PENDIENTE, EN_PROCESO, LISTO, ERROR, DESCONOCIDO
+from calculos import AHORROS, ENTRADAS, ETIQUETAS, MAXIMOS, precio_equilibrio_iflexo
+from escenarios import AlmacenEscenarios
+from grafo import grafo_ahorros
+from metricas import iniciar_servidor, medido, observar, tramo
+from proyeccion import ESCALAMIENTO_MINIMO, proyectar_inversion, rubros_ahorro
+from sensibilidad import barrido_sensibilidad
+from simulacion import DISTRIBUCIONES, distribuciones_relativas, simular_ahorros
+# registros, proveedores y utils cargan pandas: se importan donde se usan para no demorar el arranque
 
 # Configuración de la página
 st.set_page_config(
@@ -16,6 +31,7 @@ st.set_page_config(
     layout="wide",
     initial_sidebar_state="collapsed"
 )
+st.session_state.inicio_rerun = time.perf_counter()
 
 # Estilos personalizados para mejorar la responsividad
 st.markdown("""
@@ -62,12 +78,63 @@ st.markdown("""
     </style>
     """, unsafe_allow_html=True)
 
+@st.cache_resource
+def _cargar_logo():
+    """Lee el logo una sola vez por proceso y lo comparte entre sesiones."""
+    with tramo('logo', origen='app'), open("attached_assets/iflexo6-sm-kit.jpg", "rb") as f:
+        return f.read()
+
+@st.cache_resource
+def _cola_reportes():
+    """Cola de reportes PDF compartida por todas las sesiones del servidor."""
+    return ColaReportes(max_workers=2)
+
+@st.cache_resource
+def _servidor_metricas():
+    """Endpoint /metrics en formato Prometheus, uno por proceso, si IFLEXO_METRICAS_PUERTO está definido."""
+    puerto = os.environ.get('IFLEXO_METRICAS_PUERTO')
+    return iniciar_servidor(int(puerto)) if puerto else None
+
+_servidor_metricas()
+
+@st.cache_resource
+def _almacen_escenarios():
+    """Almacén de escenarios compartido por todas las sesiones del servidor."""
+    return AlmacenEscenarios()
+
+def _mostrar_estado_reporte(trabajo, consultando):
+    cola = _cola_reportes()
+    estado = cola.estado(trabajo)
+    if estado == LISTO:
+        if consultando:
+            # Deja de consultar: la próxima ejecución ya no programa run_every
+            st.rerun()
+        st.download_button(
+            label="Descargar Reporte PDF",
+            data=cola.resultado(trabajo),
+            file_name="reporte_eficiencia_costos.pdf",
+            mime="application/pdf"
+        )
+    elif estado == ERROR:
+        st.error(f"Error al generar el reporte: {cola.error(trabajo)}")
+    elif estado == DESCONOCIDO:
+        st.warning("El reporte ya no está disponible, vuelva a generarlo.")
+    else:
+        st.info("Generando reporte PDF...")
+
+def _estado_reporte():
+    """Muestra el reporte en curso; mientras no termina se consulta cada segundo."""
+    trabajo = st.session_state.get('reporte_id')
+    if trabajo is None:
+        return
+    consultando = _cola_reportes().estado(trabajo) in (PENDIENTE, EN_PROCESO)
+    st.fragment(_mostrar_estado_reporte, run_every=1 if consultando else None)(trabajo, consultando)
+
 # Logo y título
 col1, col2 = st.columns([1, 3])
 with col1:
     try:
-        image = Image.open("attached_assets/iflexo6-sm-kit.jpg")
-        st.image(image, width=200)
+        st.image(_cargar_logo(), width=200)
     except Exception as e:
         st.error(f"Error al cargar el logo: {str(e)}")
 
@@ -79,6 +146,41 @@ Esta calculadora te ayuda a determinar los ahorros potenciales en tu proceso de
 considerando diferentes factores como costos de planchas, velocidad de prensa y consumo de tintas.
 """)
 
+def _entradas_actuales():
+    """Valores actuales de todas las entradas, incluidas las de pestañas no visitadas."""
+    return {k: st.session_state.get(k, 0) for k in ENTRADAS}
+
+def _refrescar_resumen(categoria):
+    """Callback de las entradas de una pestaña: refresca el resumen solo si cambió su ahorro.
+
+    Vuelve a ejecutar esa pestaña, la de planchas (su precio de equilibrio
+    depende del ahorro de las demás) y el resumen, no toda la app; al final
+    siempre el fragmento de rendimiento, que mide la interacción desde aquí.
+    Si la ejecución ya es de toda la app (sin fragmentos), todo se dibuja
+    igual con los valores nuevos y no hace falta interrumpirla.
+    """
+    st.session_state.inicio_rerun = time.perf_counter()
+    grafo = st.session_state.grafo
+    grafo.actualizar(_entradas_actuales())
+    contexto = get_script_run_ctx()
+    if contexto is None or not contexto.fragment_ids_this_run:
+        return
+    alcance = [categoria]
+    if grafo.valor(f"ahorro_{categoria}") != st.session_state.ahorros[categoria]:
+        alcance += ["planchas", "resumen"]
+    st.rerun(scope=list(dict.fromkeys(alcance + ["rendimiento"])))
+
+def _aplicar_registro():
+    """Carga en los number_input los promedios del registro de trabajos importado."""
+    st.session_state.update(st.session_state.registro_entradas)
+
+def _cargar_escenario():
+    """Carga en los number_input el escenario elegido; el resumen lo recalcula el grafo."""
+    escenario = _almacen_escenarios().cargar(st.session_state.escenario_id)
+    if escenario is not None:
+        entradas, _ = escenario
+        st.session_state.update(entradas)
+
 # Inicializar variables de estado si no existen
 if 'ahorros' not in st.session_state:
     st.session_state.ahorros = {
@@ -90,6 +192,11 @@ if 'ahorros' not in st.session_state:
         'plancha_parada': 0.0
     }
 
+# Grafo de cálculo memorizado: solo se recalculan los nodos cuyas entradas cambiaron
+if 'grafo' not in st.session_state:
+    st.session_state.grafo = grafo_ahorros()
+grafo = st.session_state.grafo
+
 # Crear las pestañas para cada sección
 tabs = st.tabs([
     "Menú Principal",
@@ -102,116 +209,465 @@ tabs = st.tabs([
 ])
 
 # Pestaña: Menú Principal
-with tabs[0]:
+@st.fragment(key="resumen")
+@medido('pestana', pestana='resumen')
+def _pestana_resumen():
+    grafo.actualizar(_entradas_actuales())
+    # El resumen sale de los nodos ahorro_* y total del grafo; el reporte y los escenarios usan los mismos valores
+    ahorros = st.session_state.ahorros = {c: grafo.valor(f"ahorro_{c}") for c in AHORROS}
     st.header("Resumen de Costos")
     col1, col2 = st.columns(2)
 
     with col1:
-        st.metric("Ahorro en Costo de Planchas", f"${int(st.session_state.ahorros['planchas']):,} /año")
-        st.metric("Ahorro en Velocidad de Ajuste", f"${int(st.session_state.ahorros['velocidad_ajuste']):,} /año")
-        st.metric("Ahorro en Velocidad de Impresión", f"${int(st.session_state.ahorros['velocidad_impresion']):,} /año")
+        st.metric("Ahorro en Costo de Planchas", f"${int(ahorros['planchas']):,} /año")
+        st.metric("Ahorro en Velocidad de Ajuste", f"${int(ahorros['velocidad_ajuste']):,} /año")
+        st.metric("Ahorro en Velocidad de Impresión", f"${int(ahorros['velocidad_impresion']):,} /año")
 
     with col2:
-        st.metric("Ahorro en Tinta Blanca", f"${st.session_state.ahorros['tinta_blanca']:,.1f} /año")
-        st.metric("Ahorro en Tintas", f"${st.session_state.ahorros['tintas']:,.1f} /año")
-        st.metric("Ahorro por Relación Plancha-Parada", f"${st.session_state.ahorros['plancha_parada']:,.1f} /año")
-        ahorro_total = sum(st.session_state.ahorros.values())
+        st.metric("Ahorro en Tinta Blanca", f"${ahorros['tinta_blanca']:,.1f} /año")
+        st.metric("Ahorro en Tintas", f"${ahorros['tintas']:,.1f} /año")
+        st.metric("Ahorro por Relación Plancha-Parada", f"${ahorros['plancha_parada']:,.1f} /año")
+        ahorro_total = grafo.valor('total')
         st.metric("Ahorro Total Anual", f"${ahorro_total:,.1f} /año")
 
     # Agregar gráfico de comparación de ahorros
-    st.plotly_chart(create_costos_comparison(st.session_state.ahorros))
+    st.plotly_chart(create_costos_comparison(ahorros))
+
+    # Proyección multianual de la inversión
+    with st.expander("Proyección multianual"):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            inversion = st.number_input(
+                "Inversión inicial",
+                min_value=0.0,
+                format="%.1f",
+                key="proyeccion_inversion"
+            )
+            tasa_descuento = st.number_input(
+                "Tasa de descuento (%/año)",
+                min_value=0.0,
+                max_value=100.0,
+                value=10.0,
+                format="%.1f",
+                key="proyeccion_tasa_descuento"
+            )
+            anios = st.slider("Horizonte (años)", min_value=1, max_value=10, value=5, key="proyeccion_anios")
+        with col2:
+            escalamiento_tinta = st.number_input(
+                "Aumento anual del precio de tinta (%)",
+                min_value=ESCALAMIENTO_MINIMO * 100,
+                value=0.0,
+                format="%.1f",
+                key="proyeccion_escalamiento_tinta"
+            )
+            escalamiento_material = st.number_input(
+                "Aumento anual del precio de material (%)",
+                min_value=ESCALAMIENTO_MINIMO * 100,
+                value=0.0,
+                format="%.1f",
+                key="proyeccion_escalamiento_material"
+            )
+        with col3:
+            escalamiento_hora = st.number_input(
+                "Aumento anual del valor de hora en prensa (%)",
+                min_value=ESCALAMIENTO_MINIMO * 100,
+                value=0.0,
+                format="%.1f",
+                key="proyeccion_escalamiento_hora"
+            )
+            escalamiento_planchas = st.number_input(
+                "Aumento anual del precio de planchas (%)",
+                min_value=ESCALAMIENTO_MINIMO * 100,
+                value=0.0,
+                format="%.1f",
+                key="proyeccion_escalamiento_planchas"
+            )
+
+        resultado = proyectar_inversion(
+            rubros_ahorro(_entradas_actuales()),
+            inversion=inversion,
+            tasa_descuento=tasa_descuento / 100,
+            anios=anios,
+            escalamiento={
+                'tinta': escalamiento_tinta / 100,
+                'material': escalamiento_material / 100,
+                'hora_prensa': escalamiento_hora / 100,
+                'planchas': escalamiento_planchas / 100,
+            }
+        )
+        proyeccion = {
+            'flujos': [float(v) for v in resultado['flujos'][0]],
+            'inversion': inversion,
+            'tasa_descuento': tasa_descuento / 100,
+            'van': float(resultado['van'][0]),
+            'tir': float(resultado['tir'][0]),
+            'mes_recuperacion': float(resultado['mes_recuperacion'][0]),
+        }
+
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Valor actual neto", f"${proyeccion['van']:,.1f}")
+        col2.metric(
+            "Tasa interna de retorno",
+            "N/A" if math.isnan(proyeccion['tir']) else f"{proyeccion['tir'] * 100:.1f}%"
+        )
+        col3.metric(
+            "Mes de recuperación",
+            "Fuera del horizonte" if math.isnan(proyeccion['mes_recuperacion'])
+            else f"{int(proyeccion['mes_recuperacion'])}"
+        )
+        st.plotly_chart(create_proyeccion_chart(proyeccion['flujos'], inversion))
 
-    # Botón para generar reporte PDF
+    # Botón para generar reporte PDF: se genera en segundo plano y se consulta su estado
     if st.button("Generar Reporte PDF"):
-        pdf_buffer = generate_pdf_report(st.session_state.ahorros, {})
-        st.download_button(
-            label="Descargar Reporte PDF",
-            data=pdf_buffer,
-            file_name="reporte_eficiencia_costos.pdf",
-            mime="application/pdf"
+        st.session_state.reporte_id = _cola_reportes().enviar(
+            ahorros,
+            _entradas_actuales(),
+            proyeccion if inversion > 0 else None
         )
+    _estado_reporte()
+
+    # Escenarios guardados de clientes
+    with st.expander("Escenarios guardados"):
+        almacen = _almacen_escenarios()
+        col1, col2 = st.columns(2)
+        with col1:
+            cliente = st.text_input("Cliente", key="escenario_cliente")
+            if st.button("Guardar escenario", disabled=not cliente.strip()):
+                almacen.guardar(cliente.strip(), _entradas_actuales(), ahorros)
+                st.success("Escenario guardado")
+        # Las consultas devuelven DataFrames: con el almacén vacío no hace falta cargar pandas
+        hay_escenarios = not almacen.vacio()
+        with col2:
+            if hay_escenarios:
+                recientes = almacen.recientes(50)
+                nombres = dict(zip(recientes['id'], recientes['cliente'] + " — " + recientes['fecha']))
+                st.selectbox("Escenario", list(nombres), format_func=nombres.get, key="escenario_id")
+                if st.button("Cargar escenario", on_click=_cargar_escenario):
+                    # El escenario cambia las entradas de todas las pestañas
+                    st.rerun()
+        if hay_escenarios:
+            mejores = almacen.mejores(10)
+            st.caption("Escenarios de mayor ahorro total")
+            st.dataframe(mejores.style.format({'total': "${:,.1f}"}), hide_index=True)
+
+    # Simulación de incertidumbre sobre el ahorro total
+    with st.expander("Simulación de incertidumbre"):
+        inciertas = st.multiselect(
+            "Entradas inciertas",
+            ENTRADAS,
+            format_func=ETIQUETAS.get,
+            key="simulacion_entradas"
+        )
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            distribucion = st.selectbox("Distribución", DISTRIBUCIONES, key="simulacion_distribucion")
+        with col2:
+            variacion = st.number_input(
+                "Variación (± %)",
+                min_value=0.0,
+                max_value=100.0,
+                value=10.0,
+                format="%.1f",
+                key="simulacion_variacion"
+            )
+        with col3:
+            n_muestras = st.select_slider(
+                "Muestras",
+                options=[100_000, 250_000, 500_000, 1_000_000],
+                key="simulacion_muestras"
+            )
+
+        if inciertas and st.button("Simular"):
+            valores = _entradas_actuales()
+            percentiles = simular_ahorros(
+                valores,
+                distribuciones_relativas(valores, inciertas, distribucion, variacion),
+                n_muestras=n_muestras,
+                semilla=0
+            )
+            st.metric(
+                "Ahorro Total Anual (P10 – P90)",
+                f"${percentiles.loc['total', 'P10']:,.1f} – ${percentiles.loc['total', 'P90']:,.1f} /año"
+            )
+            st.dataframe(percentiles.style.format("${:,.1f}"))
+
+    # Análisis de sensibilidad de cada entrada sobre el ahorro total
+    with st.expander("Análisis de sensibilidad"):
+        variacion_sensibilidad = st.slider(
+            "Variación de cada entrada (± %)",
+            min_value=1,
+            max_value=100,
+            value=20,
+            key="sensibilidad_variacion"
+        )
+        if st.checkbox("Mostrar gráfico tornado", key="sensibilidad_mostrar"):
+            valores = _entradas_actuales()
+            sensibilidad = barrido_sensibilidad(valores, variacion=variacion_sensibilidad)
+            st.plotly_chart(create_tornado_chart(sensibilidad, ahorro_total))
+
+    # Comparación de varios proveedores de planchas sobre las mismas entradas del cliente
+    with st.expander("Comparación de proveedores"):
+        if st.checkbox("Comparar proveedores", key="proveedores_mostrar"):
+            from proveedores import (
+                ENTRADAS_CLIENTE,
+                ENTRADAS_PROVEEDOR,
+                ETIQUETAS_PROVEEDOR,
+                ahorros_proveedores,
+                comparar_proveedores,
+                con_iflexo,
+                resumen_proveedores,
+                tabla_editable
+            )
+
+            st.caption("iFlexo usa las entradas de las pestañas; agregue una fila por cada otro proveedor.")
+            if 'proveedores_tabla' not in st.session_state:
+                st.session_state.proveedores_tabla = tabla_editable()
+            otros = st.data_editor(
+                st.session_state.proveedores_tabla,
+                num_rows="dynamic",
+                hide_index=True,
+                column_config={
+                    'proveedor': st.column_config.TextColumn("Proveedor", required=True),
+                    **{
+                        k: st.column_config.NumberColumn(
+                            ETIQUETAS_PROVEEDOR[k], min_value=0.0, max_value=MAXIMOS.get(k), format="%.1f"
+                        )
+                        for k in ENTRADAS_PROVEEDOR
+                    }
+                },
+                key="proveedores_editor"
+            )
+            valores = _entradas_actuales()
+            proveedores = con_iflexo(valores, otros)
+
+            ahorros_cliente = ahorros_proveedores(valores, proveedores)
+            st.dataframe(ahorros_cliente.style.format("${:,.1f}"))
+            st.plotly_chart(create_proveedores_comparison(ahorros_cliente))
+
+            cartera = st.file_uploader(
+                "Cartera de clientes (opcional)",
+                type=['csv', 'xlsx', 'parquet'],
+                key="proveedores_cartera"
+            )
+            if cartera is not None:
+                from utils import ESQUEMA_ENTRADAS, load_file
+
+                if st.session_state.get('proveedores_cartera_id') != cartera.file_id:
+                    st.session_state.proveedores_clientes = load_file(
+                        cartera, columnas=list(ENTRADAS_CLIENTE), esquema=ESQUEMA_ENTRADAS
+                    ).fillna(0)
+                    st.session_state.proveedores_cartera_id = cartera.file_id
+                clientes = st.session_state.proveedores_clientes
+                resumen = resumen_proveedores(comparar_proveedores(clientes, proveedores), proveedores.index)
+                st.caption(f"{len(clientes):,} clientes")
+                st.dataframe(resumen.style.format({
+                    **{c: "${:,.1f}" for c in resumen.columns if c != 'clientes_mejor'},
+                    'clientes_mejor': "{:,}"
+                }))
+                st.plotly_chart(create_proveedores_totales(resumen))
+
+    # Flota de prensas con velocidades, valores de hora y paradas distintos
+    with st.expander("Modo flota"):
+        if st.checkbox("Calcular por prensa", key="flota_mostrar"):
+            from flota import (
+                AGRUPACIONES,
+                COLUMNAS_PRENSA,
+                ETIQUETAS_PRENSA,
+                agregar_flota,
+                calcular_flota,
+                tabla_editable,
+                tabla_flota
+            )
+
+            st.caption("Una fila por prensa; calcula Velocidad en Impresión y Relación Plancha-Parada de cada una.")
+            if 'flota_tabla' not in st.session_state:
+                st.session_state.flota_tabla = tabla_editable()
+            prensas = st.data_editor(
+                st.session_state.flota_tabla,
+                num_rows="dynamic",
+                hide_index=True,
+                column_config={
+                    **{c: st.column_config.TextColumn(ETIQUETAS_PRENSA[c]) for c in AGRUPACIONES},
+                    **{
+                        c: st.column_config.NumberColumn(ETIQUETAS_PRENSA[c], min_value=0.0, format="%.1f")
+                        for c in COLUMNAS_PRENSA
+                    }
+                },
+                key="flota_editor"
+            )
+            agrupar = st.multiselect(
+                "Agrupar por",
+                AGRUPACIONES,
+                default=['planta'],
+                format_func=ETIQUETAS_PRENSA.get,
+                key="flota_agrupar"
+            )
+            resultados = calcular_flota(tabla_flota(prensas.fillna({c: '' for c in AGRUPACIONES})))
+            st.metric("Ahorro total de la flota", f"${resultados['total'].sum():,.1f} /año")
+            if agrupar:
+                resumen = agregar_flota(resultados, agrupar)
+                st.dataframe(resumen.style.format({
+                    **{c: "${:,.1f}" for c in ('velocidad_impresion', 'plancha_parada', 'total')},
+                    **{c: "{:,.1f}" for c in ('horas_ahorradas_velocidad', 'horas_ahorradas_paradas')}
+                }))
+
+with tabs[0]:
+    _pestana_resumen()
 
 # Pestaña: Costo de Planchas
-with tabs[1]:
+@st.fragment(key="planchas")
+@medido('pestana', pestana='planchas')
+def _pestana_planchas():
+    grafo.actualizar(_entradas_actuales())
     st.header("Cálculo de Costo de Planchas")
 
     consumo_planchas = st.number_input(
         "Consumo de planchas (unidades/año)",
         min_value=0,
         format="%d",
-        key="consumo_planchas"
+        key="consumo_planchas",
+        on_change=_refrescar_resumen,
+        args=("planchas",)
     )
 
     costo_actual = st.number_input(
         "Actual costo de plancha (/cm²)",
         min_value=0.0,
         format="%.1f",
-        key="costo_actual_plancha"
+        key="costo_actual_plancha",
+        on_change=_refrescar_resumen,
+        args=("planchas",)
     )
 
     costo_iflexo = st.number_input(
         "Costo de plancha iFlexo (/cm²)",
         min_value=0.0,
         format="%.1f",
-        key="costo_iflexo_plancha"
+        key="costo_iflexo_plancha",
+        on_change=_refrescar_resumen,
+        args=("planchas",)
     )
 
     if all([consumo_planchas, costo_actual, costo_iflexo]):
-        diferencia = ((costo_actual - costo_iflexo) / costo_actual) * 100
-        gasto_actual = consumo_planchas * costo_actual
-        gasto_iflexo = consumo_planchas * costo_iflexo
-        diferencia_gasto = gasto_actual - gasto_iflexo
+        r = grafo.valor('planchas')
+        diferencia = r['diferencia_pct']
+        gasto_actual = r['gasto_actual']
+        gasto_iflexo = r['gasto_iflexo']
+        diferencia_gasto = r['ahorro']
 
         st.metric("Diferencia en costo con iFlexo", f"{diferencia:.1f}%")
         st.metric("Actual gasto en planchas", f"${gasto_actual:,.1f} /año")
         st.metric("Gasto en planchas con iFlexo", f"${gasto_iflexo:,.1f} /año")
         st.metric("Diferencia en gasto de planchas con iFlexo", f"${diferencia_gasto:,.1f} /año")
-        st.session_state.ahorros['planchas'] = diferencia_gasto
+
+    if all([consumo_planchas, costo_actual]):
+        objetivo_equilibrio = st.number_input(
+            "Ahorro total objetivo (/año)",
+            min_value=0.0,
+            format="%.1f",
+            key="objetivo_equilibrio"
+        )
+        precio_equilibrio = float(precio_equilibrio_iflexo(
+            _entradas_actuales(),
+            objetivo_equilibrio
+        ))
+        if precio_equilibrio > 0:
+            st.metric("Precio máximo de plancha iFlexo para el objetivo", f"${precio_equilibrio:,.2f} /cm²")
+        else:
+            st.metric("Precio máximo de plancha iFlexo para el objetivo", "No alcanzable")
+
+with tabs[1]:
+    _pestana_planchas()
 
 # Pestaña: Velocidad de Ajuste
-with tabs[2]:
+@st.fragment(key="velocidad_ajuste")
+@medido('pestana', pestana='ajuste')
+def _pestana_ajuste():
+    grafo.actualizar(_entradas_actuales())
     st.header("Cálculo de Velocidad de Ajuste")
 
+    with st.expander("Importar registro de trabajos"):
+        st.markdown(
+            "Archivo con una fila por trabajo y las columnas `minutos_ajuste`, `paradas` y "
+            "`metros_desperdicio`. Reemplaza los promedios de esta pestaña y de Relación Plancha-Parada."
+        )
+        registro = st.file_uploader(
+            "Registro de trabajos",
+            type=['csv', 'xlsx', 'parquet'],
+            key="registro_archivo"
+        )
+        anios_registro = st.number_input(
+            "Período que cubre el registro (años)",
+            min_value=0.1,
+            value=1.0,
+            format="%.1f",
+            key="registro_anios"
+        )
+        if registro is not None:
+            from registros import analizar_registro, entradas_desde_registro
+
+            if st.session_state.get('registro_id') != registro.file_id:
+                st.session_state.registro_acumulador = analizar_registro(registro)
+                st.session_state.registro_id = registro.file_id
+            acumulador = st.session_state.registro_acumulador
+            st.dataframe(acumulador.resumen())
+            st.session_state.registro_entradas = entradas_desde_registro(acumulador, anios_registro)
+            if st.button("Aplicar al cálculo", on_click=_aplicar_registro):
+                # El registro también cambia la pestaña Relación Plancha-Parada
+                st.rerun()
+
     num_trabajos = st.number_input(
         "Número de trabajos (trabajos/año)",
         min_value=0,
         format="%d",
-        key="num_trabajos_ajuste"
+        key="num_trabajos_ajuste",
+        on_change=_refrescar_resumen,
+        args=("velocidad_ajuste",)
     )
 
     valor_hora_prensa = st.number_input(
         "Valor de hora en prensa (/hora)",
         min_value=0.0,
         format="%.1f",
-        key="valor_hora_ajuste"
+        key="valor_hora_ajuste",
+        on_change=_refrescar_resumen,
+        args=("velocidad_ajuste",)
     )
 
     tiempo_ajuste_actual = st.number_input(
         "Tiempo actual de ajuste (minutos)",
         min_value=0,
         format="%d",
-        key="tiempo_ajuste_actual"
+        key="tiempo_ajuste_actual",
+        on_change=_refrescar_resumen,
+        args=("velocidad_ajuste",)
     )
 
     diferencia_tiempo_ajuste = st.number_input(
         "Diferencia de tiempo de ajuste de prensa con iFlexo (minutos)",
         min_value=0,
         format="%d",
-        key="diferencia_tiempo_ajuste"
+        key="diferencia_tiempo_ajuste",
+        on_change=_refrescar_resumen,
+        args=("velocidad_ajuste",)
     )
 
     metros_material_actual = st.number_input(
         "Metros actuales de material en ajuste de prensa (m)",
         min_value=0.0,
         format="%.1f",
-        key="metros_material_actual"
+        key="metros_material_actual",
+        on_change=_refrescar_resumen,
+        args=("velocidad_ajuste",)
     )
 
     costo_material = st.number_input(
         "Costo de material (/m)",
         min_value=0.0,
         format="%.1f",
-        key="costo_material"
+        key="costo_material",
+        on_change=_refrescar_resumen,
+        args=("velocidad_ajuste",)
     )
 
     diferencia_material = st.number_input(
@@ -219,21 +675,20 @@ with tabs[2]:
         min_value=0.0,
         max_value=100.0,
         format="%.1f",
-        key="diferencia_material"
+        key="diferencia_material",
+        on_change=_refrescar_resumen,
+        args=("velocidad_ajuste",)
     )
 
     if all([num_trabajos, valor_hora_prensa, tiempo_ajuste_actual, diferencia_tiempo_ajuste,
             metros_material_actual, costo_material, diferencia_material]):
-        # Cálculos de tiempo
-        tiempo_ajuste_iflexo = tiempo_ajuste_actual - diferencia_tiempo_ajuste
-        tiempo_ahorrado = diferencia_tiempo_ajuste * num_trabajos
-        tiempo_ahorrado_horas = tiempo_ahorrado / 60  # Convertir a horas
-        ahorro_tiempo = (tiempo_ahorrado / 60) * valor_hora_prensa
-
-        # Cálculos de material
-        metros_material_iflexo = metros_material_actual * (1 - diferencia_material/100)
-        ahorro_material_metros = (metros_material_actual - metros_material_iflexo) * num_trabajos  # metros/año
-        ahorro_material = ahorro_material_metros * costo_material
+        r = grafo.valor('velocidad_ajuste')
+        tiempo_ajuste_iflexo = r['tiempo_ajuste_iflexo']
+        tiempo_ahorrado_horas = r['horas_ahorradas']
+        ahorro_tiempo = r['ahorro_tiempo']
+        metros_material_iflexo = r['metros_material_iflexo']
+        ahorro_material_metros = r['metros_ahorrados']  # metros/año
+        ahorro_material = r['ahorro_material']
 
         # Métricas
         st.metric("Tiempo promedio de ajuste de prensa con iFlexo", f"{tiempo_ajuste_iflexo:,.1f} minutos")
@@ -241,133 +696,164 @@ with tabs[2]:
         st.metric("Metros de material en ajuste de prensa con iFlexo", f"{metros_material_iflexo:,.1f} m")
         st.metric("Ahorro en desperdicio de material con iFlexo", f"{ahorro_material_metros:,.1f} metros/año")
         st.metric("Ahorro en costos con iFlexo", f"${(ahorro_tiempo + ahorro_material):,.1f} /año")
-
-        st.session_state.ahorros['velocidad_ajuste'] = ahorro_tiempo + ahorro_material
         st.plotly_chart(create_tiempo_paradas_comparison(tiempo_ajuste_actual, tiempo_ajuste_iflexo))
 
+with tabs[2]:
+    _pestana_ajuste()
+
 
 # Pestaña: Velocidad en Impresión
-with tabs[3]:
+@st.fragment(key="velocidad_impresion")
+@medido('pestana', pestana='impresion')
+def _pestana_impresion():
+    grafo.actualizar(_entradas_actuales())
     st.header("Cálculo de Velocidad en Impresión")
 
     tiempo_prensa = st.number_input(
         "Tiempo en prensa disponible (horas/año)",
         min_value=0.0,
         format="%.1f",
-        key="tiempo_prensa_impresion"
+        key="tiempo_prensa_impresion",
+        on_change=_refrescar_resumen,
+        args=("velocidad_impresion",)
     )
 
     valor_hora = st.number_input(
         "Valor de hora en prensa (/hora)",
         min_value=0.0,
         format="%.1f",
-        key="valor_hora_impresion"
+        key="valor_hora_impresion",
+        on_change=_refrescar_resumen,
+        args=("velocidad_impresion",)
     )
 
     velocidad_actual = st.number_input(
         "Velocidad actual (m/min)",
         min_value=0.0,
         format="%.1f",
-        key="velocidad_actual"
+        key="velocidad_actual",
+        on_change=_refrescar_resumen,
+        args=("velocidad_impresion",)
     )
 
     velocidad_iflexo = st.number_input(
         "Velocidad con iFlexo (m/min)",
         min_value=0.0,
         format="%.1f",
-        key="velocidad_iflexo"
+        key="velocidad_iflexo",
+        on_change=_refrescar_resumen,
+        args=("velocidad_impresion",)
     )
 
     if all([tiempo_prensa, valor_hora, velocidad_actual, velocidad_iflexo]):
-        mejora_velocidad = ((velocidad_iflexo - velocidad_actual) / velocidad_actual) * 100
-        ahorro_velocidad = tiempo_prensa * valor_hora * (mejora_velocidad / 100)
-        capacidad_adicional = (velocidad_iflexo - velocidad_actual) * tiempo_prensa * 60  # en metros
-        ahorro_tiempo = tiempo_prensa * (mejora_velocidad / 100)  # en horas
+        r = grafo.valor('velocidad_impresion')
+        mejora_velocidad = r['mejora_pct']
+        ahorro_velocidad = r['ahorro']
+        capacidad_adicional = r['capacidad_adicional']  # en metros
+        ahorro_tiempo = r['horas_ahorradas']  # en horas
 
         st.metric("Mejora en velocidad", f"{mejora_velocidad:.1f}%")
         st.metric("Capacidad adicional con iFlexo", f"{capacidad_adicional:,.1f} m/año")
         st.metric("Ahorro en tiempo con iFlexo", f"{ahorro_tiempo:,.1f} horas/año")
         st.metric("Ahorro estimado", f"${ahorro_velocidad:,.1f} /año")
-
-        st.session_state.ahorros['velocidad_impresion'] = ahorro_velocidad
         st.plotly_chart(create_velocidad_comparison(velocidad_actual, velocidad_iflexo))
 
+with tabs[3]:
+    _pestana_impresion()
+
 # Pestaña: Relación Plancha-Parada
-with tabs[4]:
+@st.fragment(key="plancha_parada")
+@medido('pestana', pestana='parada')
+def _pestana_parada():
+    grafo.actualizar(_entradas_actuales())
     st.header("Relación Plancha-Parada")
 
     num_trabajos_parada = st.number_input(
         "Número de trabajos (trabajos/año)",
         min_value=0,
         format="%d",
-        key="num_trabajos_parada"
+        key="num_trabajos_parada",
+        on_change=_refrescar_resumen,
+        args=("plancha_parada",)
     )
 
     valor_hora_parada = st.number_input(
         "Valor de hora en prensa (/hora)",
         min_value=0.0,
         format="%.1f",
-        key="valor_hora_parada"
+        key="valor_hora_parada",
+        on_change=_refrescar_resumen,
+        args=("plancha_parada",)
     )
 
     tiempo_parada = st.number_input(
         "Tiempo promedio por cada parada de prensa (minutos)",
         min_value=0,
         format="%d",
-        key="tiempo_parada"
+        key="tiempo_parada",
+        on_change=_refrescar_resumen,
+        args=("plancha_parada",)
     )
 
     paradas_actual = st.number_input(
         "Número de paradas promedio por trabajo actual",
         min_value=0.0,
         format="%.1f",
-        key="paradas_actual"
+        key="paradas_actual",
+        on_change=_refrescar_resumen,
+        args=("plancha_parada",)
     )
 
     paradas_iflexo = st.number_input(
         "Número de paradas promedio por trabajo con iFlexo",
         min_value=0.0,
         format="%.1f",
-        key="paradas_iflexo"
+        key="paradas_iflexo",
+        on_change=_refrescar_resumen,
+        args=("plancha_parada",)
     )
 
     if all([num_trabajos_parada, valor_hora_parada, tiempo_parada, paradas_actual, paradas_iflexo]):
-        tiempo_actual = tiempo_parada * paradas_actual * num_trabajos_parada
-        tiempo_iflexo = tiempo_parada * paradas_iflexo * num_trabajos_parada
-        diferencia_tiempo = tiempo_actual - tiempo_iflexo
-        diferencia_porcentual = ((paradas_actual - paradas_iflexo) / paradas_actual) * 100
-        ahorro_costos = (diferencia_tiempo / 60) * valor_hora_parada
-
-        # Convertir tiempos a horas para mostrar
-        tiempo_actual_horas = tiempo_actual / 60
-        tiempo_iflexo_horas = tiempo_iflexo / 60
-        diferencia_tiempo_horas = diferencia_tiempo / 60
+        r = grafo.valor('plancha_parada')
+        diferencia_porcentual = r['diferencia_pct']
+        ahorro_costos = r['ahorro']
+        tiempo_actual_horas = r['horas_actual']
+        tiempo_iflexo_horas = r['horas_iflexo']
+        diferencia_tiempo_horas = r['horas_ahorradas']
 
         st.metric("Diferencia de tiempo de ajuste de prensa con iFlexo", f"{diferencia_tiempo_horas:,.1f} horas/año")
         st.metric("Tiempo en paradas de prensa actuales", f"{tiempo_actual_horas:,.1f} horas/año")
         st.metric("Tiempo en paradas de prensa con iFlexo", f"{tiempo_iflexo_horas:,.1f} horas/año")
         st.metric("Diferencia con iFlexo", f"{diferencia_porcentual:.1f}%")
         st.metric("Ahorro en costos con iFlexo", f"${ahorro_costos:,.1f} /año")
-
-        st.session_state.ahorros['plancha_parada'] = ahorro_costos
         st.plotly_chart(create_tiempo_paradas_comparison(tiempo_actual_horas, tiempo_iflexo_horas))
 
+with tabs[4]:
+    _pestana_parada()
+
 # Pestaña: Ahorro en Tinta Blanca
-with tabs[5]:
+@st.fragment(key="tinta_blanca")
+@medido('pestana', pestana='tinta_blanca')
+def _pestana_tinta_blanca():
+    grafo.actualizar(_entradas_actuales())
     st.header("Ahorro en Tinta Blanca")
 
     consumo_tinta_blanca = st.number_input(
         "Actual consumo de tinta blanca (kg/año)",
         min_value=0.0,
         format="%.1f",
-        key="consumo_tinta_blanca"
+        key="consumo_tinta_blanca",
+        on_change=_refrescar_resumen,
+        args=("tinta_blanca",)
     )
 
     costo_tinta_blanca = st.number_input(
         "Costo de tinta blanca (/kg)",
         min_value=0.0,
         format="%.1f",
-        key="costo_tinta_blanca"
+        key="costo_tinta_blanca",
+        on_change=_refrescar_resumen,
+        args=("tinta_blanca",)
     )
 
     reduccion_consumo_blanca = st.number_input(
@@ -375,36 +861,48 @@ with tabs[5]:
         min_value=0.0,
         max_value=100.0,
         format="%.1f",
-        key="reduccion_consumo_blanca"
+        key="reduccion_consumo_blanca",
+        on_change=_refrescar_resumen,
+        args=("tinta_blanca",)
     )
 
     if all([consumo_tinta_blanca, costo_tinta_blanca, reduccion_consumo_blanca]):
-        gasto_actual = consumo_tinta_blanca * costo_tinta_blanca
-        ahorro_tinta_blanca = gasto_actual * (reduccion_consumo_blanca / 100)
-        ahorro_kg_blanca = consumo_tinta_blanca * (reduccion_consumo_blanca / 100)
+        r = grafo.valor('tinta_blanca')
+        gasto_actual = r['gasto_actual']
+        ahorro_tinta_blanca = r['ahorro']
+        ahorro_kg_blanca = r['kg_ahorrados']
 
         st.metric("Gasto actual en tinta blanca", f"${gasto_actual:,.1f} /año")
         st.metric("Ahorro en tinta blanca con iFlexo", f"${ahorro_tinta_blanca:,.1f} /año")
         st.metric("Ahorro en tinta blanca con iFlexo", f"{ahorro_kg_blanca:,.1f} kg/año")
-        st.session_state.ahorros['tinta_blanca'] = ahorro_tinta_blanca
         st.plotly_chart(create_tinta_comparison(consumo_tinta_blanca, ahorro_kg_blanca, "blanca"))
 
+with tabs[5]:
+    _pestana_tinta_blanca()
+
 # Pestaña: Ahorro en Tintas
-with tabs[6]:
+@st.fragment(key="tintas")
+@medido('pestana', pestana='tintas')
+def _pestana_tintas():
+    grafo.actualizar(_entradas_actuales())
     st.header("Ahorro en Tintas")
 
     consumo_tinta = st.number_input(
         "Actual consumo de tinta no blanca (kg/año)",
         min_value=0.0,
         format="%.1f",
-        key="consumo_tinta"
+        key="consumo_tinta",
+        on_change=_refrescar_resumen,
+        args=("tintas",)
     )
 
     costo_tinta = st.number_input(
         "Promedio costo de tinta (/kg)",
         min_value=0.0,
         format="%.1f",
-        key="costo_tinta"
+        key="costo_tinta",
+        on_change=_refrescar_resumen,
+        args=("tintas",)
     )
 
     reduccion_consumo = st.number_input(
@@ -412,16 +910,39 @@ with tabs[6]:
         min_value=0.0,
         max_value=100.0,
         format="%.1f",
-        key="reduccion_consumo"
+        key="reduccion_consumo",
+        on_change=_refrescar_resumen,
+        args=("tintas",)
     )
 
     if all([consumo_tinta, costo_tinta, reduccion_consumo]):
-        gasto_actual = consumo_tinta * costo_tinta
-        ahorro_tintas = gasto_actual * (reduccion_consumo / 100)
-        ahorro_kg_tintas = consumo_tinta * (reduccion_consumo / 100)
+        r = grafo.valor('tintas')
+        gasto_actual = r['gasto_actual']
+        ahorro_tintas = r['ahorro']
+        ahorro_kg_tintas = r['kg_ahorrados']
 
         st.metric("Gasto actual en tintas", f"${gasto_actual:,.1f} /año")
         st.metric("Ahorro en tintas con iFlexo", f"${ahorro_tintas:,.1f} /año")
         st.metric("Ahorro en tinta no blanca con iFlexo", f"{ahorro_kg_tintas:,.1f} kg/año")
-        st.session_state.ahorros['tintas'] = ahorro_tintas
         st.plotly_chart(create_tinta_comparison(consumo_tinta, ahorro_kg_tintas, "no blanca"))
+
+with tabs[6]:
+    _pestana_tintas()
+
+# Tiempo de la ejecución para verificar la latencia por interacción. Es un fragmento
+# para que también lo actualicen las ejecuciones de fragmentos de las entradas
+@st.fragment(key="rendimiento")
+def _rendimiento():
+    st.session_state.tiempo_rerun = time.perf_counter() - st.session_state.inicio_rerun
+    observar('rerun', st.session_state.tiempo_rerun)
+    cache = estadisticas_cache()
+    st.caption(
+        f"Última ejecución: {st.session_state.tiempo_rerun * 1000:.1f} ms · "
+        f"nodos recalculados: {', '.join(grafo.recalculados) or 'ninguno'} · "
+        f"caché de gráficos: {cache['aciertos']} aciertos, {cache['fallos']} fallos, {cache['entradas']} figuras"
+    )
+    # Lo recalculado desde la última vez que se mostró, incluido el callback de la interacción
+    grafo.recalculados.clear()
+
+with st.sidebar:
+    _rendimiento()
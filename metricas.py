@@ -0,0 +1,291 @@
+"""Instrumentación de los caminos críticos: tramos con tiempo, histogramas y contadores.
+
+Cada tramo medido suma su duración a un histograma de límites fijos, así
+que registrar una medición es un acceso a diccionario y una búsqueda
+binaria bajo un lock. Los datos se exponen en formato de texto de
+Prometheus y, opcionalmente, como trazas JSONL con una línea por tramo.
+
+Variables de entorno:
+    IFLEXO_TRAZAS            archivo JSONL donde agregar una línea por tramo
+    IFLEXO_METRICAS_PUERTO   puerto del endpoint /metrics de la app (main.py)
+"""
+import gc
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+PREFIJO = 'iflexo'
+
+# Límites superiores de los buckets de duración, en segundos
+LIMITES_SEGUNDOS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# (nombre, tipo, ayuda, [(etiquetas, valor)]) que devuelve un colector al exportar
+Familia = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+class _Histograma:
+    __slots__ = ('cuentas', 'suma', 'total')
+
+    def __init__(self, buckets: int):
+        self.cuentas = [0] * buckets
+        self.suma = 0.0
+        self.total = 0
+
+
+class _Tramo:
+    """Context manager de un tramo medido; la duración se registra aunque haya una excepción."""
+
+    __slots__ = ('_registro', '_nombre', '_etiquetas', '_inicio', '_inicio_epoca', '_id', '_padre')
+
+    def __init__(self, registro: 'RegistroMetricas', nombre: str, etiquetas: Dict[str, str]):
+        self._registro = registro
+        self._nombre = nombre
+        self._etiquetas = etiquetas
+
+    def __enter__(self):
+        if self._registro._trazas is not None:
+            self._registro._abrir_traza(self)
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excepcion):
+        segundos = time.perf_counter() - self._inicio
+        self._registro.observar(self._nombre, segundos, **self._etiquetas)
+        if self._registro._trazas is not None:
+            self._registro._cerrar_traza(self, segundos)
+        return False
+
+
+class RegistroMetricas:
+    """Histogramas de duración por tramo y etiquetas, contadores y colectores.
+
+    Los colectores son funciones que devuelven familias ya calculadas (por
+    ejemplo, los contadores del caché de gráficos) y solo se llaman al
+    exportar, así que no agregan costo al camino medido.
+    """
+
+    def __init__(self, trazas: Optional[str] = None, limites: Sequence[float] = LIMITES_SEGUNDOS):
+        self.limites = tuple(limites)
+        self._lock = threading.Lock()
+        self._histogramas: Dict[Tuple[str, tuple], _Histograma] = {}
+        self._contadores: Dict[Tuple[str, tuple], float] = {}
+        self._colectores: List[Callable[[], Iterable[Familia]]] = []
+        self._trazas = None
+        self._ids = itertools.count(1)
+        self._pila = threading.local()
+        if trazas:
+            self.activar_trazas(trazas)
+
+    def observar(self, tramo: str, segundos: float, **etiquetas) -> None:
+        """Suma una duración al histograma del tramo; sirve para tiempos medidos en otro proceso."""
+        clave = (tramo, tuple(sorted(etiquetas.items())))
+        with self._lock:
+            histograma = self._histogramas.get(clave)
+            if histograma is None:
+                histograma = self._histogramas[clave] = _Histograma(len(self.limites) + 1)
+            histograma.cuentas[bisect_left(self.limites, segundos)] += 1
+            histograma.suma += segundos
+            histograma.total += 1
+
+    def contar(self, nombre: str, cantidad: float = 1, **etiquetas) -> None:
+        clave = (nombre, tuple(sorted(etiquetas.items())))
+        with self._lock:
+            self._contadores[clave] = self._contadores.get(clave, 0) + cantidad
+
+    def tramo(self, nombre: str, **etiquetas) -> _Tramo:
+        """Mide el bloque `with` como un tramo con las etiquetas dadas."""
+        return _Tramo(self, nombre, etiquetas)
+
+    def medido(self, nombre: str, **etiquetas) -> Callable:
+        """Decorador que mide cada llamada a la función como un tramo."""
+        def decorador(funcion):
+            @wraps(funcion)
+            def envoltura(*args, **kwargs):
+                with _Tramo(self, nombre, etiquetas):
+                    return funcion(*args, **kwargs)
+            return envoltura
+        return decorador
+
+    def colector(self, funcion: Callable[[], Iterable[Familia]]) -> Callable[[], Iterable[Familia]]:
+        """Registra una función que devuelve familias de métricas al exportar; se puede usar como decorador."""
+        with self._lock:
+            self._colectores.append(funcion)
+        return funcion
+
+    def activar_trazas(self, ruta: str) -> None:
+        """Agrega una línea JSON por tramo a `ruta`.
+
+        Cada línea se escribe con una sola llamada en modo append, así que
+        varios procesos (por ejemplo, los workers de PDF) pueden compartir el archivo.
+        """
+        self._trazas = os.open(ruta, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def desactivar_trazas(self) -> None:
+        if self._trazas is not None:
+            os.close(self._trazas)
+            self._trazas = None
+
+    def _abrir_traza(self, tramo: _Tramo) -> None:
+        pila = self._pila.__dict__.setdefault('tramos', [])
+        tramo._id = next(self._ids)
+        tramo._padre = pila[-1] if pila else None
+        tramo._inicio_epoca = time.time()
+        pila.append(tramo._id)
+
+    def _cerrar_traza(self, tramo: _Tramo, segundos: float) -> None:
+        pila = self._pila.tramos
+        if pila and pila[-1] == tramo._id:
+            pila.pop()
+        linea = json.dumps({
+            'tramo': tramo._nombre,
+            **tramo._etiquetas,
+            'inicio': tramo._inicio_epoca,
+            'duracion_ms': segundos * 1000,
+            'id': tramo._id,
+            'padre': tramo._padre,
+            'pid': os.getpid(),
+            'hilo': threading.get_ident(),
+        }, default=str)
+        trazas = self._trazas
+        if trazas is not None:
+            os.write(trazas, (linea + '\n').encode('utf-8'))
+
+    def histogramas(self) -> Dict[Tuple[str, tuple], Dict]:
+        """Copia de los histogramas: cuentas por bucket (no acumuladas), suma y total."""
+        with self._lock:
+            return {
+                clave: {'cuentas': list(h.cuentas), 'suma': h.suma, 'total': h.total}
+                for clave, h in self._histogramas.items()
+            }
+
+    def contadores(self) -> Dict[Tuple[str, tuple], float]:
+        with self._lock:
+            return dict(self._contadores)
+
+    def reiniciar(self) -> None:
+        with self._lock:
+            self._histogramas.clear()
+            self._contadores.clear()
+
+    def texto_prometheus(self) -> str:
+        """Todas las métricas en el formato de texto de Prometheus (versión 0.0.4)."""
+        lineas = []
+        nombre = f"{PREFIJO}_tramo_segundos"
+        histogramas = self.histogramas()
+        if histogramas:
+            lineas.append(f"# HELP {nombre} Duración de los tramos instrumentados.")
+            lineas.append(f"# TYPE {nombre} histogram")
+        for (tramo, etiquetas), h in sorted(histogramas.items()):
+            base = {'tramo': tramo, **dict(etiquetas)}
+            acumulado = 0
+            for limite, cuenta in zip(self.limites + (float('inf'),), h['cuentas']):
+                acumulado += cuenta
+                lineas.append(f"{nombre}_bucket{_etiquetas({**base, 'le': _numero(limite)})} {acumulado}")
+            lineas.append(f"{nombre}_sum{_etiquetas(base)} {_numero(h['suma'])}")
+            lineas.append(f"{nombre}_count{_etiquetas(base)} {h['total']}")
+
+        familias: Dict[str, List[Tuple[Dict[str, str], float]]] = {}
+        for (contador, etiquetas), valor in sorted(self.contadores().items()):
+            familias.setdefault(contador, []).append((dict(etiquetas), valor))
+        for contador, muestras in familias.items():
+            lineas.extend(_familia((f"{PREFIJO}_{contador}_total", 'counter', f"Eventos {contador}.", muestras)))
+
+        with self._lock:
+            colectores = list(self._colectores)
+        for colector in colectores:
+            for familia in colector():
+                lineas.extend(_familia(familia))
+        return '\n'.join(lineas) + '\n'
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _etiquetas(etiquetas: Dict) -> str:
+    if not etiquetas:
+        return ''
+    return '{' + ','.join(f'{k}="{_escapar(v)}"' for k, v in etiquetas.items()) + '}'
+
+
+def _numero(valor: float) -> str:
+    if valor == float('inf'):
+        return '+Inf'
+    if float(valor).is_integer():
+        return str(int(valor))
+    return repr(float(valor))
+
+
+def _familia(familia: Familia) -> List[str]:
+    nombre, tipo, ayuda, muestras = familia
+    lineas = [f"# HELP {nombre} {ayuda}", f"# TYPE {nombre} {tipo}"]
+    lineas.extend(f"{nombre}{_etiquetas(etiquetas)} {_numero(valor)}" for etiquetas, valor in muestras)
+    return lineas
+
+
+# Registro del proceso; las trazas se activan con IFLEXO_TRAZAS
+METRICAS = RegistroMetricas(trazas=os.environ.get('IFLEXO_TRAZAS'))
+tramo = METRICAS.tramo
+medido = METRICAS.medido
+observar = METRICAS.observar
+contar = METRICAS.contar
+colector = METRICAS.colector
+
+
+def iniciar_servidor(puerto: int, direccion: str = '0.0.0.0',
+                     registro: RegistroMetricas = METRICAS) -> 'ThreadingHTTPServer':
+    """Sirve GET /metrics en un hilo de fondo y devuelve el servidor (para cerrarlo con shutdown())."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Manejador(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            cuerpo = registro.texto_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer((direccion, puerto), Manejador)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, name='metricas', daemon=True).start()
+    return servidor
+
+
+def memoria_proceso(campo: str = 'VmRSS') -> int:
+    """Bytes de un campo de /proc/self/status (VmRSS, VmHWM...); OSError fuera de Linux."""
+    with open('/proc/self/status') as f:
+        for linea in f:
+            if linea.startswith(campo + ':'):
+                return int(linea.split()[1]) * 1024
+    raise OSError(f"{campo} no disponible")
+
+
+def liberar_memoria() -> None:
+    """Junta la basura y devuelve al sistema la memoria libre de pyarrow y de glibc antes de medir."""
+    import ctypes
+
+    gc.collect()
+    pa = sys.modules.get('pyarrow')
+    if pa is not None:
+        pa.default_memory_pool().release_unused()
+    try:
+        # Devuelve al sistema la memoria libre que glibc retiene, para que el pico sea de esta ejecución
+        ctypes.CDLL(None).malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
@@ -3,36 +3,102 @@ from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+from pypdf import PdfReader
+from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject, PdfObject
+from array import array
+from collections import deque
+from contextlib import closing
 from io import BytesIO
-from typing import Dict
-import streamlit as st
+from functools import lru_cache
+import copy
+import math
+import os
+import sqlite3
+import tempfile
+from graficos_pdf import graficos_reporte
+from metricas import medido
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
-def generate_pdf_report(ahorros: Dict[str, float], datos_entrada: Dict) -> BytesIO:
-    """Genera un reporte PDF con los resultados del análisis."""
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    story = []
-    styles = getSampleStyleSheet()
+LOGO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "attached_assets", "iflexo6-sm-kit.jpg")
+# Ancho en píxeles del logo embebido: se dibuja a 150 pt, así que alcanza para ~4x
+LOGO_ANCHO_PX = 600
+# Páginas del consolidado que se arman en memoria antes de volcarlas al archivo final
+PAGINAS_POR_PARTE = 500
 
-    # Logo
-    logo = Image("attached_assets/iflexo6-sm-kit.jpg", width=150, height=50)
-    story.append(logo)
-    story.append(Spacer(1, 12))
+IFLEXO_TEXT = """
+    Si bien el costo por cm² de nuestras planchas puede ser superior al de la competencia, 
+    este análisis demuestra cómo la calidad superior y la tecnología avanzada de iFlexo 
+    generan ahorros significativos en otras áreas críticas de su operación:
 
-    # Título
+    • Reducción en tiempos de ajuste y setup
+    • Mayor velocidad de impresión
+    • Menor desperdicio de material
+    • Reducción en el consumo de tintas
+    • Menor tiempo de paradas no programadas
+
+    La inversión en planchas iFlexo se recupera rápidamente a través de estas eficiencias 
+    operativas, resultando en un beneficio neto positivo para su operación.
+    """
+
+@lru_cache(maxsize=1)
+@medido('logo', origen='pdf')
+def _logo_bytes() -> bytes:
+    """Logo reducido y recodificado una sola vez por proceso."""
+    from PIL import Image as PILImage
+
+    with PILImage.open(LOGO_PATH) as imagen:
+        imagen = imagen.convert('RGB')
+        if imagen.width > LOGO_ANCHO_PX:
+            alto = round(imagen.height * LOGO_ANCHO_PX / imagen.width)
+            imagen = imagen.resize((LOGO_ANCHO_PX, alto))
+        buffer = BytesIO()
+        imagen.save(buffer, format='JPEG', quality=90)
+        return buffer.getvalue()
+
+@lru_cache(maxsize=1)
+def _recursos() -> Dict:
+    """Estilos, estilos de tabla y textos fijos, preparados una sola vez por proceso."""
+    styles = getSampleStyleSheet()
     title_style = ParagraphStyle(
         'CustomTitle',
         parent=styles['Heading1'],
         fontSize=20,
         spaceAfter=30
     )
-    story.append(Paragraph("Reporte de Análisis de Eficiencia en Costos", title_style))
-    story.append(Spacer(1, 12))
-
-    # Resumen de Ahorros
-    story.append(Paragraph("Resumen de Ahorros", styles['Heading2']))
+    return {
+        'styles': styles,
+        'tabla_ahorros': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 14),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
+            ('TEXTCOLOR', (0, -1), (-1, -1), colors.black),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, -1), (-1, -1), 12),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]),
+        'tabla_proyeccion': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]),
+        'titulo': Paragraph("Reporte de Análisis de Eficiencia en Costos", title_style),
+        'resumen': Paragraph("Resumen de Ahorros", styles['Heading2']),
+        'solucion': Paragraph("Solución iFlexo", styles['Heading2']),
+        'iflexo': Paragraph(IFLEXO_TEXT, styles['Normal']),
+        'proyeccion': Paragraph("Proyección de Inversión", styles['Heading2']),
+    }
 
-    data = [
+def _filas_ahorros(ahorros: Dict[str, float]) -> List[List[str]]:
+    return [
         ["Categoría", "Ahorro Anual"],
         ["Costo de Planchas", f"${ahorros['planchas']:,.1f}"],
         ["Velocidad de Ajuste", f"${ahorros['velocidad_ajuste']:,.1f}"],
@@ -43,45 +109,83 @@ def generate_pdf_report(ahorros: Dict[str, float], datos_entrada: Dict) -> Bytes
         ["Total", f"${sum(ahorros.values()):,.1f}"]
     ]
 
-    table = Table(data, colWidths=[4*inch, 2*inch])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 14),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
-        ('TEXTCOLOR', (0, -1), (-1, -1), colors.black),
-        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, -1), (-1, -1), 12),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
+def preparar_recursos():
+    """Prepara el logo y los estilos del proceso; útil al iniciar un worker."""
+    _logo_bytes()
+    _recursos()
+
+def _fijo(recursos: Dict, nombre: str) -> Paragraph:
+    # Copia superficial: comparte el texto ya procesado pero no el estado de maquetado
+    return copy.copy(recursos[nombre])
+
+@medido('pdf', reporte='individual')
+def generate_pdf_report(ahorros: Dict[str, float], datos_entrada: Dict,
+                        proyeccion: Optional[Dict] = None) -> BytesIO:
+    """Genera un reporte PDF con los resultados del análisis.
+
+    `proyeccion` agrega la tabla multianual con 'flujos', 'inversion',
+    'tasa_descuento', 'van', 'tir' y 'mes_recuperacion'.
+    """
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    story = []
+    recursos = _recursos()
+    styles = recursos['styles']
+
+    # Logo
+    logo = Image(BytesIO(_logo_bytes()), width=150, height=50)
+    story.append(logo)
+    story.append(Spacer(1, 12))
+
+    # Título
+    story.append(_fijo(recursos, 'titulo'))
+    story.append(Spacer(1, 12))
+
+    # Resumen de Ahorros
+    story.append(_fijo(recursos, 'resumen'))
+
+    table = Table(_filas_ahorros(ahorros), colWidths=[4*inch, 2*inch])
+    table.setStyle(recursos['tabla_ahorros'])
 
     story.append(table)
     story.append(Spacer(1, 20))
 
-    # Descripción de iFlexo
-    story.append(Paragraph("Solución iFlexo", styles['Heading2']))
-    iflexo_text = """
-    Si bien el costo por cm² de nuestras planchas puede ser superior al de la competencia, 
-    este análisis demuestra cómo la calidad superior y la tecnología avanzada de iFlexo 
-    generan ahorros significativos en otras áreas críticas de su operación:
-
-    • Reducción en tiempos de ajuste y setup
-    • Mayor velocidad de impresión
-    • Menor desperdicio de material
-    • Reducción en el consumo de tintas
-    • Menor tiempo de paradas no programadas
+    # Gráficos vectoriales, compartidos entre reportes con los mismos datos
+    for grafico in graficos_reporte(ahorros, datos_entrada):
+        story.append(grafico)
+        story.append(Spacer(1, 12))
 
-    La inversión en planchas iFlexo se recupera rápidamente a través de estas eficiencias 
-    operativas, resultando en un beneficio neto positivo para su operación.
-    """
-    story.append(Paragraph(iflexo_text, styles['Normal']))
+    # Descripción de iFlexo
+    story.append(_fijo(recursos, 'solucion'))
+    story.append(_fijo(recursos, 'iflexo'))
     story.append(Spacer(1, 12))
 
     # Conclusión persuasiva
-    story.append(Paragraph("Proyección de Inversión", styles['Heading2']))
+    story.append(_fijo(recursos, 'proyeccion'))
+
+    if proyeccion:
+        data = [["Año", "Ahorro Proyectado", "Flujo Neto Acumulado"]]
+        acumulado = -proyeccion['inversion']
+        for i, flujo in enumerate(proyeccion['flujos'], start=1):
+            acumulado += flujo
+            data.append([str(i), f"${flujo:,.1f}", f"${acumulado:,.1f}"])
+
+        table = Table(data, colWidths=[1*inch, 2.5*inch, 2.5*inch])
+        table.setStyle(recursos['tabla_proyeccion'])
+        story.append(table)
+        story.append(Spacer(1, 12))
+
+        tir = proyeccion['tir']
+        mes = proyeccion['mes_recuperacion']
+        resumen_text = f"""
+        Inversión inicial: ${proyeccion['inversion']:,.1f}<br/>
+        Valor actual neto (tasa de descuento {proyeccion['tasa_descuento'] * 100:.1f}%): ${proyeccion['van']:,.1f}<br/>
+        Tasa interna de retorno: {"no aplica" if math.isnan(tir) else f"{tir * 100:.1f}%"}<br/>
+        Recuperación de la inversión: {"fuera del horizonte" if math.isnan(mes) else f"mes {int(mes)}"}
+        """
+        story.append(Paragraph(resumen_text, styles['Normal']))
+        story.append(Spacer(1, 12))
+
     ahorro_total = sum(ahorros.values())
     conclusion_text = f"""
     Con un ahorro anual proyectado de ${ahorro_total:,.1f}, imagine cómo esta 
@@ -99,3 +203,222 @@ def generate_pdf_report(ahorros: Dict[str, float], datos_entrada: Dict) -> Bytes
     doc.build(story)
     buffer.seek(0)
     return buffer
+
+def _dibujar_tabla(lienzo: canvas.Canvas, data: List[List[str]], estilo: TableStyle,
+                   anchos: List[float], y: float) -> float:
+    """Dibuja una tabla centrada con su borde superior en `y` y devuelve dónde termina."""
+    table = Table(data, colWidths=anchos)
+    table.setStyle(estilo)
+    ancho, alto = table.wrapOn(lienzo, sum(anchos), y)
+    table.drawOn(lienzo, (letter[0] - ancho) / 2, y - alto)
+    return y - alto
+
+def _encabezado(lienzo: canvas.Canvas, titulo: str) -> float:
+    alto = letter[1]
+    lienzo.doForm('logo')
+    lienzo.setFont('Helvetica-Bold', 16)
+    lienzo.drawString(inch, alto - inch - 64, titulo)
+    return alto - inch - 84
+
+def _renumerar(valor: PdfObject, numero: Callable[[int], int]) -> PdfObject:
+    """Cambia en el lugar cada referencia de `valor` por la referencia `numero(idnum)` de la unión."""
+    if isinstance(valor, IndirectObject):
+        return IndirectObject(numero(valor.idnum), 0, None)
+    if isinstance(valor, DictionaryObject):
+        for clave, hijo in list(valor.items()):
+            valor[clave] = _renumerar(hijo, numero)
+    elif isinstance(valor, ArrayObject):
+        for indice, hijo in enumerate(valor):
+            valor[indice] = _renumerar(hijo, numero)
+    return valor
+
+
+class _UnionPDF:
+    """Concatena en `salida` PDF generados por ReportLab a medida que llegan.
+
+    pypdf lee cada parte y serializa sus objetos; de cada parte se copian solo
+    los objetos que alcanzan sus páginas, renumerados, y todas las páginas
+    cuelgan de un único árbol. No se usa `PdfWriter`, que guarda en memoria
+    todos los objetos hasta escribir: aquí cada objeto se escribe apenas se
+    copia y solo quedan en memoria la posición de cada objeto escrito y el
+    número de cada página, unos bytes por objeto.
+    """
+
+    def __init__(self, salida):
+        self._salida = salida
+        # Objetos 1 (catálogo) y 2 (árbol de páginas): se escriben al cerrar
+        self._posiciones = array('Q', [0, 0])
+        self._paginas = array('Q')
+        self._escritos = 0
+        self._escribir(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    def _escribir(self, datos: bytes) -> None:
+        self._salida.write(datos)
+        self._escritos += len(datos)
+
+    def agregar(self, datos: bytes) -> None:
+        """Agrega las páginas de un PDF completo."""
+        lector = PdfReader(BytesIO(datos), strict=True)
+        numeros: Dict[int, int] = {}
+        pendientes = deque()
+
+        def numero(idnum: int) -> int:
+            if idnum not in numeros:
+                self._posiciones.append(0)
+                numeros[idnum] = len(self._posiciones)
+                pendientes.append(idnum)
+            return numeros[idnum]
+
+        for pagina in lector.pages:
+            self._paginas.append(numero(pagina.indirect_reference.idnum))
+            while pendientes:
+                idnum = pendientes.popleft()
+                objeto = lector.get_object(idnum)
+                if isinstance(objeto, DictionaryObject) and objeto.get('/Type') == '/Page':
+                    # El árbol de páginas de la parte no se copia: la página cuelga del árbol único
+                    objeto[NameObject('/Parent')] = IndirectObject(2, 0, None)
+                _renumerar(objeto, numero)
+                cuerpo = BytesIO()
+                objeto.write_to_stream(cuerpo)
+                self._posiciones[numeros[idnum] - 1] = self._escritos
+                self._escribir(b'%d 0 obj\n' % numeros[idnum] + cuerpo.getvalue() + b'\nendobj\n')
+
+    def cerrar(self) -> None:
+        """Escribe el árbol de páginas, el catálogo, la tabla xref y el trailer."""
+        self._posiciones[1] = self._escritos
+        self._escribir(b'2 0 obj\n<< /Type /Pages /Count %d /Kids [' % len(self._paginas))
+        for inicio in range(0, len(self._paginas), 1000):
+            self._escribir(b''.join(b' %d 0 R' % n for n in self._paginas[inicio:inicio + 1000]))
+        self._escribir(b' ] >>\nendobj\n')
+        self._posiciones[0] = self._escritos
+        self._escribir(b'1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\n')
+        inicio_xref = self._escritos
+        self._escribir(b'xref\n0 %d\n0000000000 65535 f \n' % (len(self._posiciones) + 1))
+        for inicio in range(0, len(self._posiciones), 1000):
+            self._escribir(b''.join(b'%010d 00000 n \n' % p for p in self._posiciones[inicio:inicio + 1000]))
+        self._escribir(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+                       % (len(self._posiciones) + 1, inicio_xref))
+
+
+class _LienzoPorPartes:
+    """Lienzo que cada `paginas_por_parte` páginas guarda la parte en `carpeta` y la pasa a la unión.
+
+    ReportLab guarda en memoria todas las páginas de un lienzo hasta `save()`;
+    con partes acotadas la memoria no crece con la cantidad de páginas.
+    """
+
+    def __init__(self, carpeta: str, union: _UnionPDF, paginas_por_parte: int):
+        self._ruta = os.path.join(carpeta, 'parte.pdf')
+        self._union = union
+        self._paginas_por_parte = paginas_por_parte
+        self._lienzo = None
+        self._paginas = 0
+
+    def pagina(self) -> canvas.Canvas:
+        """Lienzo en el que dibujar la página actual."""
+        if self._lienzo is None:
+            self._lienzo = canvas.Canvas(self._ruta, pagesize=letter, pageCompression=1)
+            # El logo se dibuja una sola vez por parte como XObject y cada página lo referencia
+            self._lienzo.beginForm('logo')
+            self._lienzo.drawImage(ImageReader(BytesIO(_logo_bytes())), inch, letter[1] - inch - 36,
+                                   width=108, height=36)
+            self._lienzo.endForm()
+            self._paginas = 0
+        return self._lienzo
+
+    def terminar_pagina(self) -> None:
+        self._lienzo.showPage()
+        self._paginas += 1
+        if self._paginas == self._paginas_por_parte:
+            self._guardar_parte()
+
+    def _guardar_parte(self) -> None:
+        self._lienzo.save()
+        self._lienzo = None
+        with open(self._ruta, 'rb') as parte:
+            self._union.agregar(parte.read())
+
+    def cerrar(self) -> None:
+        if self._lienzo is not None:
+            self._guardar_parte()
+        self._union.cerrar()
+
+
+@medido('pdf', reporte='consolidado')
+def generate_consolidated_report(clientes: Callable[[], Iterable[Tuple[str, Dict[str, float]]]],
+                                 destino, filas_por_pagina: int = 40,
+                                 paginas_por_parte: int = PAGINAS_POR_PARTE) -> int:
+    """Genera un PDF consolidado: resumen, ranking por ahorro total y una página por cliente.
+
+    `clientes` devuelve un iterador nuevo de pares (cliente, ahorros) cada vez
+    que se llama; se recorre dos veces, una para ordenar y otra para dibujar.
+    El ranking se ordena en una base SQLite temporal y las páginas se dibujan
+    en partes de `paginas_por_parte` páginas que se concatenan en `destino`
+    (ruta o stream binario), así que la memoria no crece con la cantidad de
+    clientes. Devuelve la cantidad de clientes incluidos.
+    """
+    recursos = _recursos()
+
+    with tempfile.TemporaryDirectory() as carpeta, \
+            closing(sqlite3.connect(os.path.join(carpeta, 'ranking.db'))) as ranking:
+        # Primera pasada: totales por categoría y ahorro total de cada cliente, a disco para el ranking
+        ranking.execute("CREATE TABLE ranking (fila INTEGER PRIMARY KEY, cliente TEXT, total REAL)")
+        cantidad = 0
+        categorias = None
+        filas = []
+        for cliente, ahorros in clientes():
+            filas.append((cantidad, str(cliente), sum(ahorros.values())))
+            cantidad += 1
+            if categorias is None:
+                categorias = dict.fromkeys(ahorros, 0.0)
+            for clave, valor in ahorros.items():
+                categorias[clave] += valor
+            if len(filas) == 10_000:
+                ranking.executemany("INSERT INTO ranking VALUES (?, ?, ?)", filas)
+                filas = []
+        ranking.executemany("INSERT INTO ranking VALUES (?, ?, ?)", filas)
+        # Con el índice el ranking se recorre ordenado sin ordenar todo en memoria
+        ranking.execute("CREATE INDEX ranking_total ON ranking (total DESC, fila)")
+
+        salida = destino if hasattr(destino, 'write') else open(destino, 'wb')
+        try:
+            lienzos = _LienzoPorPartes(carpeta, _UnionPDF(salida), paginas_por_parte)
+
+            # Resumen consolidado
+            lienzo = lienzos.pagina()
+            y = _encabezado(lienzo, "Reporte Consolidado de Eficiencia en Costos")
+            lienzo.setFont('Helvetica', 11)
+            lienzo.drawString(inch, y, f"Clientes incluidos: {cantidad:,}")
+            if categorias is not None:
+                _dibujar_tabla(lienzo, _filas_ahorros(categorias), recursos['tabla_ahorros'],
+                               [4*inch, 2*inch], y - 20)
+            lienzos.terminar_pagina()
+
+            # Ranking de clientes, paginado
+            paginas_indice = 1 + math.ceil(cantidad / filas_por_pagina)
+            anchos = [0.8*inch, 3.2*inch, 1.6*inch, 0.8*inch]
+            ordenados = ranking.execute("SELECT fila, cliente, total FROM ranking ORDER BY total DESC, fila")
+            for inicio in range(0, cantidad, filas_por_pagina):
+                lienzo = lienzos.pagina()
+                y = _encabezado(lienzo, "Clientes por Ahorro Total Anual")
+                data = [["#", "Cliente", "Ahorro Total", "Página"]]
+                for posicion, (fila, cliente, total) in enumerate(ordenados.fetchmany(filas_por_pagina), inicio):
+                    # SQLite guarda NaN como NULL, que en orden descendente queda al final como en numpy
+                    total = math.nan if total is None else total
+                    data.append([str(posicion + 1), cliente, f"${total:,.1f}", str(paginas_indice + fila + 1)])
+                _dibujar_tabla(lienzo, data, recursos['tabla_proyeccion'], anchos, y)
+                lienzos.terminar_pagina()
+
+            # Segunda pasada: una página por cliente, en el orden del archivo
+            incluidos = 0
+            for cliente, ahorros in clientes():
+                lienzo = lienzos.pagina()
+                y = _encabezado(lienzo, f"Cliente: {cliente}")
+                _dibujar_tabla(lienzo, _filas_ahorros(ahorros), recursos['tabla_ahorros'], [4*inch, 2*inch], y)
+                lienzos.terminar_pagina()
+                incluidos += 1
+            lienzos.cerrar()
+        finally:
+            if salida is not destino:
+                salida.close()
+    return incluidos
@@ -0,0 +1,122 @@
+"""Perfil de importación del arranque de la app.
+
+Importa en un proceso nuevo, después de streamlit, los módulos que main.py
+importa al cargarse y mide cuánto tardan, con el detalle de
+`python -X importtime`. Termina con error si el arranque supera el
+presupuesto o si se carga alguna dependencia que debe quedar diferida.
+
+Uso:
+    python perfil_arranque.py --presupuesto 250
+"""
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+# Milisegundos permitidos para importar los módulos de la app, sin contar streamlit
+PRESUPUESTO_MS = 250
+
+# Dependencias pesadas que se importan solo donde se usan
+DIFERIDOS = ('pandas', 'pyarrow', 'plotly.express', 'reportlab', 'openpyxl')
+
+_MARCA = "-- modulos de la app --"
+
+_PROGRAMA = """
+import json, sys, time
+import streamlit
+sys.stderr.write({marca!r} + "\\n")
+inicio = time.perf_counter()
+for modulo in {modulos!r}:
+    __import__(modulo)
+fin = time.perf_counter()
+print(json.dumps({{
+    'ms': (fin - inicio) * 1000,
+    'diferidos': [m for m in {diferidos!r} if m in sys.modules],
+}}))
+"""
+
+
+def modulos_arranque(script: str = 'main.py') -> List[str]:
+    """Módulos del proyecto que `script` importa en su nivel superior."""
+    with open(os.path.join(RAIZ, script), encoding='utf-8') as f:
+        arbol = ast.parse(f.read())
+    locales = {archivo[:-3] for archivo in os.listdir(RAIZ) if archivo.endswith('.py')}
+    modulos = []
+    for nodo in arbol.body:
+        if isinstance(nodo, ast.Import):
+            nombres = [alias.name for alias in nodo.names]
+        elif isinstance(nodo, ast.ImportFrom) and nodo.module and not nodo.level:
+            nombres = [nodo.module]
+        else:
+            continue
+        modulos.extend(n for n in nombres if n.split('.')[0] in locales and n not in modulos)
+    return modulos
+
+
+def _medir(modulos: List[str]) -> Tuple[Dict, List[Tuple[int, int, str]]]:
+    programa = _PROGRAMA.format(marca=_MARCA, modulos=modulos, diferidos=DIFERIDOS)
+    proceso = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', programa],
+        cwd=RAIZ, capture_output=True, text=True, check=True
+    )
+    detalle = []
+    en_app = False
+    for linea in proceso.stderr.splitlines():
+        if linea == _MARCA:
+            en_app = True
+        elif en_app and linea.startswith('import time:'):
+            propio, acumulado, nombre = linea[len('import time:'):].split('|')
+            if propio.strip().isdigit():
+                detalle.append((int(propio), int(acumulado), nombre.rstrip()))
+    return json.loads(proceso.stdout.strip().splitlines()[-1]), detalle
+
+
+def perfil_arranque(repeticiones: int = 5, script: str = 'main.py') -> Dict:
+    """Mide varias veces la importación y devuelve la mediana, las dependencias diferidas cargadas y el detalle."""
+    modulos = modulos_arranque(script)
+    tiempos = []
+    for _ in range(repeticiones):
+        resultado, detalle = _medir(modulos)
+        tiempos.append(resultado['ms'])
+    return {
+        'modulos': modulos,
+        'ms': statistics.median(tiempos),
+        'diferidos': resultado['diferidos'],
+        'detalle': detalle,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mide el tiempo de importación del arranque de la app.")
+    parser.add_argument('--presupuesto', type=float, default=PRESUPUESTO_MS,
+                        help="Milisegundos permitidos para importar los módulos de la app")
+    parser.add_argument('--repeticiones', type=int, default=5, help="Mediciones en procesos nuevos")
+    parser.add_argument('--top', type=int, default=15, help="Importaciones más lentas a mostrar")
+    args = parser.parse_args(argv)
+
+    perfil = perfil_arranque(args.repeticiones)
+    print(f"Módulos de arranque: {', '.join(perfil['modulos'])}")
+    print(f"{'propio (ms)':>12} {'acumulado (ms)':>15}  módulo")
+    for propio, acumulado, nombre in sorted(perfil['detalle'], key=lambda d: -d[1])[:args.top]:
+        print(f"{propio / 1000:12.1f} {acumulado / 1000:15.1f} {nombre}")
+    print(f"Importación de la app: {perfil['ms']:.0f} ms (mediana de {args.repeticiones}), "
+          f"presupuesto {args.presupuesto:.0f} ms")
+
+    errores = []
+    if perfil['ms'] > args.presupuesto:
+        errores.append(f"el arranque supera el presupuesto por {perfil['ms'] - args.presupuesto:.0f} ms")
+    if perfil['diferidos']:
+        errores.append(f"se cargan dependencias diferidas: {', '.join(perfil['diferidos'])}")
+    for error in errores:
+        print(f"ERROR: {error}", file=sys.stderr)
+    sys.exit(1 if errores else 0)
+
+
+if __name__ == '__main__':
+    main()
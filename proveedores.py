@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+from typing import Mapping, Sequence, Union
+
+from calculos import AHORROS, ENTRADAS, MAXIMOS, ArrayLike, calcular_categorias
+
+# Entradas que dependen del proveedor de planchas; el resto describe al cliente
+ENTRADAS_PROVEEDOR = (
+    'costo_iflexo_plancha',
+    'diferencia_tiempo_ajuste',
+    'diferencia_material',
+    'velocidad_iflexo',
+    'paradas_iflexo',
+    'reduccion_consumo_blanca',
+    'reduccion_consumo',
+)
+
+ENTRADAS_CLIENTE = tuple(k for k in ENTRADAS if k not in ENTRADAS_PROVEEDOR)
+
+# Etiquetas de las entradas por proveedor, sin la referencia a iFlexo
+ETIQUETAS_PROVEEDOR = {
+    'costo_iflexo_plancha': "Costo de plancha",
+    'diferencia_tiempo_ajuste': "Diferencia de tiempo de ajuste",
+    'diferencia_material': "Diferencia de material (%)",
+    'velocidad_iflexo': "Velocidad",
+    'paradas_iflexo': "Paradas por trabajo",
+    'reduccion_consumo_blanca': "Reducción de tinta blanca (%)",
+    'reduccion_consumo': "Reducción de tintas (%)",
+}
+
+# Celdas (clientes × proveedores) que se calculan juntas: acota los intermedios en memoria
+CELDAS_POR_BLOQUE = 262_144
+
+
+def tabla_proveedores(proveedores: pd.DataFrame) -> pd.DataFrame:
+    """Normaliza la tabla de proveedores: una fila por proveedor y sus entradas como float64.
+
+    Las columnas ausentes y los valores vacíos se toman como cero, y las
+    entradas con `max_value` en main.py se recortan a ese máximo.
+    """
+    columnas = {}
+    for columna in ENTRADAS_PROVEEDOR:
+        if columna in proveedores:
+            valores = pd.to_numeric(proveedores[columna], errors='coerce').fillna(0).astype('float64')
+            columnas[columna] = valores.clip(0.0, MAXIMOS.get(columna))
+        else:
+            columnas[columna] = np.zeros(len(proveedores))
+    return pd.DataFrame(columnas, index=proveedores.index.astype(str))
+
+
+def tabla_editable() -> pd.DataFrame:
+    """Tabla vacía para cargar proveedores en st.data_editor: nombre y entradas por proveedor."""
+    return pd.DataFrame({
+        'proveedor': pd.Series(dtype='object'),
+        **{k: pd.Series(dtype='float64') for k in ENTRADAS_PROVEEDOR}
+    })
+
+
+def con_iflexo(entradas: Mapping[str, float], otros: pd.DataFrame) -> pd.DataFrame:
+    """Antepone iFlexo, con las entradas actuales, a los proveedores cargados en la tabla.
+
+    El índice es el nombre de cada proveedor: los vacíos se numeran y los
+    repetidos llevan un sufijo, para que cada fila tenga un nombre único.
+    """
+    iflexo = pd.DataFrame([{'proveedor': "iFlexo", **{k: float(entradas.get(k, 0) or 0) for k in ENTRADAS_PROVEEDOR}}])
+    tabla = pd.concat([iflexo, otros], ignore_index=True)
+    nombres = tabla['proveedor'].fillna("").astype(str).str.strip()
+    nombres = nombres.where(nombres != "", [f"Proveedor {i + 1}" for i in range(len(tabla))])
+    repetidos = nombres.groupby(nombres).cumcount()
+    nombres = nombres.where(repetidos == 0, nombres + " (" + (repetidos + 1).astype(str) + ")")
+    return tabla.drop(columns='proveedor').set_index(pd.Index(nombres, name='proveedor'))
+
+
+def _columna(clientes: Union[pd.DataFrame, Mapping[str, ArrayLike]], clave: str, n: int) -> np.ndarray:
+    valor = clientes[clave] if clave in clientes else 0.0
+    return np.broadcast_to(np.asarray(valor, dtype=np.float64), (n,))
+
+
+def comparar_proveedores(clientes: Union[pd.DataFrame, Mapping[str, ArrayLike]], proveedores: pd.DataFrame,
+                         celdas_por_bloque: int = CELDAS_POR_BLOQUE) -> np.ndarray:
+    """Ahorros de cada cliente con cada proveedor, en una sola pasada vectorizada.
+
+    Las entradas del cliente se usan como columna (clientes × 1) y las de los
+    proveedores como fila (1 × proveedores), así que las seis categorías se
+    calculan por broadcasting sobre la grilla completa, de a bloques de
+    clientes. Devuelve un arreglo (clientes, proveedores, categorías) con las
+    categorías en el orden de AHORROS.
+    """
+    proveedores = tabla_proveedores(proveedores)
+    m = len(proveedores)
+    if isinstance(clientes, pd.DataFrame):
+        n = len(clientes)
+    else:
+        n = max([np.size(clientes[k]) for k in ENTRADAS_CLIENTE if k in clientes], default=1)
+
+    por_cliente = {k: _columna(clientes, k, n) for k in ENTRADAS_CLIENTE}
+    por_proveedor = {k: proveedores[k].to_numpy()[np.newaxis, :] for k in ENTRADAS_PROVEEDOR}
+
+    ahorros = np.zeros((n, m, len(AHORROS)))
+    filas = max(1, celdas_por_bloque // max(m, 1))
+    for inicio in range(0, n, filas):
+        bloque = {k: v[inicio:inicio + filas, np.newaxis] for k, v in por_cliente.items()}
+        bloque.update(por_proveedor)
+        resultados = calcular_categorias(bloque)
+        for j, categoria in enumerate(AHORROS):
+            ahorros[inicio:inicio + filas, :, j] = resultados[categoria]['ahorro']
+    return ahorros
+
+
+def ahorros_proveedores(entradas: Mapping[str, float], proveedores: pd.DataFrame) -> pd.DataFrame:
+    """Ahorros de un cliente con cada proveedor: una fila por proveedor y una columna por categoría más el total."""
+    proveedores = tabla_proveedores(proveedores)
+    ahorros = comparar_proveedores(entradas, proveedores)[0]
+    resultado = pd.DataFrame(ahorros, index=proveedores.index, columns=list(AHORROS))
+    resultado['total'] = ahorros.sum(axis=1)
+    return resultado
+
+
+def resumen_proveedores(ahorros: np.ndarray, nombres: Sequence[str]) -> pd.DataFrame:
+    """Resume la comparación de muchos clientes por proveedor.
+
+    Suma el ahorro de cada categoría y el total sobre todos los clientes, y
+    cuenta en cuántos clientes cada proveedor da el mayor ahorro total.
+    """
+    totales = ahorros.sum(axis=2)
+    resumen = pd.DataFrame(ahorros.sum(axis=0), index=list(nombres), columns=list(AHORROS))
+    resumen['total'] = totales.sum(axis=0)
+    resumen['promedio_cliente'] = totales.mean(axis=0) if totales.size else 0.0
+    resumen['clientes_mejor'] = np.bincount(totales.argmax(axis=1), minlength=len(resumen)) if totales.size else 0
+    return resumen.sort_values('total', ascending=False)
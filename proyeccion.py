@@ -0,0 +1,100 @@
+import numpy as np
+from typing import Dict, Mapping, Optional
+
+from calculos import ArrayLike, calcular_categorias
+
+# Rubros de ahorro según el precio que los mueve en el tiempo
+RUBROS = ('planchas', 'hora_prensa', 'material', 'tinta')
+
+# Caída anual máxima de un precio: con -100 % o menos el flujo se anula o cambia de signo cada año
+ESCALAMIENTO_MINIMO = -0.99
+
+
+def _sin_nan(valor: np.ndarray) -> np.ndarray:
+    return np.nan_to_num(valor, nan=0.0)
+
+
+def rubros_ahorro(entradas: Mapping[str, ArrayLike]) -> Dict[str, np.ndarray]:
+    """Agrupa el ahorro del primer año por el precio del que depende.
+
+    La suma de los rubros es el ahorro total anual de main.py.
+    """
+    resultados = calcular_categorias(entradas)
+    ajuste = resultados['velocidad_ajuste']
+    return {
+        'planchas': resultados['planchas']['ahorro'],
+        'hora_prensa': (_sin_nan(ajuste['ahorro_tiempo'])
+                        + resultados['velocidad_impresion']['ahorro']
+                        + resultados['plancha_parada']['ahorro']),
+        'material': _sin_nan(ajuste['ahorro_material']),
+        'tinta': resultados['tinta_blanca']['ahorro'] + resultados['tintas']['ahorro'],
+    }
+
+
+def _van(flujos: np.ndarray, inversion: np.ndarray, tasa: np.ndarray) -> np.ndarray:
+    anios = np.arange(1, flujos.shape[1] + 1)
+    descuento = (1 + tasa[:, None]) ** anios
+    return (flujos / descuento).sum(axis=1) - inversion
+
+
+def _tir(flujos: np.ndarray, inversion: np.ndarray, iteraciones: int = 100) -> np.ndarray:
+    """TIR por bisección vectorizada; NaN si el VAN no cambia de signo entre -99 % y 10.000 %."""
+    bajo = np.full(len(flujos), -0.99)
+    alto = np.full(len(flujos), 100.0)
+    van_bajo = _van(flujos, inversion, bajo)
+    valida = np.sign(van_bajo) != np.sign(_van(flujos, inversion, alto))
+    for _ in range(iteraciones):
+        medio = (bajo + alto) / 2
+        van_medio = _van(flujos, inversion, medio)
+        mismo_signo = np.sign(van_medio) == np.sign(van_bajo)
+        bajo = np.where(mismo_signo, medio, bajo)
+        van_bajo = np.where(mismo_signo, van_medio, van_bajo)
+        alto = np.where(mismo_signo, alto, medio)
+    return np.where(valida, (bajo + alto) / 2, np.nan)
+
+
+def _mes_recuperacion(flujos: np.ndarray, inversion: np.ndarray) -> np.ndarray:
+    """Primer mes en que el ahorro acumulado (sin descontar) cubre la inversión; NaN si no ocurre."""
+    acumulado = np.cumsum(np.repeat(flujos / 12, 12, axis=1), axis=1)
+    recuperado = acumulado >= inversion[:, None]
+    mes = np.argmax(recuperado, axis=1) + 1.0
+    mes = np.where(recuperado.any(axis=1), mes, np.nan)
+    return np.where(inversion <= 0, 0.0, mes)
+
+
+def proyectar_inversion(rubros: Mapping[str, ArrayLike], inversion: ArrayLike = 0.0,
+                        tasa_descuento: ArrayLike = 0.10, anios: int = 5,
+                        escalamiento: Optional[Mapping[str, ArrayLike]] = None) -> Dict[str, np.ndarray]:
+    """Proyecta el ahorro a `anios` años y calcula VAN, TIR y mes de recuperación.
+
+    Cada rubro crece con su tasa de `escalamiento` (fracción anual, por
+    ejemplo 0.05), que debe ser mayor que -1. Todo se calcula sobre una
+    matriz (escenario × año).
+    """
+    if not 1 <= anios <= 10:
+        raise ValueError("El horizonte debe estar entre 1 y 10 años")
+    escalamiento = escalamiento or {}
+    for rubro, tasa in escalamiento.items():
+        if np.any(np.asarray(tasa, dtype=np.float64) <= -1):
+            raise ValueError(f"El escalamiento de {rubro} debe ser mayor que -100 % anual")
+    if np.any(np.asarray(tasa_descuento, dtype=np.float64) <= -1):
+        raise ValueError("La tasa de descuento debe ser mayor que -100 % anual")
+
+    exponentes = np.arange(anios)
+    flujos = 0.0
+    for rubro in RUBROS:
+        base = np.atleast_1d(np.asarray(rubros.get(rubro, 0.0), dtype=np.float64))
+        tasa = np.atleast_1d(np.asarray(escalamiento.get(rubro, 0.0), dtype=np.float64))
+        flujos = flujos + base[:, None] * (1 + tasa[:, None]) ** exponentes
+
+    flujos = np.atleast_2d(flujos)
+    n = len(flujos)
+    inversion = np.broadcast_to(np.asarray(inversion, dtype=np.float64), (n,))
+    tasa_descuento = np.broadcast_to(np.asarray(tasa_descuento, dtype=np.float64), (n,))
+
+    return {
+        'flujos': flujos,
+        'van': _van(flujos, inversion, tasa_descuento),
+        'tir': _tir(flujos, inversion),
+        'mes_recuperacion': _mes_recuperacion(flujos, inversion),
+    }
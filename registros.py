@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Mapping, Optional
+
+from utils import iter_file
+
+# Columnas por defecto del registro de trabajos (una fila por trabajo)
+COLUMNAS_REGISTRO = {
+    'ajuste': 'minutos_ajuste',
+    'paradas': 'paradas',
+    'desperdicio': 'metros_desperdicio',
+}
+
+
+class AcumuladorRegistro:
+    """Agrega un registro de trabajos bloque a bloque con memoria acotada.
+
+    Lleva conteo, suma, suma de cuadrados, mínimo y máximo exactos de cada
+    métrica, y una muestra uniforme de tamaño fijo (bottom-k sobre claves
+    aleatorias) para estimar los percentiles.
+    """
+
+    def __init__(self, columnas: Optional[Mapping[str, str]] = None,
+                 tamano_muestra: int = 100_000, semilla: Optional[int] = 0):
+        self.columnas = dict(columnas or COLUMNAS_REGISTRO)
+        self.tamano_muestra = tamano_muestra
+        self.rng = np.random.default_rng(semilla)
+        self.trabajos = 0
+        self.metricas = {
+            metrica: {'n': 0, 'suma': 0.0, 'suma_cuadrados': 0.0, 'minimo': np.inf, 'maximo': -np.inf}
+            for metrica in self.columnas
+        }
+        self.claves = np.empty(0)
+        self.muestra = {metrica: np.empty(0) for metrica in self.columnas}
+
+    def agregar(self, bloque: pd.DataFrame) -> None:
+        """Incorpora un bloque de filas del registro."""
+        n = len(bloque)
+        if n == 0:
+            return
+        self.trabajos += n
+        valores = {}
+        for metrica, columna in self.columnas.items():
+            serie = pd.to_numeric(bloque[columna], errors='coerce') if columna in bloque else pd.Series(np.nan, index=bloque.index)
+            valores[metrica] = serie.to_numpy(dtype=np.float64)
+            validos = valores[metrica][~np.isnan(valores[metrica])]
+            if len(validos):
+                acumulado = self.metricas[metrica]
+                acumulado['n'] += len(validos)
+                acumulado['suma'] += validos.sum()
+                acumulado['suma_cuadrados'] += np.square(validos).sum()
+                acumulado['minimo'] = min(acumulado['minimo'], validos.min())
+                acumulado['maximo'] = max(acumulado['maximo'], validos.max())
+
+        claves = np.concatenate([self.claves, self.rng.random(n)])
+        muestra = {m: np.concatenate([self.muestra[m], valores[m]]) for m in self.columnas}
+        if len(claves) > self.tamano_muestra:
+            conservar = np.argpartition(claves, self.tamano_muestra)[:self.tamano_muestra]
+            claves = claves[conservar]
+            muestra = {m: v[conservar] for m, v in muestra.items()}
+        self.claves = claves
+        self.muestra = muestra
+
+    def resumen(self) -> pd.DataFrame:
+        """Distribución por trabajo de cada métrica: media, desvío, mínimo, P10/P50/P90 y máximo."""
+        filas = {}
+        for metrica, acumulado in self.metricas.items():
+            n = acumulado['n']
+            if n == 0:
+                filas[metrica] = {'trabajos': 0}
+                continue
+            media = acumulado['suma'] / n
+            varianza = max(acumulado['suma_cuadrados'] / n - media ** 2, 0.0)
+            muestra = self.muestra[metrica][~np.isnan(self.muestra[metrica])]
+            # La muestra es común a todas las métricas: una columna casi vacía puede no tener valores en ella
+            p10, p50, p90 = np.percentile(muestra, [10, 50, 90]) if len(muestra) else (np.nan,) * 3
+            filas[metrica] = {
+                'trabajos': n,
+                'media': media,
+                'desvio': np.sqrt(varianza),
+                'minimo': acumulado['minimo'],
+                'P10': p10,
+                'P50': p50,
+                'P90': p90,
+                'maximo': acumulado['maximo'],
+            }
+        return pd.DataFrame.from_dict(filas, orient='index')
+
+
+def analizar_registro(archivo, columnas: Optional[Mapping[str, str]] = None,
+                      chunksize: int = 200_000, tamano_muestra: int = 100_000,
+                      semilla: Optional[int] = 0) -> AcumuladorRegistro:
+    """Recorre un registro de trabajos (CSV, Excel o Parquet) por bloques."""
+    acumulador = AcumuladorRegistro(columnas, tamano_muestra, semilla)
+    leidas = list(acumulador.columnas.values())
+    esquema = {columna: 'float64' for columna in leidas}
+    for bloque in iter_file(archivo, chunksize=chunksize, columnas=leidas, esquema=esquema):
+        acumulador.agregar(bloque)
+    return acumulador
+
+
+def entradas_desde_registro(acumulador: AcumuladorRegistro, anios: float = 1.0) -> Dict[str, float]:
+    """Convierte el registro en las entradas promedio de "Velocidad de Ajuste" y "Relación Plancha-Parada".
+
+    Las fórmulas son lineales en cada trabajo, así que usar el promedio del
+    registro por la cantidad de trabajos da el mismo ahorro que sumar el
+    ahorro de cada trabajo. `anios` es el período que cubre el registro.
+    """
+    medias = {m: a['suma'] / a['n'] for m, a in acumulador.metricas.items() if a['n']}
+    trabajos_anio = int(round(acumulador.trabajos / anios))
+    entradas = {
+        'num_trabajos_ajuste': trabajos_anio,
+        'num_trabajos_parada': trabajos_anio,
+    }
+    if 'ajuste' in medias:
+        # tiempo_ajuste_actual es un number_input entero en main.py
+        entradas['tiempo_ajuste_actual'] = int(round(medias['ajuste']))
+    if 'paradas' in medias:
+        entradas['paradas_actual'] = float(medias['paradas'])
+    if 'desperdicio' in medias:
+        entradas['metros_material_actual'] = float(medias['desperdicio'])
+    return entradas
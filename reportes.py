@@ -0,0 +1,289 @@
+"""Generación de reportes PDF fuera de la ejecución de Streamlit.
+
+Uso por lotes (un PDF por cliente, en una carpeta o un .zip):
+    python reportes.py resultados.parquet reportes.zip --workers 4
+
+Un solo PDF consolidado con el ranking de clientes:
+    python reportes.py resultados.parquet consolidado.pdf --consolidado
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import threading
+import time
+import zipfile
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from calculos import AHORROS
+from metricas import contar, observar
+
+PENDIENTE = 'pendiente'
+EN_PROCESO = 'en_proceso'
+LISTO = 'listo'
+ERROR = 'error'
+DESCONOCIDO = 'desconocido'
+
+
+def _inicializar_worker() -> None:
+    """Prepara una sola vez por proceso la configuración de ReportLab, el logo y los estilos."""
+    from reportlab import rl_config
+
+    from pdf_report import preparar_recursos
+
+    # Streams binarios: ReportLab codifica ASCII85 en Python puro, y era la mayor parte del tiempo
+    rl_config.useA85 = 0
+    preparar_recursos()
+
+
+def _generar(ahorros: Dict[str, float], datos_entrada: Dict,
+             proyeccion: Optional[Dict]) -> Tuple[bytes, float, Dict[str, int]]:
+    """Genera el PDF en el worker; devuelve también los segundos y los aciertos y fallos del caché de gráficos.
+
+    Las métricas del worker no llegan al proceso de la app, así que viajan con
+    el resultado y se registran en `ColaReportes._terminar`.
+    """
+    # ReportLab se carga solo en los procesos que generan PDF, no en el de la app
+    from graficos_pdf import estadisticas_cache
+    from pdf_report import generate_pdf_report
+
+    antes = estadisticas_cache()
+    inicio = time.perf_counter()
+    pdf = generate_pdf_report(ahorros, datos_entrada, proyeccion).getvalue()
+    segundos = time.perf_counter() - inicio
+    despues = estadisticas_cache()
+    return pdf, segundos, {k: despues[k] - antes[k] for k in ('aciertos', 'fallos')}
+
+
+def id_reporte(ahorros: Dict[str, float], datos_entrada: Optional[Dict] = None,
+               proyeccion: Optional[Dict] = None) -> str:
+    """Identificador del reporte según su contenido: entradas iguales dan el mismo id."""
+    contenido = json.dumps([ahorros, datos_entrada or {}, proyeccion], sort_keys=True, default=float)
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()[:16]
+
+
+class ColaReportes:
+    """Genera los reportes PDF en un pool de procesos acotado, fuera de la ejecución de Streamlit.
+
+    Los PDF terminados quedan en un almacén limitado a `max_bytes`; al
+    superarlo se descartan los menos usados. De los trabajos fallidos se
+    guardan los mensajes de los últimos `max_errores`. Pedir un reporte con
+    las mismas entradas que uno en curso o guardado devuelve el mismo trabajo.
+    """
+
+    def __init__(self, max_workers: int = 2, max_bytes: int = 64 * 1024 * 1024, max_errores: int = 1000):
+        self.max_bytes = max_bytes
+        self.max_errores = max_errores
+        self._pool = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_inicializar_worker
+        )
+        self._lock = threading.Lock()
+        self._en_curso: Dict[str, Future] = {}
+        self._avisos: Dict[str, Future] = {}
+        self._listos: "OrderedDict[str, bytes]" = OrderedDict()
+        self._errores: "OrderedDict[str, str]" = OrderedDict()
+        self._bytes = 0
+
+    def enviar(self, ahorros: Dict[str, float], datos_entrada: Optional[Dict] = None,
+               proyeccion: Optional[Dict] = None) -> str:
+        """Encola un reporte y devuelve su id sin esperar a que termine."""
+        trabajo = id_reporte(ahorros, datos_entrada, proyeccion)
+        with self._lock:
+            if trabajo in self._listos or trabajo in self._en_curso:
+                contar('reportes', resultado='reutilizado')
+                return trabajo
+            self._errores.pop(trabajo, None)
+            futuro = self._pool.submit(_generar, dict(ahorros), dict(datos_entrada or {}), proyeccion)
+            self._en_curso[trabajo] = futuro
+            self._avisos[trabajo] = Future()
+        contar('reportes', resultado='encolado')
+        enviado = time.perf_counter()
+        futuro.add_done_callback(lambda f: self._terminar(trabajo, f, enviado))
+        return trabajo
+
+    def _terminar(self, trabajo: str, futuro: Future, enviado: float) -> None:
+        # Desde que se encoló hasta que terminó, incluida la espera por un worker libre
+        observar('pdf_cola', time.perf_counter() - enviado)
+        try:
+            pdf, segundos, cache = futuro.result()
+        except Exception as e:
+            pdf, error = None, str(e)
+            contar('reportes', resultado='error')
+        else:
+            observar('pdf', segundos, reporte='individual')
+            for resultado, cantidad in cache.items():
+                contar('cache_graficos_pdf', cantidad, resultado=resultado)
+        with self._lock:
+            self._en_curso.pop(trabajo, None)
+            aviso = self._avisos.pop(trabajo)
+            if pdf is None:
+                self._errores[trabajo] = error
+                while len(self._errores) > self.max_errores:
+                    self._errores.popitem(last=False)
+            else:
+                self._listos[trabajo] = pdf
+                self._bytes += len(pdf)
+                while self._bytes > self.max_bytes and len(self._listos) > 1:
+                    _, descartado = self._listos.popitem(last=False)
+                    self._bytes -= len(descartado)
+        aviso.set_result(trabajo)
+
+    def estado(self, trabajo: str) -> str:
+        with self._lock:
+            if trabajo in self._listos:
+                return LISTO
+            if trabajo in self._errores:
+                return ERROR
+            futuro = self._en_curso.get(trabajo)
+        if futuro is None:
+            return DESCONOCIDO
+        return EN_PROCESO if futuro.running() else PENDIENTE
+
+    def resultado(self, trabajo: str) -> Optional[bytes]:
+        """PDF terminado, o None si todavía no está (o ya fue descartado)."""
+        with self._lock:
+            pdf = self._listos.get(trabajo)
+            if pdf is not None:
+                self._listos.move_to_end(trabajo)
+            return pdf
+
+    def error(self, trabajo: str) -> Optional[str]:
+        with self._lock:
+            return self._errores.get(trabajo)
+
+    def futuro(self, trabajo: str) -> Optional[Future]:
+        """Future del trabajo en curso, para esperarlo sin consultar el estado; None si ya terminó.
+
+        No es el Future del pool: ese despierta a quien espera `result()` antes
+        de correr los callbacks, y el PDF todavía podría no estar guardado.
+        Este lo resuelve `_terminar` al final, con el PDF ya en `resultado()`
+        (o el mensaje en `error()`).
+        """
+        with self._lock:
+            return self._avisos.get(trabajo)
+
+    def cerrar(self, esperar: bool = False) -> None:
+        """Cancela los reportes pendientes; con `esperar` también espera a que terminen los workers."""
+        self._pool.shutdown(wait=esperar, cancel_futures=True)
+
+
+def _nombre_archivo(cliente) -> str:
+    return "reporte_" + re.sub(r'[^\w.-]+', '_', str(cliente)) + ".pdf"
+
+
+def _generar_lote(reportes: List[Tuple[str, Dict[str, float]]],
+                  carpeta: Optional[str]) -> List[Tuple[str, Optional[bytes]]]:
+    """Genera un grupo de reportes en el worker; con carpeta los escribe ahí mismo."""
+    from pdf_report import generate_pdf_report
+
+    salida = []
+    for cliente, ahorros in reportes:
+        nombre = _nombre_archivo(cliente)
+        pdf = generate_pdf_report(ahorros, {}).getvalue()
+        if carpeta is None:
+            salida.append((nombre, pdf))
+        else:
+            with open(os.path.join(carpeta, nombre), 'wb') as f:
+                f.write(pdf)
+            salida.append((nombre, None))
+    return salida
+
+
+def _agrupar(reportes: Iterable, tamano: int) -> Iterator[List]:
+    grupo = []
+    for reporte in reportes:
+        grupo.append(reporte)
+        if len(grupo) == tamano:
+            yield grupo
+            grupo = []
+    if grupo:
+        yield grupo
+
+
+def generar_reportes_lote(reportes: Iterable[Tuple[str, Dict[str, float]]], destino: str,
+                          workers: Optional[int] = None, por_tarea: int = 32) -> int:
+    """Escribe un PDF por cliente en la carpeta `destino`, o dentro de un .zip.
+
+    `reportes` puede ser un iterador de pares (cliente, ahorros); se consume de
+    a poco y solo hay unos pocos grupos en vuelo, así que la memoria no crece
+    con la cantidad de clientes. Devuelve la cantidad de reportes generados.
+    """
+    workers = workers or os.cpu_count() or 1
+    es_zip = destino.lower().endswith('.zip')
+    carpeta = None if es_zip else destino
+    if carpeta is not None:
+        os.makedirs(carpeta, exist_ok=True)
+    archivo_zip = zipfile.ZipFile(destino, 'w', zipfile.ZIP_STORED) if es_zip else None
+
+    generados = 0
+
+    def guardar(resultado):
+        nonlocal generados
+        for nombre, pdf in resultado:
+            if archivo_zip is not None:
+                archivo_zip.writestr(nombre, pdf)
+            generados += 1
+
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_inicializar_worker
+        ) as pool:
+            pendientes = deque()
+            for grupo in _agrupar(reportes, por_tarea):
+                pendientes.append(pool.submit(_generar_lote, grupo, carpeta))
+                if len(pendientes) >= 2 * workers:
+                    guardar(pendientes.popleft().result())
+            while pendientes:
+                guardar(pendientes.popleft().result())
+    finally:
+        if archivo_zip is not None:
+            archivo_zip.close()
+    return generados
+
+
+def leer_reportes(archivo, columna_id: str = 'cliente') -> Iterator[Tuple[str, Dict[str, float]]]:
+    """Recorre por bloques un archivo de resultados (por ejemplo, la salida de batch.py)."""
+    from utils import iter_file
+
+    fila = 0
+    for bloque in iter_file(archivo):
+        ids = bloque[columna_id] if columna_id in bloque else range(fila, fila + len(bloque))
+        columnas = [bloque[c].fillna(0).astype(float).tolist() if c in bloque else [0.0] * len(bloque)
+                    for c in AHORROS]
+        for cliente, valores in zip(ids, zip(*columnas)):
+            yield cliente, dict(zip(AHORROS, valores))
+        fila += len(bloque)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera un reporte PDF por cliente o uno consolidado.")
+    parser.add_argument('entrada', help="Archivo de resultados con las columnas de ahorro por categoría")
+    parser.add_argument('destino', help="Carpeta de salida o archivo .zip")
+    parser.add_argument('--columna-id', default='cliente', help="Columna que identifica al cliente")
+    parser.add_argument('--workers', type=int, default=0, help="Procesos (0 usa todos los núcleos)")
+    parser.add_argument('--consolidado', action='store_true',
+                        help="Genera un único PDF con resumen, ranking y una página por cliente")
+    args = parser.parse_args(argv)
+
+    if args.consolidado:
+        from pdf_report import generate_consolidated_report
+
+        _inicializar_worker()
+        generados = generate_consolidated_report(lambda: leer_reportes(args.entrada, args.columna_id), args.destino)
+        print(f"{generados} clientes en {args.destino}")
+        return
+
+    generados = generar_reportes_lote(leer_reportes(args.entrada, args.columna_id), args.destino, args.workers)
+    print(f"{generados} reportes generados en {args.destino}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+import numpy as np
+from typing import TYPE_CHECKING, Mapping, Optional, Sequence
+
+from calculos import AHORROS, ENTRADAS, ETIQUETAS, MAXIMOS, calcular_categorias
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def barrido_sensibilidad(entradas: Mapping[str, float], claves: Optional[Sequence[str]] = None,
+                         variacion: float = 20.0, pasos: int = 50) -> "pd.DataFrame":
+    """Perturba cada entrada en ±`variacion` % y mide el efecto sobre el ahorro total.
+
+    Todo el barrido se evalúa como una sola grilla (entradas × pasos): en la
+    fila de cada entrada solo esa entrada cambia y las demás quedan en su valor
+    actual. Devuelve una fila por entrada, ordenadas por impacto.
+    """
+    claves = list(ENTRADAS if claves is None else claves)
+    factores = np.linspace(1 - variacion / 100, 1 + variacion / 100, pasos)
+    forma = (len(claves), pasos)
+
+    grilla = {}
+    for clave in ENTRADAS:
+        grilla[clave] = np.full(forma, float(entradas.get(clave, 0.0)))
+    for i, clave in enumerate(claves):
+        grilla[clave][i] = np.clip(grilla[clave][i] * factores, 0.0, MAXIMOS.get(clave))
+
+    categorias = calcular_categorias(grilla)
+    total = np.zeros(forma)
+    for categoria in AHORROS:
+        total = total + categorias[categoria]['ahorro']
+
+    import pandas as pd
+
+    resultado = pd.DataFrame({
+        'etiqueta': [ETIQUETAS[k] for k in claves],
+        'bajo': total[:, 0],
+        'alto': total[:, -1],
+        'minimo': total.min(axis=1),
+        'maximo': total.max(axis=1),
+    }, index=claves)
+    resultado['impacto'] = resultado['maximo'] - resultado['minimo']
+    return resultado.sort_values('impacto', ascending=False)
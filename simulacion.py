@@ -0,0 +1,138 @@
+import numpy as np
+from typing import TYPE_CHECKING, Dict, Iterable, Mapping, Optional, Sequence
+
+from calculos import AHORROS, MAXIMOS, calcular_categorias
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DISTRIBUCIONES = ("Triangular", "Normal", "Uniforme")
+
+
+def _muestrear(rng: np.random.Generator, distribucion: Sequence, n: int) -> np.ndarray:
+    """Genera `n` muestras de una distribución ('triangular', min, moda, max),
+    ('normal', media, desv) o ('uniforme', min, max)."""
+    tipo, *parametros = distribucion
+    tipo = tipo.lower()
+    if tipo == 'triangular':
+        minimo, moda, maximo = parametros
+        if minimo == maximo:
+            return np.full(n, float(moda))
+        return rng.triangular(minimo, moda, maximo, n)
+    elif tipo == 'normal':
+        media, desv = parametros
+        return rng.normal(media, desv, n)
+    elif tipo == 'uniforme':
+        minimo, maximo = parametros
+        return rng.uniform(minimo, maximo, n)
+    else:
+        raise ValueError(f"Distribución no soportada: {tipo}")
+
+
+def distribuciones_relativas(entradas: Mapping[str, float], claves: Iterable[str],
+                             tipo: str = "Triangular", variacion: float = 10.0) -> Dict[str, tuple]:
+    """Arma distribuciones centradas en el valor actual con una variación de ±`variacion` %.
+
+    En la normal, la variación se usa como desviación estándar.
+    """
+    distribuciones = {}
+    for clave in claves:
+        valor = float(entradas.get(clave, 0.0))
+        delta = abs(valor) * variacion / 100
+        if tipo == "Triangular":
+            distribuciones[clave] = ('triangular', valor - delta, valor, valor + delta)
+        elif tipo == "Normal":
+            distribuciones[clave] = ('normal', valor, delta)
+        elif tipo == "Uniforme":
+            distribuciones[clave] = ('uniforme', valor - delta, valor + delta)
+        else:
+            raise ValueError(f"Distribución no soportada: {tipo}")
+    return distribuciones
+
+
+class _Acumulador:
+    """Estadísticas de los ahorros por muestra, acumuladas bloque a bloque con memoria fija.
+
+    La media y la varianza son exactas (se combinan los momentos de cada
+    bloque). Los percentiles salen de una reserva de hasta `reserva` muestras
+    elegidas al azar entre todas: cada muestra recibe una clave aleatoria y
+    se conservan las de clave más chica, así que mientras no se pasen de
+    `reserva` muestras se conservan todas y los percentiles son exactos.
+    """
+
+    def __init__(self, filas: int, reserva: int, rng: np.random.Generator):
+        self.reserva = reserva
+        self.rng = rng
+        self.n = 0
+        self.media = np.zeros(filas)
+        self.m2 = np.zeros(filas)
+        self.muestras = np.empty((filas, 0))
+        self.claves = np.empty(0)
+
+    def agregar(self, bloque: np.ndarray) -> None:
+        n = bloque.shape[1]
+        media = bloque.mean(axis=1)
+        m2 = ((bloque - media[:, None]) ** 2).sum(axis=1)
+        delta = media - self.media
+        total = self.n + n
+        self.media = self.media + delta * n / total
+        self.m2 = self.m2 + m2 + delta ** 2 * self.n * n / total
+        self.n = total
+
+        muestras = np.concatenate([self.muestras, bloque], axis=1)
+        claves = np.concatenate([self.claves, self.rng.random(n)])
+        if len(claves) > self.reserva:
+            elegidas = np.argpartition(claves, self.reserva)[:self.reserva]
+            muestras, claves = muestras[:, elegidas], claves[elegidas]
+        self.muestras, self.claves = muestras, claves
+
+    def desviacion(self) -> np.ndarray:
+        return np.sqrt(self.m2 / max(self.n - 1, 1))
+
+
+def simular_ahorros(entradas: Mapping[str, float], distribuciones: Mapping[str, Sequence],
+                    n_muestras: int = 100_000, semilla: Optional[int] = None,
+                    tamano_bloque: int = 250_000,
+                    percentiles: Sequence[float] = (10, 50, 90),
+                    reserva: int = 250_000) -> "pd.DataFrame":
+    """Simulación Monte Carlo de los ahorros anuales.
+
+    Las entradas sin distribución quedan fijas en su valor de `entradas`. Las
+    muestras se generan por bloques y de cada bloque solo se acumulan la media,
+    la varianza y una reserva de hasta `reserva` muestras para los percentiles,
+    así que la memoria no depende de `n_muestras`; hasta `reserva` muestras los
+    percentiles son exactos.
+    Devuelve una fila por categoría más el total, con una columna por
+    percentil, la media y la desviación estándar.
+    """
+    semillas = np.random.SeedSequence(semilla)
+    rng = np.random.default_rng(semillas)
+    acumulador = _Acumulador(len(AHORROS) + 1, reserva, np.random.default_rng(semillas.spawn(1)[0]))
+
+    for inicio in range(0, n_muestras, tamano_bloque):
+        n = min(tamano_bloque, n_muestras - inicio)
+        bloque = dict(entradas)
+        for clave, distribucion in distribuciones.items():
+            # Mismos límites que los number_input de main.py
+            bloque[clave] = np.clip(_muestrear(rng, distribucion, n), 0.0, MAXIMOS.get(clave))
+        categorias = calcular_categorias(bloque)
+
+        ahorros = np.empty((len(AHORROS) + 1, n))
+        total = np.zeros(n)
+        for i, categoria in enumerate(AHORROS):
+            ahorros[i] = np.broadcast_to(categorias[categoria]['ahorro'], (n,))
+            total = total + ahorros[i]
+        ahorros[-1] = total
+        acumulador.agregar(ahorros)
+
+    import pandas as pd
+
+    valores = np.percentile(acumulador.muestras, percentiles, axis=1).T
+    resultado = pd.DataFrame(
+        valores,
+        index=list(AHORROS) + ['total'],
+        columns=[f"P{p:g}" for p in percentiles],
+    )
+    resultado['media'] = acumulador.media
+    resultado['desviacion'] = acumulador.desviacion()
+    return resultado
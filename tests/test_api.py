@@ -0,0 +1,50 @@
+import pytest
+
+from api import calcular_escenarios, validar_entradas
+from calculos import calcular_ahorros
+
+from test_calculos import AHORROS_MAIN_ORIGINAL, ENTRADAS_FIJAS
+
+
+def test_escenario_valido():
+    entradas, errores = validar_entradas(ENTRADAS_FIJAS)
+    assert errores == {}
+    assert entradas == {k: float(v) for k, v in ENTRADAS_FIJAS.items()}
+
+
+def test_ausentes_en_cero():
+    entradas, errores = validar_entradas({'consumo_tinta': 5})
+    assert errores == {}
+    assert entradas['consumo_tinta'] == 5.0
+    assert entradas['costo_tinta'] == 0.0
+
+
+@pytest.mark.parametrize('clave, valor, mensaje', [
+    ('no_existe', 1, "entrada desconocida"),
+    ('costo_tinta', "1", "debe ser un número"),
+    ('costo_tinta', True, "debe ser un número"),
+    ('costo_tinta', None, "debe ser un número"),
+    ('costo_tinta', -1.0, "debe ser un número finito mayor o igual a 0"),
+    ('costo_tinta', float('nan'), "debe ser un número finito mayor o igual a 0"),
+    ('costo_tinta', float('inf'), "debe ser un número finito mayor o igual a 0"),
+    ('costo_tinta', 10 ** 400, "debe ser un número finito mayor o igual a 0"),
+    ('reduccion_consumo', 100.5, "debe ser menor o igual a 100"),
+    ('consumo_planchas', 1.5, "debe ser un número entero"),
+])
+def test_entradas_invalidas(clave, valor, mensaje):
+    _, errores = validar_entradas({clave: valor})
+    assert errores == {clave: mensaje}
+
+
+def test_no_objeto():
+    assert validar_entradas([1, 2]) == ({}, {'': "se espera un objeto con las entradas"})
+
+
+def test_calcular_escenarios_igual_que_calcular_ahorros():
+    entradas, _ = validar_entradas(ENTRADAS_FIJAS)
+    otras = {**entradas, 'consumo_planchas': 0.0}
+    resultados = calcular_escenarios([entradas, otras])
+    assert resultados[0]['ahorros'] == pytest.approx(AHORROS_MAIN_ORIGINAL)
+    assert resultados[1]['ahorros']['planchas'] == 0.0
+    esperado = calcular_ahorros({k: [entradas[k], otras[k]] for k in entradas})['total']
+    assert [r['total'] for r in resultados] == pytest.approx(list(esperado))
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+
+import cache_graficos
+from cache_graficos import _normalizar, cache_grafico, estadisticas_cache, limpiar_cache
+
+
+def test_normalizar_redondea_y_unifica_tipos():
+    assert _normalizar(0.1 + 0.2) == _normalizar(0.3)
+    assert _normalizar(-0.0) == _normalizar(0.0)
+    assert _normalizar(np.float32(2.5)) == _normalizar(2.5)
+    assert _normalizar(np.int64(3)) == _normalizar(3)
+    assert _normalizar({'b': 1.0, 'a': [1, 2]}) == _normalizar({'a': (1, 2), 'b': 1.0})
+    assert _normalizar(1.0) != _normalizar(1.0001)
+
+
+def test_normalizar_dataframe_por_contenido():
+    a = pd.DataFrame({'x': [1.0, 2.0], 'y': ['p', 'q']})
+    b = pd.DataFrame({'x': [1.0 + 1e-9, 2.0], 'y': ['p', 'q']})
+    assert _normalizar(a) == _normalizar(b)
+    assert _normalizar(a) != _normalizar(a.assign(y=['p', 'r']))
+
+
+def test_normalizar_rechaza_tipos_desconocidos():
+    with pytest.raises(TypeError):
+        _normalizar(object())
+
+
+def test_cache_lru_y_contadores(monkeypatch):
+    monkeypatch.setattr(cache_graficos, 'CACHE_MAX_ENTRADAS', 2)
+    limpiar_cache()
+    llamadas = []
+
+    @cache_grafico
+    def grafico(valor):
+        llamadas.append(valor)
+        return go.Figure(go.Bar(y=[valor]))
+
+    primera = grafico(1.0)
+    assert grafico(1.0 + 1e-9).to_dict() == primera.to_dict()
+    grafico(2.0)
+    grafico(3.0)
+    grafico(1.0)
+    assert llamadas == [1.0, 2.0, 3.0, 1.0]
+    assert estadisticas_cache() == {'aciertos': 1, 'fallos': 4, 'expirados': 0, 'desalojos': 2, 'entradas': 2}
+    limpiar_cache()
+
+
+def test_modificar_la_figura_no_altera_el_cache():
+    limpiar_cache()
+
+    @cache_grafico
+    def grafico(valor):
+        return go.Figure(go.Bar(x=['actual', 'iflexo'], y=[valor, valor / 2]), layout={'title': {'text': "Costos"}})
+
+    original = grafico(10.0).to_dict()
+    for _ in range(2):
+        figura = grafico(10.0)
+        assert figura.to_dict() == original
+        figura.update_layout(title_text="Modificado", height=200)
+        figura.data[0].y = [0, 0]
+        figura.add_trace(go.Scatter(y=[1, 2]))
+    assert grafico(10.0).to_dict() == original
+    assert grafico(10.0) is not grafico(10.0)
+    assert estadisticas_cache()['aciertos'] == 5
+    limpiar_cache()
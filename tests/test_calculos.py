@@ -0,0 +1,114 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from calculos import AHORROS, CATEGORIAS, ENTEROS, ENTRADAS, calcular_ahorros, calcular_categorias, \
+    precio_equilibrio_iflexo
+
+# Entradas fijas y los ahorros que muestra la versión original de main.py con ellas
+ENTRADAS_FIJAS = dict(
+    consumo_planchas=1200, costo_actual_plancha=0.7, costo_iflexo_plancha=0.9,
+    num_trabajos_ajuste=800, valor_hora_ajuste=150.3, tiempo_ajuste_actual=45, diferencia_tiempo_ajuste=13,
+    metros_material_actual=120.5, costo_material=0.3, diferencia_material=27.3,
+    tiempo_prensa_impresion=4000.0, valor_hora_impresion=120.0, velocidad_actual=150.0, velocidad_iflexo=173.3,
+    num_trabajos_parada=800, valor_hora_parada=140.1, tiempo_parada=7, paradas_actual=3.3, paradas_iflexo=1.7,
+    consumo_tinta_blanca=3000.0, costo_tinta_blanca=9.7, reduccion_consumo_blanca=13.0,
+    consumo_tinta=5000.0, costo_tinta=11.3, reduccion_consumo=17.1,
+)
+AHORROS_MAIN_ORIGINAL = {
+    'planchas': -240.0,
+    'velocidad_ajuste': 33947.16,
+    'velocidad_impresion': 74560.00000000003,
+    'tinta_blanca': 3782.9999999999995,
+    'tintas': 9661.5,
+    'plancha_parada': 20921.600000000002,
+}
+
+
+def _ahorros_main_original(e):
+    """Las fórmulas de cada pestaña de la versión original de main.py, escalares y con `all([...])`."""
+    ahorros = dict.fromkeys(AHORROS, 0)
+    if all([e['consumo_planchas'], e['costo_actual_plancha'], e['costo_iflexo_plancha']]):
+        ahorros['planchas'] = (e['consumo_planchas'] * e['costo_actual_plancha']
+                               - e['consumo_planchas'] * e['costo_iflexo_plancha'])
+    if all([e[k] for k in CATEGORIAS['velocidad_ajuste']]):
+        tiempo_ahorrado = e['diferencia_tiempo_ajuste'] * e['num_trabajos_ajuste']
+        ahorro_tiempo = (tiempo_ahorrado / 60) * e['valor_hora_ajuste']
+        metros_iflexo = e['metros_material_actual'] * (1 - e['diferencia_material'] / 100)
+        metros = (e['metros_material_actual'] - metros_iflexo) * e['num_trabajos_ajuste']
+        ahorros['velocidad_ajuste'] = ahorro_tiempo + metros * e['costo_material']
+    if all([e[k] for k in CATEGORIAS['velocidad_impresion']]):
+        mejora = ((e['velocidad_iflexo'] - e['velocidad_actual']) / e['velocidad_actual']) * 100
+        ahorros['velocidad_impresion'] = e['tiempo_prensa_impresion'] * e['valor_hora_impresion'] * (mejora / 100)
+    if all([e[k] for k in CATEGORIAS['plancha_parada']]):
+        actual = e['tiempo_parada'] * e['paradas_actual'] * e['num_trabajos_parada']
+        iflexo = e['tiempo_parada'] * e['paradas_iflexo'] * e['num_trabajos_parada']
+        ahorros['plancha_parada'] = ((actual - iflexo) / 60) * e['valor_hora_parada']
+    if all([e['consumo_tinta_blanca'], e['costo_tinta_blanca'], e['reduccion_consumo_blanca']]):
+        ahorros['tinta_blanca'] = (e['consumo_tinta_blanca'] * e['costo_tinta_blanca']
+                                   * (e['reduccion_consumo_blanca'] / 100))
+    if all([e['consumo_tinta'], e['costo_tinta'], e['reduccion_consumo']]):
+        ahorros['tintas'] = e['consumo_tinta'] * e['costo_tinta'] * (e['reduccion_consumo'] / 100)
+    return ahorros
+
+
+def _escenario(rng, ceros=0.0):
+    escenario = {}
+    for clave in ENTRADAS:
+        valor = 0 if rng.random() < ceros else rng.uniform(0.1, 100.0 if 'diferencia_material' == clave
+                                                           or clave.startswith('reduccion') else 5000.0)
+        escenario[clave] = int(valor) if clave in ENTEROS else valor
+    return escenario
+
+
+def test_entradas_fijas_igual_que_main_original():
+    fila = calcular_ahorros(ENTRADAS_FIJAS).iloc[0]
+    for categoria, esperado in AHORROS_MAIN_ORIGINAL.items():
+        assert fila[categoria] == pytest.approx(esperado, rel=1e-12)
+    assert fila['total'] == pytest.approx(sum(AHORROS_MAIN_ORIGINAL.values()), rel=1e-12)
+
+
+@pytest.mark.parametrize('ceros', [0.0, 0.1, 0.5])
+def test_vectorizado_igual_que_formulas_escalares(ceros):
+    rng = random.Random(ceros)
+    escenarios = [_escenario(rng, ceros) for _ in range(500)]
+    columnas = {k: np.array([e[k] for e in escenarios], dtype=float) for k in ENTRADAS}
+    resultado = calcular_ahorros(columnas)
+    for i, escenario in enumerate(escenarios):
+        esperado = _ahorros_main_original(escenario)
+        for categoria in AHORROS:
+            assert resultado[categoria].iloc[i] == pytest.approx(esperado[categoria], rel=1e-12, abs=1e-9)
+        assert resultado['total'].iloc[i] == pytest.approx(sum(esperado.values()), rel=1e-12, abs=1e-9)
+
+
+@pytest.mark.parametrize('categoria', list(CATEGORIAS))
+def test_una_entrada_en_cero_anula_la_categoria(categoria):
+    for clave in CATEGORIAS[categoria]:
+        entradas = {**ENTRADAS_FIJAS, clave: 0}
+        resultado = calcular_categorias(entradas)[categoria]
+        assert float(resultado['ahorro']) == 0.0
+        intermedios = [v for k, v in resultado.items() if k != 'ahorro']
+        assert all(math.isnan(float(v)) for v in intermedios)
+
+
+def test_entradas_ausentes_valen_cero():
+    resultado = calcular_ahorros({'consumo_tinta': 10.0, 'costo_tinta': 2.0, 'reduccion_consumo': 50.0})
+    assert resultado['tintas'].iloc[0] == 10.0
+    assert resultado['total'].iloc[0] == 10.0
+
+
+def test_division_por_cero_no_avisa():
+    # velocidad_actual en cero divide, pero la categoría queda inactiva
+    with np.errstate(all='raise'):
+        resultado = calcular_categorias({**ENTRADAS_FIJAS, 'velocidad_actual': np.array([0.0, 150.0])})
+    assert resultado['velocidad_impresion']['ahorro'][0] == 0.0
+    assert resultado['velocidad_impresion']['ahorro'][1] == pytest.approx(74560.0)
+
+
+def test_precio_equilibrio_lleva_el_total_al_objetivo():
+    objetivo = 100_000.0
+    precio = float(precio_equilibrio_iflexo(ENTRADAS_FIJAS, objetivo))
+    total = calcular_ahorros({**ENTRADAS_FIJAS, 'costo_iflexo_plancha': precio})['total'].iloc[0]
+    assert total == pytest.approx(objetivo)
@@ -0,0 +1,53 @@
+import os
+
+import pytest
+
+from calculos import CATEGORIAS
+from carga_sesiones import _runtime_compartido
+
+
+def test_runtime_compartido_restaura_streamlit_al_salir():
+    from streamlit.runtime import Runtime
+    from streamlit.testing.v1 import app_test, local_script_runner
+
+    def actuales():
+        return (app_test.ScriptCache, local_script_runner.ScriptCache,
+                Runtime.__dict__['instance'], Runtime.__dict__['exists'])
+
+    originales = actuales()
+    with pytest.raises(RuntimeError):
+        with _runtime_compartido():
+            assert local_script_runner.ScriptCache() is app_test.ScriptCache()
+            with _runtime_compartido():
+                pass
+            assert Runtime._compartido_carga
+            raise RuntimeError
+    assert actuales() == originales
+    assert not hasattr(Runtime, '_compartido_carga')
+
+
+def test_sesiones_contra_main(monkeypatch):
+    from streamlit.runtime import Runtime
+
+    from carga_sesiones import RUTA_APP, ejecutar
+
+    instance = Runtime.__dict__['instance']
+    monkeypatch.chdir(os.path.dirname(RUTA_APP))
+    resultado = ejecutar([1, 2], umbral_ms=1e9, pausa=0.0, timeout=60.0, espera_pdf=120.0)
+
+    assert resultado['sesiones_limite'] is None
+    assert [n['sesiones'] for n in resultado['niveles']] == [1, 2]
+    entradas = sum(len(claves) for claves in CATEGORIAS.values())
+    for nivel in resultado['niveles']:
+        assert nivel['errores'] == 0, nivel['mensajes_error']
+        por_interaccion = nivel['por_interaccion']
+        assert por_interaccion['carga']['n'] == nivel['sesiones']
+        assert por_interaccion['pdf_listo']['n'] == nivel['sesiones']
+        for categoria, claves in CATEGORIAS.items():
+            assert por_interaccion[categoria]['n'] == len(claves) * nivel['sesiones']
+        # pdf_listo es espera de los workers: no cuenta como interacción
+        assert nivel['n'] == sum(p['n'] for nombre, p in por_interaccion.items() if nombre != 'pdf_listo')
+        assert nivel['n'] >= (entradas + 2) * nivel['sesiones']
+        assert 0 < nivel['p50_ms'] <= nivel['p95_ms'] <= nivel['p99_ms'] <= nivel['max_ms']
+        assert nivel['interacciones_por_segundo'] > 0 and nivel['cpu_por_sesion_s'] > 0
+    assert Runtime.__dict__['instance'] is instance
@@ -0,0 +1,32 @@
+from escenarios import AlmacenEscenarios
+
+from test_calculos import AHORROS_MAIN_ORIGINAL, ENTRADAS_FIJAS
+
+
+def test_guardar_y_cargar(tmp_path):
+    almacen = AlmacenEscenarios(str(tmp_path / 'escenarios.db'))
+    assert almacen.vacio()
+    id_escenario = almacen.guardar('Cliente A', ENTRADAS_FIJAS, AHORROS_MAIN_ORIGINAL, fecha='2024-01-01T00:00:00')
+    entradas, ahorros = almacen.cargar(id_escenario)
+    assert entradas == ENTRADAS_FIJAS
+    assert isinstance(entradas['consumo_planchas'], int)
+    assert ahorros == AHORROS_MAIN_ORIGINAL
+    assert almacen.cargar(id_escenario + 1) is None
+    almacen.cerrar()
+
+
+def test_consultas_por_cliente_total_y_fecha(tmp_path):
+    almacen = AlmacenEscenarios(str(tmp_path / 'escenarios.db'))
+    escenarios = [(f'C{i % 3}', {'consumo_planchas': i}, {'planchas': float(i)}) for i in range(10)]
+    assert almacen.guardar_lote(escenarios[:5], fecha='2024-01-01T00:00:00') == 5
+    assert almacen.guardar_lote(escenarios[5:], fecha='2024-02-01T00:00:00') == 5
+    assert almacen.cantidad() == 10
+
+    assert almacen.cargar(almacen.ultimo('C0'))[0]['consumo_planchas'] == 9
+    assert list(almacen.mejores(3)['total']) == [9.0, 8.0, 7.0]
+    assert list(almacen.mejores(2, hasta='2024-01-31')['total']) == [4.0, 3.0]
+    assert sorted(almacen.por_total(2.0, 4.0)['total']) == [2.0, 3.0, 4.0]
+    assert len(almacen.por_fecha(desde='2024-02-01')) == 5
+    assert set(almacen.historial('C1')['cliente']) == {'C1'}
+    assert almacen.ultimo('nadie') is None
+    almacen.cerrar()
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import batch
+from calculos import calcular_plancha_parada, calcular_velocidad_impresion
+from flota import RESULTADOS, agregar_flota, calcular_flota, combinar_agregados, tabla_flota
+
+
+def _prensas(n=1000, semilla=0):
+    rng = np.random.default_rng(semilla)
+    return pd.DataFrame({
+        'planta': rng.choice(['Norte', 'Sur'], n),
+        'tipo': rng.choice(['CI', 'Stack'], n),
+        'tiempo_prensa_impresion': rng.uniform(1000, 5000, n),
+        'valor_hora': rng.uniform(50, 200, n),
+        'velocidad_actual': rng.uniform(100, 200, n),
+        'velocidad_iflexo': rng.uniform(150, 250, n),
+        'num_trabajos': rng.integers(0, 1000, n),
+        'tiempo_parada': rng.uniform(5, 10, n),
+        'paradas_actual': rng.uniform(2, 4, n),
+        'paradas_iflexo': rng.uniform(1, 2, n),
+    })
+
+
+def test_por_prensa_igual_que_las_pestanas():
+    prensas = _prensas(50)
+    resultados = calcular_flota(tabla_flota(prensas))
+    for i, p in prensas.iterrows():
+        velocidad = calcular_velocidad_impresion(
+            p['tiempo_prensa_impresion'], p['valor_hora'], p['velocidad_actual'], p['velocidad_iflexo'])
+        paradas = calcular_plancha_parada(
+            p['num_trabajos'], p['valor_hora'], p['tiempo_parada'], p['paradas_actual'], p['paradas_iflexo'])
+        assert resultados.loc[i, 'total'] == pytest.approx(float(velocidad['ahorro'] + paradas['ahorro']))
+
+
+def test_agregado_por_bloques_igual_que_todo_junto():
+    resultados = calcular_flota(tabla_flota(_prensas()))
+    completo = agregar_flota(resultados, ['planta', 'tipo'])
+    bloques = [agregar_flota(resultados.iloc[i:i + 300], ['planta', 'tipo']) for i in range(0, 1000, 300)]
+    combinado = combinar_agregados(bloques)
+    assert combinado['prensas'].sum() == 1000
+    pd.testing.assert_frame_equal(
+        combinado.sort_index(), completo.sort_index(), check_dtype=False, check_index_type=False,
+        check_categorical=False)
+
+
+def test_batch_flota(tmp_path, capsys):
+    entrada, salida, resumen = tmp_path / 'prensas.csv', tmp_path / 'salida.parquet', tmp_path / 'resumen.csv'
+    prensas = _prensas()
+    prensas.to_csv(entrada, index=False)
+    batch.main([str(entrada), str(salida), '--flota', '--agrupar', 'planta', '--chunksize', '300',
+                '--resumen', str(resumen)])
+    por_prensa = pd.read_parquet(salida)
+    assert len(por_prensa) == 1000
+    assert set(RESULTADOS) <= set(por_prensa.columns)
+    esperado = agregar_flota(calcular_flota(tabla_flota(prensas)), ['planta'])
+    obtenido = pd.read_csv(resumen, index_col='planta')
+    assert obtenido.loc['Norte', 'total'] == pytest.approx(esperado.loc['Norte', 'total'])
+    assert obtenido['prensas'].sum() == 1000
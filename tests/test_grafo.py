@@ -0,0 +1,46 @@
+import pytest
+
+from calculos import AHORROS, ENTRADAS, calcular_ahorros
+from grafo import grafo_ahorros
+from test_calculos import ENTRADAS_FIJAS
+
+
+def _grafo(entradas):
+    grafo = grafo_ahorros()
+    grafo.actualizar(entradas)
+    grafo.valor('total')
+    grafo.recalculados.clear()
+    return grafo
+
+
+def test_cambio_en_una_entrada_recalcula_solo_su_categoria():
+    grafo = _grafo(ENTRADAS_FIJAS)
+    assert grafo.actualizar({**ENTRADAS_FIJAS, 'costo_tinta': 20.0}) == ['costo_tinta']
+    total = grafo.valor('total')
+    assert grafo.recalculados == ['tintas', 'ahorro_tintas', 'total']
+    assert total == pytest.approx(calcular_ahorros({**ENTRADAS_FIJAS, 'costo_tinta': 20.0})['total'].iloc[0])
+
+
+def test_entradas_sin_cambios_no_recalculan_nada():
+    grafo = _grafo(ENTRADAS_FIJAS)
+    assert grafo.actualizar(dict(ENTRADAS_FIJAS)) == []
+    for nodo in ('total', *AHORROS):
+        grafo.valor(nodo)
+    assert grafo.recalculados == []
+
+
+def test_categoria_inactiva_con_nan_no_propaga():
+    # Con costo de tinta en cero la categoría no se calcula y sus métricas intermedias quedan en NaN
+    grafo = _grafo({k: 0.0 for k in ENTRADAS})
+    grafo.actualizar({'consumo_tinta': 5000.0})
+    grafo.valor('total')
+    assert grafo.recalculados == ['tintas']
+    assert grafo.valor('ahorro_tintas') == 0.0
+
+
+def test_valores_iguales_a_calcular_ahorros():
+    grafo = _grafo(ENTRADAS_FIJAS)
+    fila = calcular_ahorros(ENTRADAS_FIJAS).iloc[0]
+    for categoria in AHORROS:
+        assert grafo.valor(f"ahorro_{categoria}") == pytest.approx(fila[categoria], rel=1e-12)
+    assert grafo.valor('total') == pytest.approx(fila['total'], rel=1e-12)
@@ -0,0 +1,41 @@
+import os
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from calculos import precio_equilibrio_iflexo
+from test_calculos import ENTRADAS_FIJAS
+
+RUTA_APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'main.py')
+PRECIO_EQUILIBRIO = "Precio máximo de plancha iFlexo para el objetivo"
+OBJETIVO = 100000.0
+
+
+@pytest.fixture
+def app():
+    app = AppTest.from_file(RUTA_APP, default_timeout=60)
+    for clave, valor in {**ENTRADAS_FIJAS, 'objetivo_equilibrio': OBJETIVO}.items():
+        app.session_state[clave] = valor
+    return app.run()
+
+
+def _metrica(app, etiqueta):
+    return next(m.value for m in app.metric if m.label == etiqueta)
+
+
+def test_precio_de_equilibrio_sigue_a_otra_pestana(app):
+    assert not app.exception
+    esperado = float(precio_equilibrio_iflexo(ENTRADAS_FIJAS, OBJETIVO))
+    assert _metrica(app, PRECIO_EQUILIBRIO) == f"${esperado:,.2f} /cm²"
+
+    app.number_input(key='costo_tinta').set_value(20.0).run()
+    assert not app.exception
+    esperado = float(precio_equilibrio_iflexo({**ENTRADAS_FIJAS, 'costo_tinta': 20.0}, OBJETIVO))
+    assert _metrica(app, PRECIO_EQUILIBRIO) == f"${esperado:,.2f} /cm²"
+
+
+def test_rendimiento_muestra_solo_los_nodos_de_la_interaccion(app):
+    app.number_input(key='costo_tinta').set_value(20.0).run()
+    assert "nodos recalculados: tintas, ahorro_tintas, total ·" in app.sidebar.caption[0].value
+    app.run()
+    assert "nodos recalculados: ninguno ·" in app.sidebar.caption[0].value
@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+from metricas import PREFIJO, RegistroMetricas, _escapar
+
+HISTOGRAMA = f"{PREFIJO}_tramo_segundos"
+
+
+def _lineas(registro):
+    return [linea for linea in registro.texto_prometheus().splitlines() if not linea.startswith('#')]
+
+
+def test_buckets_acumulados_suma_y_cuenta():
+    registro = RegistroMetricas(limites=(0.1, 1.0))
+    for segundos in (0.05, 0.1, 0.5, 2.0):
+        registro.observar('pdf', segundos, reporte='individual')
+    assert _lineas(registro) == [
+        f'{HISTOGRAMA}_bucket{{tramo="pdf",reporte="individual",le="0.1"}} 2',
+        f'{HISTOGRAMA}_bucket{{tramo="pdf",reporte="individual",le="1"}} 3',
+        f'{HISTOGRAMA}_bucket{{tramo="pdf",reporte="individual",le="+Inf"}} 4',
+        f'{HISTOGRAMA}_sum{{tramo="pdf",reporte="individual"}} 2.65',
+        f'{HISTOGRAMA}_count{{tramo="pdf",reporte="individual"}} 4',
+    ]
+
+
+def test_bucket_inf_aunque_todo_entre_en_el_primero():
+    registro = RegistroMetricas(limites=(0.1,))
+    registro.observar('rerun', 0.01)
+    texto = registro.texto_prometheus()
+    assert f'# TYPE {HISTOGRAMA} histogram' in texto
+    assert f'{HISTOGRAMA}_bucket{{tramo="rerun",le="+Inf"}} 1' in texto
+    assert f'{HISTOGRAMA}_count{{tramo="rerun"}} 1' in texto
+
+
+def test_contadores_y_colectores():
+    registro = RegistroMetricas()
+    registro.contar('reportes', resultado='encolado')
+    registro.contar('reportes', 2, resultado='encolado')
+    registro.colector(lambda: [('iflexo_figuras', 'gauge', "Figuras en caché.", [({}, 3)])])
+    texto = registro.texto_prometheus()
+    assert f'# TYPE {PREFIJO}_reportes_total counter' in texto
+    assert f'{PREFIJO}_reportes_total{{resultado="encolado"}} 3' in texto
+    assert '# TYPE iflexo_figuras gauge\niflexo_figuras 3\n' in texto
+
+
+def test_escapar_etiquetas():
+    assert _escapar('a\\b"c\nd') == 'a\\\\b\\"c\\nd'
+    registro = RegistroMetricas()
+    registro.contar('errores', mensaje='ruta "C:\\x"\nfin')
+    assert f'{PREFIJO}_errores_total{{mensaje="ruta \\"C:\\\\x\\"\\nfin"}} 1' in registro.texto_prometheus()
+
+
+def test_tramo_registra_aunque_el_bloque_falle(tmp_path):
+    trazas = tmp_path / 'trazas.jsonl'
+    registro = RegistroMetricas(trazas=str(trazas))
+    with pytest.raises(ValueError):
+        with registro.tramo('calculo', nodo='total'):
+            with registro.tramo('calculo', nodo='tintas'):
+                raise ValueError
+
+    @registro.medido('pestana', pestana='resumen')
+    def falla():
+        raise KeyError
+
+    with pytest.raises(KeyError):
+        falla()
+    registro.desactivar_trazas()
+
+    histogramas = registro.histogramas()
+    for clave in (('calculo', (('nodo', 'total'),)), ('calculo', (('nodo', 'tintas'),)),
+                  ('pestana', (('pestana', 'resumen'),))):
+        assert histogramas[clave]['total'] == 1
+    interno, externo, decorado = [json.loads(linea) for linea in trazas.read_text().splitlines()]
+    assert (interno['nodo'], externo['nodo'], decorado['pestana']) == ('tintas', 'total', 'resumen')
+    assert interno['padre'] == externo['id'] and externo['padre'] is None and decorado['padre'] is None
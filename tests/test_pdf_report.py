@@ -0,0 +1,99 @@
+import math
+import struct
+from io import BytesIO
+
+import pypdf
+
+from calculos import AHORROS
+from pdf_report import _UnionPDF, generate_consolidated_report
+
+TEXTO = "Cliente 3 0 R stream"
+URI = "http://ejemplo/1 0 R stream"
+
+
+def _clientes(n):
+    def recorrer():
+        for i in range(n):
+            valor = math.nan if i == 3 else float((i * 37) % 11)
+            yield f"C{i}", {k: valor + j for j, k in enumerate(AHORROS)}
+    return recorrer
+
+
+def _textos(pdf):
+    lector = pypdf.PdfReader(pdf, strict=True)
+    return [pagina.extract_text() for pagina in lector.pages]
+
+
+def test_consolidado_por_partes_igual_que_en_una_sola(tmp_path):
+    entero, partes = BytesIO(), tmp_path / 'consolidado.pdf'
+    assert generate_consolidated_report(_clientes(23), entero, filas_por_pagina=5, paginas_por_parte=1000) == 23
+    assert generate_consolidated_report(_clientes(23), str(partes), filas_por_pagina=5, paginas_por_parte=4) == 23
+    textos = _textos(str(partes))
+    assert len(textos) == 1 + 5 + 23
+    assert textos == _textos(BytesIO(entero.getvalue()))
+
+
+def test_ranking_ordenado_con_nan_al_final(tmp_path):
+    ruta = tmp_path / 'consolidado.pdf'
+    generate_consolidated_report(_clientes(12), str(ruta), filas_por_pagina=20, paginas_por_parte=3)
+    lineas = _textos(str(ruta))[1].split('\n')
+    filas = [lineas[i:i + 4] for i in range(5, 5 + 4 * 12, 4)]
+    assert [f[0] for f in filas] == [str(i) for i in range(1, 13)]
+    totales = [float(f[2].strip('$').replace(',', '')) for f in filas]
+    assert totales[:-1] == sorted(totales[:-1], reverse=True)
+    assert filas[-1][1:3] == ['C3', '$nan']
+    # Empates en el orden del archivo; cada cliente apunta a su página: resumen, ranking y luego por fila
+    assert [f[1] for f in filas if f[2] == '$15.0'] == ['C0', 'C11']
+    assert all(f[3] == str(1 + 1 + int(f[1][1:]) + 1) for f in filas)
+
+
+def _pdf_con_flujos_de_objetos():
+    """PDF con tabla xref en un stream y la fuente y el vínculo dentro de un stream de objetos."""
+    contenido = f"BT /F1 12 Tf 20 100 Td ({TEXTO}) Tj ET".encode()
+    comprimidos = [b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+                   f"<< /Type /Annot /Subtype /Link /Rect [0 0 10 10] /A << /S /URI /URI ({URI}) >> >>".encode()]
+    indice, cuerpo = b"", b""
+    for numero, objeto in zip((5, 6), comprimidos):
+        indice += b"%d %d " % (numero, len(cuerpo))
+        cuerpo += objeto + b" "
+    objetos = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        2: b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        3: b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 200 200] /Contents 4 0 R "
+           b"/Resources << /Font << /F1 5 0 R >> >> /Annots [6 0 R] >>",
+        4: b"<< /Length %d >>\nstream\n%s\nendstream" % (len(contenido), contenido),
+        7: b"<< /Type /ObjStm /N 2 /First %d /Length %d >>\nstream\n%s\nendstream"
+           % (len(indice), len(indice + cuerpo), indice + cuerpo),
+    }
+    datos = b"%PDF-1.5\n"
+    posiciones = {}
+    for numero, objeto in objetos.items():
+        posiciones[numero] = len(datos)
+        datos += b"%d 0 obj\n%s\nendobj\n" % (numero, objeto)
+    posiciones[8] = len(datos)
+    filas = [struct.pack('>BIH', 0, 0, 65535)]
+    for numero in range(1, 9):
+        if numero in (5, 6):
+            filas.append(struct.pack('>BIH', 2, 7, numero - 5))
+        else:
+            filas.append(struct.pack('>BIH', 1, posiciones[numero], 0))
+    tabla = b"".join(filas)
+    datos += (b"8 0 obj\n<< /Type /XRef /Size 9 /W [1 4 2] /Root 1 0 R /Length %d >>\nstream\n%s\nendstream\nendobj\n"
+              % (len(tabla), tabla))
+    return datos + b"startxref\n%d\n%%%%EOF\n" % posiciones[8]
+
+
+def test_union_con_flujos_de_objetos_y_referencias_en_textos():
+    salida = BytesIO()
+    union = _UnionPDF(salida)
+    union.agregar(_pdf_con_flujos_de_objetos())
+    union.agregar(_pdf_con_flujos_de_objetos())
+    union.cerrar()
+
+    lector = pypdf.PdfReader(BytesIO(salida.getvalue()), strict=True)
+    assert len(lector.pages) == 2
+    for pagina in lector.pages:
+        assert pagina.extract_text() == TEXTO
+        vinculo, = pagina['/Annots']
+        assert vinculo.get_object()['/A']['/URI'] == URI
+        assert pagina['/Resources']['/Font']['/F1']['/BaseFont'] == '/Helvetica'
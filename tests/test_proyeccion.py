@@ -0,0 +1,54 @@
+import math
+
+import numpy as np
+import pytest
+
+from calculos import calcular_ahorros
+from proyeccion import RUBROS, proyectar_inversion, rubros_ahorro
+
+from test_calculos import ENTRADAS_FIJAS
+
+
+def test_rubros_suman_el_total_anual():
+    rubros = rubros_ahorro(ENTRADAS_FIJAS)
+    assert set(rubros) == set(RUBROS)
+    total = calcular_ahorros(ENTRADAS_FIJAS)['total'].iloc[0]
+    assert sum(float(v) for v in rubros.values()) == pytest.approx(total)
+
+
+def test_van_tir_y_recuperacion():
+    resultado = proyectar_inversion({'tinta': 60.0}, inversion=100.0, tasa_descuento=0.0, anios=2)
+    assert list(resultado['flujos'][0]) == [60.0, 60.0]
+    assert resultado['van'][0] == pytest.approx(20.0)
+    # 60/(1+r) + 60/(1+r)² = 100
+    tir = resultado['tir'][0]
+    assert 60 / (1 + tir) + 60 / (1 + tir) ** 2 == pytest.approx(100.0)
+    assert tir == pytest.approx(0.1306623863, abs=1e-8)
+    assert resultado['mes_recuperacion'][0] == 20.0
+
+
+def test_tir_vectorizada_y_sin_cambio_de_signo():
+    resultado = proyectar_inversion({'planchas': np.array([110.0, 50.0, 0.0])}, inversion=100.0, anios=1)
+    assert resultado['tir'][0] == pytest.approx(0.10)
+    assert resultado['tir'][1] == pytest.approx(-0.50)
+    assert math.isnan(resultado['tir'][2])
+    assert math.isnan(resultado['mes_recuperacion'][2])
+
+
+def test_escalamiento_compuesto():
+    resultado = proyectar_inversion({'material': 100.0}, anios=3, escalamiento={'material': 0.10})
+    assert resultado['flujos'][0] == pytest.approx([100.0, 110.0, 121.0])
+    assert resultado['mes_recuperacion'][0] == 0.0
+
+
+@pytest.mark.parametrize('escalamiento', [{'tinta': -1.0}, {'planchas': -1.5}, {'hora_prensa': np.array([0.0, -2.0])}])
+def test_rechaza_escalamiento_de_menos_cien_por_ciento(escalamiento):
+    with pytest.raises(ValueError, match="mayor que -100 %"):
+        proyectar_inversion({'tinta': 100.0}, inversion=50.0, escalamiento=escalamiento)
+
+
+def test_rechaza_horizonte_y_descuento_invalidos():
+    with pytest.raises(ValueError):
+        proyectar_inversion({'tinta': 100.0}, anios=11)
+    with pytest.raises(ValueError, match="descuento"):
+        proyectar_inversion({'tinta': 100.0}, tasa_descuento=-1.0)
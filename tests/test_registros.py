@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from calculos import ENTEROS, ENTRADAS
+from registros import AcumuladorRegistro, analizar_registro, entradas_desde_registro
+
+
+def _registro(n=5_000, semilla=0):
+    rng = np.random.default_rng(semilla)
+    return pd.DataFrame({
+        'minutos_ajuste': rng.normal(45.0, 8.0, n).round(1),
+        'paradas': rng.poisson(3.0, n).astype(float),
+        'metros_desperdicio': rng.uniform(80.0, 160.0, n),
+    })
+
+
+def test_por_bloques_igual_que_una_pasada():
+    registro = _registro()
+    entero = AcumuladorRegistro()
+    entero.agregar(registro)
+    bloques = AcumuladorRegistro()
+    for inicio in range(0, len(registro), 700):
+        bloques.agregar(registro.iloc[inicio:inicio + 700])
+
+    resumen, por_bloques = entero.resumen(), bloques.resumen()
+    pd.testing.assert_frame_equal(por_bloques[['trabajos', 'minimo', 'maximo']], resumen[['trabajos', 'minimo', 'maximo']])
+    np.testing.assert_allclose(por_bloques[['media', 'desvio']], resumen[['media', 'desvio']], rtol=1e-9)
+    for metrica, columna in {'ajuste': 'minutos_ajuste', 'paradas': 'paradas', 'desperdicio': 'metros_desperdicio'}.items():
+        assert resumen.loc[metrica, 'media'] == pytest.approx(registro[columna].mean(), rel=1e-12)
+        assert resumen.loc[metrica, 'desvio'] == pytest.approx(registro[columna].std(ddof=0), rel=1e-9)
+        # Con la muestra más grande que el registro, los percentiles son exactos
+        assert resumen.loc[metrica, 'P50'] == pytest.approx(np.percentile(registro[columna], 50))
+
+
+def test_columna_casi_vacia_sin_valores_en_la_muestra():
+    registro = _registro(2_000)
+    registro['paradas'] = np.nan
+    registro.loc[0, 'paradas'] = 4.0
+    acumulador = AcumuladorRegistro(tamano_muestra=10, semilla=1)
+    acumulador.agregar(registro)
+    assert np.isnan(acumulador.muestra['paradas']).all()
+    fila = acumulador.resumen().loc['paradas']
+    assert fila['trabajos'] == 1 and fila['media'] == 4.0
+    assert np.isnan(fila[['P10', 'P50', 'P90']].astype(float)).all()
+
+
+def test_entradas_desde_registro_con_columnas_propias(tmp_path):
+    ruta = tmp_path / 'registro.csv'
+    registro = _registro(1_000).rename(columns={'minutos_ajuste': 'setup', 'metros_desperdicio': 'merma'})
+    registro.to_csv(ruta, index=False)
+
+    acumulador = analizar_registro(str(ruta), columnas={'ajuste': 'setup', 'paradas': 'paradas', 'desperdicio': 'merma'},
+                                   chunksize=300)
+    entradas = entradas_desde_registro(acumulador, anios=0.5)
+    assert set(entradas) <= set(ENTRADAS)
+    assert entradas == {
+        'num_trabajos_ajuste': 2_000,
+        'num_trabajos_parada': 2_000,
+        'tiempo_ajuste_actual': int(round(registro['setup'].mean())),
+        'paradas_actual': pytest.approx(registro['paradas'].mean()),
+        'metros_material_actual': pytest.approx(registro['merma'].mean()),
+    }
+    assert all(isinstance(entradas[k], int) for k in entradas if k in ENTEROS)
+
+
+def test_entradas_solo_de_las_metricas_presentes():
+    acumulador = AcumuladorRegistro(columnas={'paradas': 'paradas'})
+    acumulador.agregar(_registro(100))
+    assert set(entradas_desde_registro(acumulador)) == {'num_trabajos_ajuste', 'num_trabajos_parada', 'paradas_actual'}
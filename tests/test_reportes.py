@@ -0,0 +1,68 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import reportes
+from metricas import METRICAS
+from reportes import ColaReportes, DESCONOCIDO, ERROR, LISTO, PENDIENTE, EN_PROCESO, _generar
+from test_calculos import AHORROS_MAIN_ORIGINAL, ENTRADAS_FIJAS
+
+
+def test_generar_devuelve_el_uso_del_cache_de_graficos():
+    _, _, primera = _generar(AHORROS_MAIN_ORIGINAL, ENTRADAS_FIJAS, None)
+    _, _, segunda = _generar(AHORROS_MAIN_ORIGINAL, ENTRADAS_FIJAS, None)
+    graficos = primera['aciertos'] + primera['fallos']
+    assert graficos > 1
+    assert segunda == {'aciertos': graficos, 'fallos': 0}
+
+
+def _esperar(cola, trabajo, timeout=120.0):
+    limite = time.monotonic() + timeout
+    while cola.estado(trabajo) in (PENDIENTE, EN_PROCESO):
+        assert time.monotonic() < limite, "el reporte no terminó a tiempo"
+        time.sleep(0.05)
+    return cola.estado(trabajo)
+
+
+def test_cola_exporta_el_cache_de_graficos_del_worker():
+    METRICAS.reiniciar()
+    cola = ColaReportes(max_workers=1)
+    try:
+        trabajo = cola.enviar(AHORROS_MAIN_ORIGINAL, ENTRADAS_FIJAS)
+        assert _esperar(cola, trabajo) == LISTO
+    finally:
+        cola.cerrar(esperar=True)
+    contadores = METRICAS.contadores()
+    assert contadores[('cache_graficos_pdf', (('resultado', 'fallos'),))] >= 1
+    assert ('cache_graficos_pdf', (('resultado', 'aciertos'),)) in contadores
+    assert 'iflexo_cache_graficos_pdf_total{resultado="fallos"}' in METRICAS.texto_prometheus()
+    METRICAS.reiniciar()
+
+
+def test_futuro_se_resuelve_con_el_pdf_ya_guardado():
+    cola = ColaReportes(max_workers=1)
+    try:
+        trabajo = cola.enviar(AHORROS_MAIN_ORIGINAL, ENTRADAS_FIJAS)
+        assert cola.futuro(trabajo).result(timeout=120) == trabajo
+        assert cola.resultado(trabajo).startswith(b'%PDF')
+        assert cola.futuro(trabajo) is None
+    finally:
+        cola.cerrar(esperar=True)
+
+
+def test_errores_acotados(monkeypatch):
+    def falla(ahorros, datos_entrada, proyeccion):
+        raise ValueError(f"entrada inválida {ahorros['planchas']:g}")
+
+    monkeypatch.setattr(reportes, '_generar', falla)
+    cola = ColaReportes(max_workers=1, max_errores=3)
+    # Los workers del pool de procesos no verían el monkeypatch
+    cola._pool.shutdown()
+    cola._pool = ThreadPoolExecutor(max_workers=1)
+    try:
+        trabajos = [cola.enviar({**AHORROS_MAIN_ORIGINAL, 'planchas': float(i)}) for i in range(5)]
+        assert [_esperar(cola, t) for t in trabajos[2:]] == [ERROR] * 3
+        assert [cola.error(t) for t in trabajos[2:]] == [f"entrada inválida {i}" for i in range(2, 5)]
+        assert [cola.estado(t) for t in trabajos[:2]] == [DESCONOCIDO] * 2
+        assert len(cola._errores) == 3
+    finally:
+        cola.cerrar(esperar=True)
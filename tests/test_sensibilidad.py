@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from calculos import ENTRADAS, ETIQUETAS, MAXIMOS, calcular_ahorros
+from sensibilidad import barrido_sensibilidad
+from test_calculos import ENTRADAS_FIJAS
+
+
+def _total(entradas):
+    return calcular_ahorros(entradas)['total'].iloc[0]
+
+
+def test_extremos_iguales_a_calcular_ahorros():
+    barrido = barrido_sensibilidad(ENTRADAS_FIJAS, variacion=20.0)
+    assert sorted(barrido.index) == sorted(ENTRADAS)
+    for clave, fila in barrido.iterrows():
+        assert fila['etiqueta'] == ETIQUETAS[clave]
+        assert fila['bajo'] == pytest.approx(_total({**ENTRADAS_FIJAS, clave: ENTRADAS_FIJAS[clave] * 0.8}), rel=1e-12)
+        assert fila['alto'] == pytest.approx(_total({**ENTRADAS_FIJAS, clave: ENTRADAS_FIJAS[clave] * 1.2}), rel=1e-12)
+        assert fila['minimo'] <= min(fila['bajo'], fila['alto']) and fila['maximo'] >= max(fila['bajo'], fila['alto'])
+
+
+def test_valores_recortados_a_los_maximos():
+    entradas = {**ENTRADAS_FIJAS, 'reduccion_consumo': 90.0}
+    barrido = barrido_sensibilidad(entradas, claves=list(MAXIMOS), variacion=50.0)
+    fila = barrido.loc['reduccion_consumo']
+    assert fila['alto'] == pytest.approx(_total({**entradas, 'reduccion_consumo': MAXIMOS['reduccion_consumo']}))
+    assert fila['bajo'] == pytest.approx(_total({**entradas, 'reduccion_consumo': 45.0}))
+
+
+def test_ordenado_por_impacto():
+    barrido = barrido_sensibilidad(ENTRADAS_FIJAS, variacion=30.0, pasos=7)
+    impactos = barrido['impacto'].to_numpy()
+    assert (np.diff(impactos) <= 0).all()
+    np.testing.assert_allclose(impactos, barrido['maximo'] - barrido['minimo'])
+    # Una entrada que no mueve el total queda al final con impacto cero
+    barrido = barrido_sensibilidad({**ENTRADAS_FIJAS, 'costo_tinta': 0.0}, claves=['consumo_tinta', 'velocidad_iflexo'])
+    assert list(barrido.index) == ['velocidad_iflexo', 'consumo_tinta']
+    assert barrido.loc['consumo_tinta', 'impacto'] == 0.0
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from calculos import AHORROS, calcular_ahorros
+from simulacion import _Acumulador, distribuciones_relativas, simular_ahorros
+from test_calculos import ENTRADAS_FIJAS
+
+INCIERTAS = ['velocidad_iflexo', 'reduccion_consumo', 'costo_tinta', 'tiempo_parada']
+
+
+def _distribuciones(tipo="Triangular", variacion=10.0):
+    return distribuciones_relativas(ENTRADAS_FIJAS, INCIERTAS, tipo, variacion)
+
+
+@pytest.mark.parametrize('tipo', ["Triangular", "Normal", "Uniforme"])
+def test_misma_semilla_mismo_resultado(tipo):
+    a = simular_ahorros(ENTRADAS_FIJAS, _distribuciones(tipo), n_muestras=20_000, semilla=7, tamano_bloque=6_000)
+    b = simular_ahorros(ENTRADAS_FIJAS, _distribuciones(tipo), n_muestras=20_000, semilla=7, tamano_bloque=6_000)
+    c = simular_ahorros(ENTRADAS_FIJAS, _distribuciones(tipo), n_muestras=20_000, semilla=8, tamano_bloque=6_000)
+    assert a.equals(b)
+    assert not a.equals(c)
+
+
+def test_forma_y_orden_de_percentiles():
+    resultado = simular_ahorros(ENTRADAS_FIJAS, _distribuciones(), n_muestras=10_000, semilla=0,
+                                percentiles=(5, 10, 50, 90, 95))
+    assert list(resultado.index) == list(AHORROS) + ['total']
+    assert list(resultado.columns) == ['P5', 'P10', 'P50', 'P90', 'P95', 'media', 'desviacion']
+    percentiles = resultado[['P5', 'P10', 'P50', 'P90', 'P95']].to_numpy()
+    assert (np.diff(percentiles, axis=1) >= 0).all()
+    assert resultado.loc['total', 'P10'] < resultado.loc['total', 'P90']
+
+
+def test_sin_variacion_da_el_ahorro_determinista():
+    resultado = simular_ahorros(ENTRADAS_FIJAS, _distribuciones("Normal", 0.0), n_muestras=5_000, semilla=0,
+                                tamano_bloque=2_000)
+    fila = calcular_ahorros(ENTRADAS_FIJAS).iloc[0]
+    for nombre in list(AHORROS) + ['total']:
+        assert resultado.loc[nombre, ['P10', 'P50', 'P90', 'media']].to_numpy() == pytest.approx(fila[nombre])
+        assert resultado.loc[nombre, 'desviacion'] == pytest.approx(0.0, abs=1e-6)
+
+
+def test_acumulador_por_bloques_igual_que_una_pasada():
+    datos = np.random.default_rng(0).normal(100.0, 15.0, (3, 10_000))
+    acumulador = _Acumulador(3, 10_000, np.random.default_rng(1))
+    for inicio in range(0, 10_000, 3_000):
+        acumulador.agregar(datos[:, inicio:inicio + 3_000])
+    np.testing.assert_allclose(acumulador.media, datos.mean(axis=1), rtol=1e-12)
+    np.testing.assert_allclose(acumulador.desviacion(), datos.std(axis=1, ddof=1), rtol=1e-12)
+    # Sin pasarse de la reserva se conservan todas las muestras
+    assert np.array_equal(np.sort(acumulador.muestras, axis=1), np.sort(datos, axis=1))
+
+
+def test_reserva_acotada_aproxima_los_percentiles():
+    exacto = simular_ahorros(ENTRADAS_FIJAS, _distribuciones(), n_muestras=60_000, semilla=1, tamano_bloque=7_000)
+    reservado = simular_ahorros(ENTRADAS_FIJAS, _distribuciones(), n_muestras=60_000, semilla=1, tamano_bloque=7_000,
+                                reserva=15_000)
+    np.testing.assert_allclose(reservado[['media', 'desviacion']], exacto[['media', 'desviacion']], rtol=1e-9)
+    total = exacto.loc['total']
+    for columna in ('P10', 'P50', 'P90'):
+        assert reservado.loc['total', columna] == pytest.approx(total[columna], abs=0.05 * total['desviacion'])
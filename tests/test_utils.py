@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import batch
+from calculos import ENTRADAS
+from registros import analizar_registro
+from utils import ESQUEMA_ENTRADAS, export_chunks, iter_file
+
+# Primer bloque de lectura de CSV de pyarrow, del que infiere los tipos
+BLOQUE_LECTURA = 1 << 20
+
+
+def _clientes(n=1000, semilla=0):
+    rng = np.random.default_rng(semilla)
+    return pd.DataFrame({clave: rng.uniform(1, 100, n).round(2) for clave in ENTRADAS})
+
+
+def _csv_decimal_tardio(ruta, columnas):
+    """CSV con solo enteros en el primer bloque de lectura y un decimal en la última fila."""
+    filas = BLOQUE_LECTURA // (2 * len(columnas)) + 1000
+    datos = pd.DataFrame({c: np.full(filas, 2) for c in columnas}).astype(object)
+    datos.iloc[-1, 0] = 150.5
+    datos.to_csv(ruta, index=False)
+    assert ruta.stat().st_size > BLOQUE_LECTURA
+    return filas
+
+
+@pytest.mark.parametrize('extension, formato, compresion', [
+    ('.csv', "CSV", None),
+    ('.csv.gz', "CSV", 'gzip'),
+    ('.csv.zst', "CSV", 'zstd'),
+    ('.parquet', "Parquet", None),
+    ('.xlsx', "Excel", None),
+])
+def test_ida_y_vuelta(tmp_path, extension, formato, compresion):
+    clientes = _clientes()
+    ruta = tmp_path / f'clientes{extension}'
+    bloques = [clientes.iloc[i:i + 300] for i in range(0, len(clientes), 300)]
+    assert export_chunks(bloques, str(ruta), formato, compresion) == len(clientes)
+
+    leidos = list(iter_file(str(ruta), chunksize=400, esquema=ESQUEMA_ENTRADAS))
+    assert [len(b) for b in leidos] == [400, 400, 200]
+    pd.testing.assert_frame_equal(pd.concat(leidos, ignore_index=True), clientes)
+
+
+def test_columnas_ausentes_quedan_vacias(tmp_path):
+    ruta = tmp_path / 'clientes.csv'
+    export_chunks(_clientes(10)[['consumo_planchas']], str(ruta), "CSV")
+    bloque, = iter_file(str(ruta), columnas=['consumo_planchas', 'costo_material'], esquema=ESQUEMA_ENTRADAS)
+    assert list(bloque.columns) == ['consumo_planchas', 'costo_material']
+    assert bloque['costo_material'].dtype == 'float64' and bloque['costo_material'].isna().all()
+
+
+def test_decimal_despues_del_primer_bloque(tmp_path):
+    ruta = tmp_path / 'clientes.csv'
+    filas = _csv_decimal_tardio(ruta, ENTRADAS)
+    leidos = pd.concat(iter_file(str(ruta), chunksize=10_000, esquema=ESQUEMA_ENTRADAS))
+    assert len(leidos) == filas and (leidos.dtypes == 'float64').all()
+    assert leidos[ENTRADAS[0]].iloc[-1] == 150.5
+
+
+def test_batch_con_decimal_despues_del_primer_bloque(tmp_path):
+    entrada, salida = tmp_path / 'clientes.csv', tmp_path / 'resultados.parquet'
+    filas = _csv_decimal_tardio(entrada, ENTRADAS)
+    batch.main([str(entrada), str(salida), '--chunksize', '10000'])
+    resultados = pd.read_parquet(salida)
+    assert len(resultados) == filas
+    assert resultados[ENTRADAS[0]].iloc[-1] == 150.5
+
+
+def test_registro_con_decimal_despues_del_primer_bloque(tmp_path):
+    ruta = tmp_path / 'registro.csv'
+    filas = _csv_decimal_tardio(ruta, ['minutos_ajuste', 'paradas', 'metros_desperdicio'])
+    acumulador = analizar_registro(str(ruta), chunksize=10_000)
+    assert acumulador.trabajos == filas
+    assert acumulador.metricas['ajuste']['maximo'] == 150.5
+
+
+@pytest.mark.parametrize('tipo, traza', [("Líneas", 'scattergl'), ("Dispersión", 'scattergl'), ("Barras", 'bar')])
+def test_webgl_segun_los_puntos_originales(tipo, traza):
+    from utils import MAX_PUNTOS_LINEA, UMBRAL_WEBGL, generate_plot
+
+    serie = pd.DataFrame({'x': np.arange(UMBRAL_WEBGL * 2), 'y': np.sin(np.arange(UMBRAL_WEBGL * 2) / 50)})
+    figura = generate_plot(serie, tipo, 'x', 'y')
+    assert figura.data[0].type == traza
+    if tipo == "Líneas":
+        assert len(figura.data[0].x) == MAX_PUNTOS_LINEA
@@ -1,36 +1,327 @@
+import numpy as np
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+import io
 from io import BytesIO
 
-def load_file(uploaded_file):
-    """Carga el archivo subido en un DataFrame de pandas."""
+from cache_graficos import cache_grafico
+from calculos import ENTRADAS
+
+# Compresión de CSV según la extensión del archivo
+COMPRESIONES_CSV = {
+    '.csv': None,
+    '.csv.gz': 'gzip',
+    '.csv.zst': 'zstd',
+    '.csv.zstd': 'zstd',
+}
+
+# Esquema explícito de las entradas de la calculadora: todas numéricas en float64
+ESQUEMA_ENTRADAS = {clave: 'float64' for clave in ENTRADAS}
+
+def _formato(nombre):
+    """Devuelve el formato de entrada según la extensión del archivo."""
+    if nombre.endswith(tuple(COMPRESIONES_CSV)):
+        return 'csv'
+    elif nombre.endswith(('.xls', '.xlsx')):
+        return 'excel'
+    elif nombre.endswith('.parquet'):
+        return 'parquet'
+    else:
+        raise ValueError("Formato de archivo no soportado")
+
+def _compresion(nombre):
+    for extension, compresion in COMPRESIONES_CSV.items():
+        if extension != '.csv' and nombre.endswith(extension):
+            return compresion
+    return None
+
+def _pyarrow():
+    """Módulo pyarrow si está instalado; sin él se usa pandas."""
+    try:
+        import pyarrow
+    except ImportError:
+        return None
+    return pyarrow
+
+def _tipar(df, columnas=None, esquema=None):
+    """Deja solo las columnas pedidas (las ausentes quedan vacías) y aplica el esquema."""
+    if columnas is not None:
+        df = df.reindex(columns=list(columnas))
+    if esquema:
+        tipos = {c: t for c, t in esquema.items() if c in df.columns and df[c].dtype != t}
+        if tipos:
+            df = df.astype(tipos)
+    return df
+
+def _opciones_csv(pa, columnas, esquema):
+    import pyarrow.csv as pacsv
+
+    tipos = {c: pa.type_for_alias(t) for c, t in (esquema or {}).items()
+             if columnas is None or c in columnas}
+    lectura = pacsv.ReadOptions()
+    conversion = pacsv.ConvertOptions(
+        column_types=tipos,
+        include_columns=list(columnas) if columnas is not None else None,
+        include_missing_columns=True
+    )
+    return lectura, conversion
+
+def _leer_csv(archivo, nombre, columnas, esquema):
+    pa = _pyarrow()
+    if pa is None:
+        return pd.read_csv(archivo, compression=_compresion(nombre), dtype=esquema,
+                           usecols=_filtro(columnas))
+    import pyarrow.csv as pacsv
+
+    lectura, conversion = _opciones_csv(pa, columnas, esquema)
+    tabla = pacsv.read_csv(pa.input_stream(archivo, compression=_compresion(nombre)),
+                           read_options=lectura, convert_options=conversion)
+    return _a_pandas(pa, tabla)
+
+def _a_pandas(pa, tabla):
+    # Columnas ausentes o sin ningún valor llegan como tipo nulo; quedan como float64 vacío, igual que en pandas
+    for i, campo in enumerate(tabla.schema):
+        if pa.types.is_null(campo.type):
+            tabla = tabla.set_column(i, campo.name, tabla.column(i).cast(pa.float64()))
+    return tabla.to_pandas(split_blocks=True, self_destruct=True)
+
+def _filtro(columnas):
+    if columnas is None:
+        return None
+    incluidas = set(columnas)
+    return lambda columna: columna in incluidas
+
+def load_file(uploaded_file, columnas=None, esquema=None):
+    """Carga el archivo subido (o una ruta) en un DataFrame de pandas.
+
+    `columnas` limita la lectura a esas columnas, en ese orden; las que falten
+    quedan vacías. `esquema` fija el tipo de cada columna (por ejemplo
+    ESQUEMA_ENTRADAS) en lugar de inferirlo.
+    """
+    try:
+        nombre = getattr(uploaded_file, 'name', str(uploaded_file))
+        formato = _formato(nombre)
+        if formato == 'csv':
+            df = _leer_csv(uploaded_file, nombre, columnas, esquema)
+        elif formato == 'parquet':
+            df = pd.read_parquet(uploaded_file, columns=_columnas_parquet(uploaded_file, columnas))
+        elif nombre.endswith('.xlsx'):
+            # openpyxl en modo solo lectura recorre las filas sin armar el libro completo en memoria
+            bloques = list(_iter_excel(uploaded_file, 50_000))
+            df = pd.concat(bloques, ignore_index=True) if bloques else pd.DataFrame()
+        else:
+            df = pd.read_excel(uploaded_file, usecols=_filtro(columnas))
+        return _tipar(df, columnas, esquema)
+    except Exception as e:
+        raise Exception(f"Error al cargar el archivo: {str(e)}")
+
+def _iter_excel(ruta, chunksize):
+    from openpyxl import load_workbook
+
+    libro = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        filas = libro.active.iter_rows(values_only=True)
+        encabezado = next(filas, None)
+        if encabezado is None:
+            return
+        bloque = []
+        for fila in filas:
+            bloque.append(fila)
+            if len(bloque) == chunksize:
+                yield pd.DataFrame(bloque, columns=encabezado)
+                bloque = []
+        if bloque:
+            yield pd.DataFrame(bloque, columns=encabezado)
+    finally:
+        libro.close()
+
+def _columnas_parquet(ruta, columnas):
+    if columnas is None:
+        return None
+    import pyarrow.parquet as pq
+
+    presentes = set(pq.read_schema(ruta).names)
+    if hasattr(ruta, 'seek'):
+        ruta.seek(0)
+    return [c for c in columnas if c in presentes]
+
+def _iter_parquet(ruta, chunksize, columnas=None):
+    import pyarrow.parquet as pq
+
+    archivo = pq.ParquetFile(ruta)
+    if columnas is not None:
+        columnas = [c for c in columnas if c in archivo.schema_arrow.names]
+    for lote in archivo.iter_batches(batch_size=chunksize, columns=columnas):
+        yield lote.to_pandas()
+
+def _rebloquear(pa, lotes, chunksize):
+    """Reagrupa los lotes del lector de pyarrow en tablas de exactamente `chunksize` filas."""
+    pendientes, filas = [], 0
+    for lote in lotes:
+        pendientes.append(lote)
+        filas += lote.num_rows
+        while filas >= chunksize:
+            tabla = pa.Table.from_batches(pendientes)
+            yield tabla.slice(0, chunksize)
+            resto = tabla.slice(chunksize)
+            pendientes, filas = resto.to_batches(), resto.num_rows
+    if filas:
+        yield pa.Table.from_batches(pendientes)
+
+def _iter_csv(ruta, nombre, chunksize, columnas, esquema):
+    pa = _pyarrow()
+    if pa is None:
+        yield from pd.read_csv(ruta, compression=_compresion(nombre), dtype=esquema,
+                               usecols=_filtro(columnas), chunksize=chunksize)
+        return
+    import pyarrow.csv as pacsv
+
+    # El lector adelanta unos 20 bloques de lectura (1 MB por defecto). Con un archivo de
+    # Python esa es toda la memoria extra; sobre un archivo nativo de pyarrow adelanta el archivo completo
+    lectura, conversion = _opciones_csv(pa, columnas, esquema)
+    archivo = ruta if hasattr(ruta, 'read') else open(ruta, 'rb')
+    try:
+        lector = pacsv.open_csv(pa.input_stream(archivo, compression=_compresion(nombre)),
+                                read_options=lectura, convert_options=conversion)
+        for tabla in _rebloquear(pa, lector, chunksize):
+            yield _a_pandas(pa, tabla)
+    finally:
+        if archivo is not ruta:
+            archivo.close()
+
+def iter_file(ruta, chunksize=50_000, columnas=None, esquema=None):
+    """Lee el archivo (ruta o archivo subido) por bloques de `chunksize` filas sin cargarlo entero en memoria.
+
+    `columnas` y `esquema` funcionan como en load_file. Sin `esquema`, los tipos
+    de un CSV se infieren del primer bloque de lectura: un decimal que aparece
+    más adelante en una columna de enteros hace fallar la lectura.
+    """
     try:
-        if uploaded_file.name.endswith('.csv'):
-            return pd.read_csv(uploaded_file)
-        elif uploaded_file.name.endswith(('.xls', '.xlsx')):
-            return pd.read_excel(uploaded_file)
+        nombre = getattr(ruta, 'name', str(ruta))
+        formato = _formato(nombre)
+        if formato == 'csv':
+            bloques = _iter_csv(ruta, nombre, chunksize, columnas, esquema)
+        elif formato == 'parquet':
+            bloques = _iter_parquet(ruta, chunksize, columnas)
         else:
-            raise ValueError("Formato de archivo no soportado")
+            bloques = _iter_excel(ruta, chunksize)
+        for bloque in bloques:
+            yield _tipar(bloque, columnas, esquema)
     except Exception as e:
         raise Exception(f"Error al cargar el archivo: {str(e)}")
 
+# Gráficos con muchos datos: desde cuántos puntos se usa WebGL y cuántos se envían como máximo al navegador
+UMBRAL_WEBGL = 10_000
+MAX_PUNTOS_LINEA = 5_000
+MAX_PUNTOS_DISPERSION = 50_000
+MAX_BARRAS = 1_000
+
+def _eje(serie):
+    """Posiciones numéricas del eje x para reducir; si no es numérico u ordenado se usa el orden de las filas."""
+    if pd.api.types.is_datetime64_any_dtype(serie) and serie.is_monotonic_increasing:
+        return serie.to_numpy().astype('int64').astype(float)
+    if pd.api.types.is_numeric_dtype(serie) and serie.is_monotonic_increasing:
+        return serie.to_numpy(dtype=float)
+    return np.arange(len(serie), dtype=float)
+
+def _lttb(x, y, n):
+    """Índices de los `n` puntos elegidos por Largest-Triangle-Three-Buckets."""
+    total = len(y)
+    if n >= total or n < 3:
+        return np.arange(total)
+    bordes = np.linspace(1, total - 1, n - 1).astype(np.int64)
+    indices = np.empty(n, dtype=np.int64)
+    indices[0], indices[-1] = 0, total - 1
+    a = 0
+    for i in range(n - 2):
+        inicio, fin = bordes[i], bordes[i + 1]
+        siguiente = slice(fin, bordes[i + 2] if i + 2 < len(bordes) else total)
+        cx, cy = x[siguiente].mean(), y[siguiente].mean()
+        areas = np.abs((x[a] - cx) * (y[inicio:fin] - y[a]) - (x[a] - x[inicio:fin]) * (cy - y[a]))
+        a = inicio + int(np.argmax(areas))
+        indices[i + 1] = a
+    return indices
+
+def _minmax(y, n):
+    """Índices del mínimo y el máximo de cada tramo: conserva la envolvente de la serie."""
+    total = len(y)
+    tramos = max(n // 2, 1)
+    if total <= n:
+        return np.arange(total)
+    ids = np.arange(total) * tramos // total
+    orden = np.lexsort((y, ids))
+    inicios = np.searchsorted(ids, np.arange(tramos))
+    fines = np.append(inicios[1:], total) - 1
+    return np.unique(np.concatenate([[0, total - 1], orden[inicios], orden[fines]]))
+
+def _agregar_barras(datos, x_column, y_column):
+    agrupado = datos.groupby(x_column, sort=True, observed=True)[y_column].sum().reset_index()
+    if len(agrupado) <= MAX_BARRAS:
+        return agrupado
+    x = agrupado[x_column]
+    if pd.api.types.is_numeric_dtype(x) or pd.api.types.is_datetime64_any_dtype(x):
+        tramos = pd.cut(x, MAX_BARRAS)
+        agrupado = agrupado.groupby(tramos, observed=True)[y_column].sum()
+        return pd.DataFrame({x_column: pd.IntervalIndex(agrupado.index).mid, y_column: agrupado.to_numpy()})
+    # Categorías: las de mayor valor y el resto sumado en "Otros"
+    principales = agrupado[y_column].abs().nlargest(MAX_BARRAS - 1).index
+    otros = agrupado.drop(principales)[y_column].sum()
+    return pd.concat([agrupado.loc[principales],
+                      pd.DataFrame({x_column: ["Otros"], y_column: [otros]})], ignore_index=True)
+
+@cache_grafico
+def reducir_datos(datos, plot_type, x_column, y_column):
+    """Reduce los datos de un gráfico a lo que vale la pena enviar al navegador.
+
+    Líneas con LTTB, áreas con mínimo y máximo por tramo, dispersión con una
+    muestra uniforme y barras sumadas por valor de x. Devuelve los datos
+    reducidos y la cantidad de puntos original; el resultado se cachea por
+    contenido, columnas y tipo de gráfico.
+    """
+    datos = datos.dropna(subset=[y_column])
+    total = len(datos)
+    if plot_type == "Barras":
+        return (_agregar_barras(datos, x_column, y_column) if total > MAX_BARRAS else datos), total
+    if plot_type == "Dispersión":
+        if total <= MAX_PUNTOS_DISPERSION:
+            return datos, total
+        indices = np.sort(np.random.default_rng(0).choice(total, MAX_PUNTOS_DISPERSION, replace=False))
+        return datos.iloc[indices], total
+    if total <= MAX_PUNTOS_LINEA:
+        return datos, total
+    y = datos[y_column].to_numpy(dtype=float)
+    if plot_type == "Área":
+        indices = _minmax(y, MAX_PUNTOS_LINEA)
+    else:
+        indices = _lttb(_eje(datos[x_column]), y, MAX_PUNTOS_LINEA)
+    return datos.iloc[indices], total
+
 def generate_plot(df, plot_type, x_column, y_column):
-    """Genera diferentes tipos de gráficos usando Plotly."""
+    """Genera diferentes tipos de gráficos usando Plotly.
+
+    Con muchos datos se grafica una versión reducida (ver reducir_datos) y la
+    línea y la dispersión se dibujan con WebGL.
+    """
+    import plotly.express as px
+
+    if plot_type not in ("Líneas", "Barras", "Dispersión", "Área"):
+        raise ValueError("Tipo de gráfico no soportado")
+    datos, total = reducir_datos(df[list(dict.fromkeys([x_column, y_column]))], plot_type, x_column, y_column)
+    # WebGL según el tamaño original: una línea reducida a MAX_PUNTOS_LINEA nunca superaría el umbral
+    render_mode = 'webgl' if total > UMBRAL_WEBGL else 'auto'
+    nota = f" ({len(datos):,} de {total:,} puntos)" if len(datos) < total else ""
+
     if plot_type == "Líneas":
-        fig = px.line(df, x=x_column, y=y_column, 
-                     title=f'Gráfico de líneas: {y_column} vs {x_column}')
+        fig = px.line(datos, x=x_column, y=y_column, render_mode=render_mode,
+                     title=f'Gráfico de líneas: {y_column} vs {x_column}{nota}')
     elif plot_type == "Barras":
-        fig = px.bar(df, x=x_column, y=y_column,
-                    title=f'Gráfico de barras: {y_column} vs {x_column}')
+        fig = px.bar(datos, x=x_column, y=y_column,
+                    title=f'Gráfico de barras: {y_column} vs {x_column}{nota}')
     elif plot_type == "Dispersión":
-        fig = px.scatter(df, x=x_column, y=y_column,
-                        title=f'Gráfico de dispersión: {y_column} vs {x_column}')
-    elif plot_type == "Área":
-        fig = px.area(df, x=x_column, y=y_column,
-                     title=f'Gráfico de área: {y_column} vs {x_column}')
+        fig = px.scatter(datos, x=x_column, y=y_column, render_mode=render_mode,
+                        title=f'Gráfico de dispersión: {y_column} vs {x_column}{nota}')
     else:
-        raise ValueError("Tipo de gráfico no soportado")
+        fig = px.area(datos, x=x_column, y=y_column,
+                     title=f'Gráfico de área: {y_column} vs {x_column}{nota}')
     
     fig.update_layout(
         xaxis_title=x_column,
@@ -39,15 +330,126 @@ def generate_plot(df, plot_type, x_column, y_column):
     )
     return fig
 
-def export_dataframe(df, format_type):
+def export_dataframe(df, format_type, compresion=None):
     """Exporta el DataFrame en diferentes formatos."""
-    if format_type == "CSV":
-        buffer = BytesIO()
-        df.to_csv(buffer, index=False, encoding='utf-8-sig')
-        return buffer.getvalue()
-    elif format_type == "Excel":
-        buffer = BytesIO()
-        df.to_excel(buffer, index=False)
-        return buffer.getvalue()
-    else:
+    buffer = BytesIO()
+    export_chunks([df], buffer, format_type, compresion)
+    return buffer.getvalue()
+
+# Compresiones admitidas por formato de exportación; la primera es la predeterminada
+COMPRESIONES_EXPORTACION = {
+    "CSV": (None, 'gzip', 'zstd'),
+    "Excel": (None,),
+    "Parquet": ('snappy', 'zstd', 'gzip', 'none'),
+}
+
+# Filas de datos que entran en una hoja de Excel, sin contar el encabezado
+MAX_FILAS_EXCEL = 1_048_575
+
+class _SinCerrar(io.RawIOBase):
+    """Stream que escribe en el del llamador sin cerrarlo al terminar."""
+
+    def __init__(self, stream):
+        super().__init__()
+        self._stream = stream
+
+    def writable(self):
+        return True
+
+    def write(self, datos):
+        return self._stream.write(datos)
+
+    def close(self):
+        if not self.closed:
+            self._stream.flush()
+        super().close()
+
+def _salida_csv(destino, compresion):
+    if compresion == 'gzip':
+        import gzip
+
+        # GzipFile no cierra el stream que recibe. Con números el nivel 1 comprime casi igual
+        # que el 6 y es ~8 veces más rápido; para más compresión está zstd
+        return gzip.GzipFile(fileobj=destino, mode='wb', compresslevel=1, mtime=0)
+    if compresion == 'zstd':
+        import pyarrow as pa
+
+        return pa.CompressedOutputStream(pa.PythonFile(_SinCerrar(destino), mode='w'), 'zstd')
+    return _SinCerrar(destino)
+
+def _export_csv(chunks, destino, compresion):
+    filas = 0
+    salida = _salida_csv(destino, compresion)
+    texto = io.TextIOWrapper(salida, encoding='utf-8-sig', newline='')
+    try:
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(texto, index=False, header=(i == 0))
+            filas += len(chunk)
+    finally:
+        texto.detach()
+        salida.close()
+    return filas
+
+def _export_excel(chunks, destino):
+    from openpyxl import Workbook
+
+    # En modo de solo escritura openpyxl vuelca cada fila a un archivo temporal y no guarda la hoja en memoria
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet()
+    filas = 0
+    for i, chunk in enumerate(chunks):
+        if i == 0:
+            hoja.append([str(c) for c in chunk.columns])
+        filas += len(chunk)
+        if filas > MAX_FILAS_EXCEL:
+            raise ValueError(f"Excel admite hasta {MAX_FILAS_EXCEL:,} filas por hoja")
+        valores = chunk.astype(object).where(chunk.notna(), None)
+        for fila in valores.itertuples(index=False, name=None):
+            hoja.append(fila)
+    libro.save(destino)
+    return filas
+
+def _export_parquet(chunks, destino, compresion):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    filas = 0
+    writer = None
+    try:
+        for chunk in chunks:
+            tabla = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(destino, tabla.schema, compression=compresion)
+            writer.write_table(tabla.cast(writer.schema))
+            filas += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return filas
+
+def export_chunks(chunks, destino, format_type, compresion=None):
+    """Escribe los bloques de resultados en `destino` a medida que llegan.
+
+    `chunks` es un DataFrame o un iterable de DataFrames con las mismas
+    columnas; `destino` es una ruta o un stream binario abierto (que queda
+    abierto). Solo hay un bloque en memoria a la vez. `compresion` toma uno de
+    los valores de COMPRESIONES_EXPORTACION para el formato; sin indicarla se
+    usa la predeterminada. Devuelve la cantidad de filas escritas.
+    """
+    if format_type not in COMPRESIONES_EXPORTACION:
         raise ValueError("Formato de exportación no soportado")
+    if compresion is None:
+        compresion = COMPRESIONES_EXPORTACION[format_type][0]
+    elif compresion not in COMPRESIONES_EXPORTACION[format_type]:
+        raise ValueError(f"Compresión no soportada para {format_type}: {compresion}")
+    if isinstance(chunks, pd.DataFrame):
+        chunks = [chunks]
+
+    if format_type == "Excel":
+        return _export_excel(chunks, destino)
+    if format_type == "Parquet":
+        return _export_parquet(chunks, destino, compresion)
+    if hasattr(destino, 'write'):
+        return _export_csv(chunks, destino, compresion)
+    with open(destino, 'wb') as f:
+        return _export_csv(chunks, f, compresion)
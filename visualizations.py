@@ -1,20 +1,17 @@
-
-import streamlit as st
 import plotly.graph_objects as go
-import plotly.express as px
-from typing import Dict, List
+from typing import TYPE_CHECKING, Dict, List
+
+# El caché no depende de plotly: utils lo usa sin cargarlo
+from cache_graficos import cache_grafico, estadisticas_cache, limpiar_cache
+from calculos import ETIQUETAS_CATEGORIAS
 
-@st.cache_data
+if TYPE_CHECKING:
+    import pandas as pd
+
+@cache_grafico
 def create_costos_comparison(ahorros: Dict[str, float]) -> go.Figure:
     """Crear gráfico de barras para comparar los diferentes tipos de ahorro."""
-    categorias = {
-        'planchas': 'Planchas',
-        'velocidad_ajuste': 'Velocidad de Ajuste',
-        'velocidad_impresion': 'Velocidad en Impresión',
-        'tinta_blanca': 'Tinta Blanca',
-        'tintas': 'Tintas',
-        'plancha_parada': 'Plancha-Parada'
-    }
+    categorias = ETIQUETAS_CATEGORIAS
     
     fig = go.Figure(data=[
         go.Bar(
@@ -34,6 +31,7 @@ def create_costos_comparison(ahorros: Dict[str, float]) -> go.Figure:
     
     return fig
 
+@cache_grafico
 def create_tiempo_paradas_comparison(tiempo_actual: float, tiempo_iflexo: float) -> go.Figure:
     """Crear gráfico para comparar tiempos de parada."""
     fig = go.Figure(data=[
@@ -54,6 +52,7 @@ def create_tiempo_paradas_comparison(tiempo_actual: float, tiempo_iflexo: float)
     
     return fig
 
+@cache_grafico
 def create_velocidad_comparison(velocidad_actual: float, velocidad_iflexo: float) -> go.Figure:
     """Crear gráfico para comparar velocidades."""
     fig = go.Figure(data=[
@@ -74,6 +73,7 @@ def create_velocidad_comparison(velocidad_actual: float, velocidad_iflexo: float
     
     return fig
 
+@cache_grafico
 def create_tinta_comparison(consumo_actual: float, ahorro: float, tipo: str = "blanca") -> go.Figure:
     """Crear gráfico para comparar consumo de tinta."""
     consumo_iflexo = consumo_actual - ahorro
@@ -95,3 +95,128 @@ def create_tinta_comparison(consumo_actual: float, ahorro: float, tipo: str = "b
     )
     
     return fig
+
+@cache_grafico
+def create_tornado_chart(sensibilidad: "pd.DataFrame", ahorro_base: float, max_entradas: int = 15) -> go.Figure:
+    """Crear gráfico tornado con el efecto de cada entrada sobre el ahorro total."""
+    datos = sensibilidad[sensibilidad['impacto'] > 0].head(max_entradas).iloc[::-1]
+
+    fig = go.Figure(data=[
+        go.Bar(
+            name='Entrada baja',
+            y=datos['etiqueta'],
+            x=datos['bajo'] - ahorro_base,
+            base=ahorro_base,
+            orientation='h',
+        ),
+        go.Bar(
+            name='Entrada alta',
+            y=datos['etiqueta'],
+            x=datos['alto'] - ahorro_base,
+            base=ahorro_base,
+            orientation='h',
+        )
+    ])
+    
+    fig.update_layout(
+        title="Sensibilidad del Ahorro Total Anual",
+        xaxis_title="Ahorro total ($/año)",
+        yaxis_title="Entrada",
+        barmode='overlay',
+        template="plotly_white"
+    )
+    
+    return fig
+
+@cache_grafico
+def create_proyeccion_chart(flujos: List[float], inversion: float) -> go.Figure:
+    """Crear gráfico de ahorro anual proyectado y flujo neto acumulado."""
+    anios = [f"Año {i}" for i in range(1, len(flujos) + 1)]
+    acumulado = []
+    total = -inversion
+    for flujo in flujos:
+        total += flujo
+        acumulado.append(total)
+    
+    fig = go.Figure(data=[
+        go.Bar(
+            name='Ahorro anual',
+            x=anios,
+            y=flujos,
+            text=[f"${v:,.1f}" for v in flujos],
+            textposition='auto',
+        ),
+        go.Scatter(
+            name='Flujo neto acumulado',
+            x=anios,
+            y=acumulado,
+            mode='lines+markers',
+        )
+    ])
+    
+    fig.update_layout(
+        title="Proyección de Ahorro e Inversión",
+        xaxis_title="Año",
+        yaxis_title="Monto ($)",
+        template="plotly_white"
+    )
+    
+    return fig
+
+@cache_grafico
+def create_proveedores_comparison(ahorros: "pd.DataFrame") -> go.Figure:
+    """Crear gráfico de barras agrupadas con el ahorro de cada proveedor por categoría."""
+
+    fig = go.Figure(data=[
+        go.Bar(
+            name=str(proveedor),
+            x=list(ETIQUETAS_CATEGORIAS.values()),
+            y=[fila[k] for k in ETIQUETAS_CATEGORIAS.keys()],
+            hovertemplate="%{x}: $%{y:,.1f}<extra>" + str(proveedor) + "</extra>",
+        )
+        for proveedor, fila in ahorros.iterrows()
+    ])
+
+    fig.update_layout(
+        title="Ahorro por Categoría y Proveedor",
+        xaxis_title="Categoría",
+        yaxis_title="Ahorro ($)",
+        barmode='group',
+        legend_title="Proveedor",
+        template="plotly_white"
+    )
+
+    return fig
+
+@cache_grafico
+def create_proveedores_totales(ahorros: "pd.DataFrame") -> go.Figure:
+    """Crear gráfico de barras apiladas con el ahorro total de cada proveedor."""
+    proveedores = [str(p) for p in ahorros.index]
+
+    fig = go.Figure(data=[
+        go.Bar(
+            name=etiqueta,
+            x=proveedores,
+            y=ahorros[clave],
+        )
+        for clave, etiqueta in ETIQUETAS_CATEGORIAS.items()
+    ])
+    totales = ahorros[list(ETIQUETAS_CATEGORIAS)].sum(axis=1)
+    fig.add_trace(go.Scatter(
+        x=proveedores,
+        y=totales,
+        text=[f"${v:,.1f}" for v in totales],
+        mode='text',
+        textposition='top center',
+        showlegend=False,
+    ))
+
+    fig.update_layout(
+        title="Ahorro Total Anual por Proveedor",
+        xaxis_title="Proveedor",
+        yaxis_title="Ahorro ($)",
+        barmode='relative',
+        template="plotly_white"
+    )
+
+    return fig